@@ -0,0 +1,95 @@
+"""Sprite atlas: every sprite packed into one surface, cached on disk.
+
+The cache is reused only while every source file's SHA-1 matches its manifest.
+"""
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+
+import pygame
+
+VERSION = 1
+PADDING = 1  # transparent gap so scaled or rotated sprites never sample a neighbour
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def pack(sizes, max_width=512):
+    """Shelf-pack (w, h) sizes, tallest first; returns rects by index and the atlas size"""
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    rects = [None] * len(sizes)
+    x = y = shelf_h = width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > max_width:
+            x = 0
+            y += shelf_h + PADDING
+            shelf_h = 0
+        rects[i] = (x, y, w, h)
+        x += w + PADDING
+        shelf_h = max(shelf_h, h)
+        width = max(width, x)
+    return rects, (max(1, width), max(1, y + shelf_h))
+
+
+class Atlas:
+    def __init__(self, surface, rects):
+        self.surface = surface
+        self.rects = rects
+        self.sprites = {name: surface.subsurface(rect) for name, rect in rects.items()}
+
+    def get(self, name):
+        return self.sprites.get(name)
+
+    def convert(self, prepare):
+        # convert the sheet once, then re-cut the sprites from the converted copy
+        return Atlas(prepare(self.surface), self.rects)
+
+
+def build_atlas(sources, workers=4):
+    """Decode sources ({name: path}) in parallel and pack them into a new Atlas"""
+    names = list(sources)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        images = list(pool.map(lambda name: pygame.image.load(sources[name]), names))
+    rects, size = pack([image.get_size() for image in images])
+    surface = pygame.Surface(size, pygame.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    for image, rect in zip(images, rects):
+        surface.blit(image, rect[:2])
+    return Atlas(surface, dict(zip(names, rects)))
+
+
+def load_atlas(sources, cache_dir):
+    """Atlas of the existing files in sources, from the cache when it is still valid"""
+    sources = {name: path for name, path in sources.items() if os.path.isfile(path)}
+    hashes = {name: file_hash(path) for name, path in sources.items()}
+    manifest_path = os.path.join(cache_dir, 'atlas.json')
+    pixels_path = os.path.join(cache_dir, 'atlas.rgba')
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest['version'] == VERSION and manifest['hashes'] == hashes:
+            with open(pixels_path, 'rb') as f:
+                surface = pygame.image.frombytes(f.read(), tuple(manifest['size']), 'RGBA')
+            return Atlas(surface, {name: tuple(rect) for name, rect in manifest['rects'].items()})
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logging.warning(f"Rebuilding sprite atlas, cache unreadable: {e}")
+
+    atlas = build_atlas(sources)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(pixels_path, 'wb') as f:
+            f.write(pygame.image.tobytes(atlas.surface, 'RGBA'))
+        # the manifest goes last, so a crash mid-write leaves a cache that fails validation
+        with open(manifest_path, 'w') as f:
+            json.dump({'version': VERSION, 'hashes': hashes, 'size': atlas.surface.get_size(),
+                       'rects': atlas.rects}, f)
+    except OSError as e:
+        logging.error(f"Error writing sprite atlas cache: {e}")
+    return atlas
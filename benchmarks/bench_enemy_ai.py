@@ -0,0 +1,68 @@
+"""Scaling benchmark for the multi-process enemy AI in parallel_ai.py.
+
+Times one steering tick for uniformly scattered crowds across worker counts, next
+to the in-process vectorized kernel (workers = 0):
+
+    python benchmarks/bench_enemy_ai.py --enemies 10000 50000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from parallel_ai import EnemyAIPool, steer
+
+WORLD_WIDTH = 3200
+WORLD_HEIGHT = 1920
+
+
+def bench(enemies, workers, ticks):
+    rng = numpy.random.default_rng(0)
+    xs = rng.uniform(0, WORLD_WIDTH, enemies)
+    ys = rng.uniform(0, WORLD_HEIGHT, enemies)
+    alive = numpy.ones(enemies, dtype=numpy.bool_)
+    px, py = WORLD_WIDTH / 2, WORLD_HEIGHT / 2
+    if workers == 0:
+        idx = numpy.arange(enemies)
+        start = time.perf_counter()
+        for _ in range(ticks):
+            xs, ys = steer(xs, ys, idx, idx, px, py, 1.2, 60)
+        return (time.perf_counter() - start) / ticks
+
+    pool = EnemyAIPool(workers, WORLD_WIDTH, capacity=enemies)
+    try:
+        pool.step(xs, ys, alive, px, py, 1.2)  # warm-up: workers importing numpy
+        start = time.perf_counter()
+        for _ in range(ticks):
+            nx, ny = pool.step(xs, ys, alive, px, py, 1.2)
+            xs, ys = nx.copy(), ny.copy()
+        elapsed = (time.perf_counter() - start) / ticks
+        del nx, ny
+    finally:
+        pool.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4, 8])
+    parser.add_argument('--ticks', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"cpus available: {os.cpu_count()}")
+    print(f"{'enemies':>8} {'workers':>8} {'ms/tick':>10} {'speedup':>8}")
+    for enemies in args.enemies:
+        base = None
+        for workers in args.workers:
+            ms = bench(enemies, workers, args.ticks) * 1000
+            if base is None:
+                base = ms
+            print(f"{enemies:>8} {workers:>8} {ms:>10.2f} {base / ms:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Map cost at scale: compile, collision, spawn placement and drawing on generated maps.
+
+Generates one map per layout with tools/genmap.py into a temporary directory, loads
+it, then times the player's obstacle clamp and SpawnDirector.place at random points
+and Map.draw plus the blit of its chunks with the camera panning across the world:
+
+    python benchmarks/bench_maps.py --obstacles 1000 10000 --layouts maze clutter
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# after ROOT: tools/replay.py would shadow the top-level replay module
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+import headless
+import genmap
+from maps import Map, save_chunked_map
+
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times) * 1000, max(times) * 1000
+
+
+def bench(game, layout, count, world, repeats, maps_dir):
+    width, height = world
+    name = f'{layout}_{count}'
+    obstacles = genmap.generate(layout, 0, width, height, count)
+    save_chunked_map(name, world, obstacles, genmap.wave_schedule(300, 10, 1.02, 400), maps_dir=maps_dir)
+    start = time.perf_counter()
+    game.current_map = Map(game, name, maps_dir=maps_dir)
+    compile_ms = (time.perf_counter() - start) * 1000
+    game.WORLD_WIDTH, game.WORLD_HEIGHT = width, height
+    rng = random.Random(0)
+    player = game.player
+
+    def clamp():
+        player.prev_x, player.prev_y = player.x, player.y
+        player.x, player.y = rng.uniform(0, width), rng.uniform(0, height)
+        player.clamp(width, height)
+
+    def place():
+        player.x, player.y = rng.uniform(0, width), rng.uniform(0, height)
+        game.director.place()
+
+    step = 0
+
+    def draw():
+        nonlocal step
+        # pan diagonally, so chunks keep entering the view
+        step += 1
+        game.camera_x = (step * 37) % max(1, width - 800)
+        game.camera_y = (step * 23) % max(1, height - 480)
+        game.update_view()
+        game.current_map.draw(game)
+        # submit the queued chunks, so the blit is timed and the queue does not grow
+        game.render_queue.flush(game.display)
+
+    game.director.build_density()
+    clamp_ms = timed(clamp, repeats)[0]
+    place_ms = timed(place, repeats)[0]
+    draw_ms, draw_worst = timed(draw, repeats)
+    return len(obstacles), compile_ms, clamp_ms * 1000, place_ms * 1000, draw_ms, draw_worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--obstacles', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--layouts', nargs='+', choices=sorted(genmap.LAYOUTS), default=sorted(genmap.LAYOUTS))
+    parser.add_argument('--world', type=int, nargs=2, default=[12800, 7680], metavar=('W', 'H'))
+    parser.add_argument('--repeats', type=int, default=500)
+    args = parser.parse_args()
+
+    game = headless.create_game(seed=0)
+    game.start_game()
+    print(f"{'layout':>10} {'obstacles':>10} {'compile ms':>11} {'clamp us':>9} {'place us':>9} "
+          f"{'draw ms':>8} {'worst':>8}")
+    with tempfile.TemporaryDirectory() as maps_dir:
+        for layout in args.layouts:
+            for count in args.obstacles:
+                made, compile_ms, clamp_us, place_us, draw_ms, draw_worst = bench(
+                    game, layout, count, args.world, args.repeats, maps_dir)
+                print(f"{layout:>10} {made:>10} {compile_ms:>11.1f} {clamp_us:>9.1f} {place_us:>9.1f} "
+                      f"{draw_ms:>8.2f} {draw_worst:>8.2f}")
+                game.current_map.close()
+
+
+if __name__ == '__main__':
+    main()
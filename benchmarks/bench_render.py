@@ -0,0 +1,78 @@
+"""Compare the surface and texture render backends on the same game frame.
+
+Runs headless with SDL's dummy video driver and the software renderer, so the
+numbers measure CPU-side drawing cost, not a GPU:
+
+    python benchmarks/bench_render.py --enemies 200 1000 --frames 300
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = ['surface', 'texture-software']
+
+
+def run_one(backend, enemies, frames, zoom):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    sys.path.insert(0, ROOT)
+    import main
+
+    random.seed(0)
+    game = main.Game(render_backend=backend)
+    game.start_game()
+    game.game_zoom = zoom
+    game.sim_view = (game.window_res, zoom)
+    game.spawn_enemies(enemies, append=True)
+    # keep the crowd on screen so culling does not hide the difference
+    pool = game.registry.enemies
+    for e in game.enemies:
+        pool.move(e, game.player.x + random.uniform(-380, 380) / zoom,
+                  game.player.y + random.uniform(-220, 220) / zoom)
+    game.make_particles(game.player.x, game.player.y, game.coral, n=200)
+    scene = game.scenes['game']
+    scene.update()
+
+    # warm caches (scaled sprites, stamps, textures) before timing
+    for _ in range(10):
+        scene.draw(game.display)
+        game.present()
+    start = time.perf_counter()
+    for _ in range(frames):
+        scene.draw(game.display)
+        game.present()
+    elapsed = time.perf_counter() - start
+    return {'backend': backend, 'enemies': enemies, 'zoom': zoom, 'ms_per_frame': elapsed / frames * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--zoom', type=float, default=1.0)
+    parser.add_argument('--backend', choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        # child process: one backend per interpreter, since each owns the SDL window
+        print(json.dumps(run_one(args.backend, args.enemies[0], args.frames, args.zoom)))
+        return
+
+    print(f"{'enemies':>8} {'backend':>18} {'ms/frame':>10}")
+    for enemies in args.enemies:
+        for backend in BACKENDS:
+            out = subprocess.run(
+                [sys.executable, __file__, '--backend', backend, '--enemies', str(enemies),
+                 '--frames', str(args.frames), '--zoom', str(args.zoom)],
+                capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{enemies:>8} {backend:>18} {result['ms_per_frame']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Cost of save states and the rewind buffer in savestate.py at large entity counts.
+
+Times capture_state/restore_state on their own, then a rewind buffer keyframe, a
+delta frame and a rewind, on a mid-fight world with N enemies plus bullets,
+pickups and power-ups (about N/10 each):
+
+    python benchmarks/bench_savestate.py --entities 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+from entities import Bullet
+from savestate import RewindBuffer, capture_state, restore_state
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def build(entities):
+    game = headless.create_game(seed=0)
+    game.start_game()
+    game.spawn_enemies(entities, append=False)
+    extra = max(1, entities // 10)
+    rng = game.rng.spawn
+    for _ in range(extra):
+        x = rng.uniform(0, game.WORLD_WIDTH)
+        y = rng.uniform(0, game.WORLD_HEIGHT)
+        game.registry.bullets.add(Bullet(game, x, y, (1.0, 0.0)))
+        game.spawn_pickup(x, y, 'coin')
+        game.spawn_power_up(x, y, 'rapid_fire')
+    return game
+
+
+def bench(entities, repeat):
+    game = build(entities)
+    capture_ms, state = timed(lambda: capture_state(game), repeat)
+    restore_ms, _ = timed(lambda: restore_state(game, state), repeat)
+
+    buffer = RewindBuffer(game, max_entities=float("inf"))
+    keyframe_ms, _ = timed(buffer.record, 1)
+    keyframe_bytes = buffer.bytes
+    # move everything a little between frames, as one simulation tick would
+    for e in game.enemies:
+        game.registry.enemies.move(e, e.x + 1.0, e.y)
+    for b in game.bullets:
+        game.registry.bullets.move(b, b.x + 5.0, b.y)
+    delta_ms, _ = timed(buffer.record, 1)
+    delta_bytes = buffer.bytes - keyframe_bytes
+    game.frame_time += 1.0
+    rewind_ms, _ = timed(lambda: buffer.rewind(0.1), 1)
+    return capture_ms, restore_ms, keyframe_ms, keyframe_bytes, delta_ms, delta_bytes, rewind_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'enemies':>8} {'capture':>9} {'restore':>9} {'keyframe':>9} {'kf KiB':>8} "
+          f"{'delta':>9} {'delta KiB':>9} {'rewind':>9}   (ms unless noted)")
+    for entities in args.entities:
+        capture_ms, restore_ms, keyframe_ms, kf_bytes, delta_ms, delta_bytes, rewind_ms = bench(entities, args.repeat)
+        print(f"{entities:>8} {capture_ms:>9.3f} {restore_ms:>9.3f} {keyframe_ms:>9.2f} {kf_bytes / 1024:>8.0f} "
+              f"{delta_ms:>9.2f} {delta_bytes / 1024:>9.0f} {rewind_ms:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
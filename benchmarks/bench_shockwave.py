@@ -0,0 +1,89 @@
+"""Cost of resolving shockwave rings against a crowd: full scan vs the annulus query.
+
+Scatters N enemies around a boss and expands S shockwaves through their whole range,
+timing per tick the old approach (every ring tests every enemy) against an annulus
+query per ring on the neighbour grid SimulationLOD already built for steering. The
+cost of building a grid just for the rings, the fallback when steering runs in
+worker processes, is listed separately:
+
+    python benchmarks/bench_shockwave.py --enemies 500 5000 --waves 4
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial import SpatialGrid
+
+TOLERANCE = 10
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def scan(points, grid, rings):
+    hits = 0
+    for x, y, radius in rings:
+        for p in points:
+            if abs(math.hypot(p.x - x, p.y - y) - radius) < TOLERANCE:
+                hits += 1
+    return hits, len(points) * len(rings)
+
+
+def query(points, grid, rings):
+    grid.visited = 0
+    hits = 0
+    for x, y, radius in rings:
+        hits += len(grid.query_annulus(x, y, radius - TOLERANCE, radius + TOLERANCE))
+    return hits, grid.visited
+
+
+def build(points):
+    grid = SpatialGrid(60)
+    for p in points:
+        grid.insert(p)
+    return grid
+
+
+def run(fn, points, grid, waves, rng):
+    centres = [(rng.uniform(1000, 2200), rng.uniform(600, 1300)) for _ in range(waves)]
+    times = []
+    hits = tested = 0
+    for radius in range(10, 400, 15):
+        rings = [(x, y, radius) for x, y in centres]
+        start = time.perf_counter()
+        h, t = fn(points, grid, rings)
+        times.append(time.perf_counter() - start)
+        hits += h
+        tested += t
+    return sum(times) / len(times) * 1000, hits, tested
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, nargs='+', default=[500, 5000])
+    parser.add_argument('--waves', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'enemies':>8} {'scan ms':>9} {'tested':>9} {'query ms':>9} {'tested':>9} {'hits':>7} {'build ms':>9}")
+    for enemies in args.enemies:
+        rng = random.Random(0)
+        points = [Point(rng.uniform(0, 3200), rng.uniform(0, 1920)) for _ in range(enemies)]
+        start = time.perf_counter()
+        grid = build(points)
+        build_ms = (time.perf_counter() - start) * 1000
+        scan_ms, scan_hits, scanned = run(scan, points, grid, args.waves, random.Random(1))
+        query_ms, query_hits, tested = run(query, points, grid, args.waves, random.Random(1))
+        assert scan_hits == query_hits, (scan_hits, query_hits)
+        print(f"{enemies:>8} {scan_ms:>9.3f} {scanned:>9} {query_ms:>9.3f} {tested:>9} {query_hits:>7} {build_ms:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
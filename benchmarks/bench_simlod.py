@@ -0,0 +1,63 @@
+"""Per-tick cost of enemy steering with and without the simulation LOD in simlod.py.
+
+Runs GameScene's enemy step on a crowd of N enemies scattered over the world, once
+with every enemy in the near band (full steering every tick, no far slices) and once
+with SimulationLOD's usual bands, reporting mean and worst tick times:
+
+    python benchmarks/bench_simlod.py --enemies 500 2000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import headless
+from entities import Enemy
+
+
+def build(enemies):
+    game = headless.create_game(seed=0)
+    game.start_game()
+    game.director.clear()
+    rng = game.rng.spawn
+    game.registry.enemies.clear()
+    for _ in range(enemies):
+        game.registry.enemies.add(Enemy(game, rng.uniform(0, game.WORLD_WIDTH), rng.uniform(0, game.WORLD_HEIGHT),
+                                        game.SETTINGS['enemy_speed']))
+    return game
+
+
+def run(game, ticks, lod):
+    if not lod:
+        game.sim_lod.NEAR_RADIUS = math.inf
+    times = []
+    for _ in range(ticks):
+        start = time.perf_counter()
+        game.sim_lod.update_enemies(game.registry.enemies, game.player)
+        times.append(time.perf_counter() - start)
+    return sum(times) / len(times) * 1000, max(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--enemies', type=int, nargs='+', default=[500, 2000])
+    parser.add_argument('--ticks', type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'enemies':>8} {'full ms':>9} {'worst':>9} {'lod ms':>9} {'worst':>9} {'near':>6} {'steered':>8}")
+    for enemies in args.enemies:
+        game = build(enemies)
+        full_mean, full_worst = run(game, args.ticks, lod=False)
+        game.close()
+        game = build(enemies)
+        lod_mean, lod_worst = run(game, args.ticks, lod=True)
+        game.close()
+        stats = game.sim_lod.stats
+        print(f"{enemies:>8} {full_mean:>9.2f} {full_worst:>9.2f} {lod_mean:>9.2f} {lod_worst:>9.2f} "
+              f"{stats['near']:>6} {stats['steered']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import math
+import pygame
+from headless import click, key_press
+
+MOVE_KEYS = (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s)
+
+
+class AutoplayBot:
+    """Plays GameScene through Game.input_source: aims at the nearest enemy, fires,
+    reloads when empty, kites away from anything too close and collects pickups.
+    With shop=True it also spends its score on upgrades between waves."""
+    def __init__(self, kite_radius=150, shield_radius=40, pickup_radius=220, shop=False):
+        self.kite_radius = kite_radius
+        self.shield_radius = shield_radius
+        self.pickup_radius = pickup_radius
+        self.shop = shop
+
+    def nearest_target(self, game):
+        px, py = game.player.x, game.player.y
+        best, best_d = None, float('inf')
+        for e in game.enemies:
+            if e.alive:
+                d = math.hypot(e.x - px, e.y - py)
+                if d < best_d:
+                    best, best_d = e, d
+        boss = game.boss
+        if boss is not None and boss.alive:
+            d = math.hypot(boss.x - px, boss.y - py)
+            if d < best_d:
+                best, best_d = boss, d
+        return best, best_d
+
+    def nearest_pickup(self, game):
+        px, py = game.player.x, game.player.y
+        best, best_d = None, self.pickup_radius
+        for p in game.pickups:
+            if not p.get('picked'):
+                d = math.hypot(p['x'] - px, p['y'] - py)
+                if d < best_d:
+                    best, best_d = p, d
+        return best
+
+    def buy_upgrade(self, game):
+        # the cheapest affordable upgrade, one per tick, at the price the shop charges
+        affordable = [up for up in game.upgrades if not isinstance(up.cost, str) and up.cost <= game.score]
+        if affordable:
+            min(affordable, key=lambda up: up.cost).apply_upgrade(game)
+
+    def move(self, game, dx, dy):
+        held = game.input_source.keys.held
+        held.difference_update(MOVE_KEYS)
+        # dead zone so the player does not jitter around its goal
+        if dx < -0.3:
+            held.add(pygame.K_a)
+        elif dx > 0.3:
+            held.add(pygame.K_d)
+        if dy < -0.3:
+            held.add(pygame.K_w)
+        elif dy > 0.3:
+            held.add(pygame.K_s)
+
+    def act(self, game):
+        events = []
+        if game.scene != 'game':
+            game.input_source.keys.held.clear()
+            return events
+        if self.shop and not game.wave_active:
+            self.buy_upgrade(game)
+        px, py = game.player.x, game.player.y
+        target, dist = self.nearest_target(game)
+        # the clock value the coming tick will run at
+        now = game.time_source()
+
+        if target is None:
+            pickup = self.nearest_pickup(game)
+            if pickup is not None:
+                self.move(game, pickup['x'] - px, pickup['y'] - py)
+            else:
+                self.move(game, 0, 0)
+            if game.AMMO < game.MAX_AMMO and now >= game.reload_cooldown:
+                events.append(key_press(pygame.K_r))
+            return events
+
+        # movement: back off from close threats, otherwise drift toward pickups
+        if dist < self.kite_radius and dist > 0:
+            # retreat with a sideways component so the player does not pin itself to a wall
+            ax, ay = (px - target.x) / dist, (py - target.y) / dist
+            self.move(game, ax - ay * 0.5, ay + ax * 0.5)
+        else:
+            pickup = self.nearest_pickup(game)
+            if pickup is not None:
+                self.move(game, pickup['x'] - px, pickup['y'] - py)
+            else:
+                self.move(game, 0, 0)
+
+        if dist < self.shield_radius and now >= game.shield_last_used + game.SHIELD_COOLDOWN:
+            events.append(key_press(pygame.K_f))
+
+        # aim with the mouse, in the same screen coordinates a player would use
+        game.input_source.mouse = game.world_to_screen(target.x, target.y)
+        if game.AMMO <= 0:
+            if now >= game.reload_cooldown:
+                events.append(key_press(pygame.K_r))
+        elif now >= game.shoot_cooldown and now >= game.reload_cooldown:
+            events.append(click(game.input_source.mouse))
+        return events
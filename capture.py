@@ -0,0 +1,123 @@
+"""Gameplay capture: every presented frame to a PNG sequence or a video encoder.
+
+A writer thread does the encoding; when it falls behind, frames are dropped and
+counted rather than stalling the game.
+"""
+import logging
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import zlib
+
+import pygame
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.mov', '.avi')
+PNG_LEVEL = 1  # zlib level; faster than the default and only a little larger
+
+
+def png_chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def save_png(frame, path):
+    # pygame.image.save keeps the GIL for the whole encode, stalling the game thread
+    # for ~20 ms a frame; zlib releases it while compressing
+    w, h = frame.get_size()
+    raw = pygame.image.tobytes(frame, 'RGB')
+    stride = w * 3
+    # filter type 0 (none) before each row
+    rows = b''.join(b'\x00' + raw[y * stride:(y + 1) * stride] for y in range(h))
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)))
+        f.write(png_chunk(b'IDAT', zlib.compress(rows, PNG_LEVEL)))
+        f.write(png_chunk(b'IEND', b''))
+
+
+def encoder_command(path, size, fps):
+    return ['ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{size[0]}x{size[1]}', '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p', path]
+
+
+class FrameCapture:
+    def __init__(self, path, fps, max_queued=30, encoder=None):
+        """Frames go to the encoder command (a list, or None for ffmpeg when path has a
+        video extension) or else as frame_000000.png and up into the directory path"""
+        self.path = path
+        self.fps = fps
+        self.encoder = encoder
+        if encoder is None and path.lower().endswith(VIDEO_EXTENSIONS):
+            if shutil.which('ffmpeg'):
+                self.encoder = encoder_command
+            else:
+                self.path = os.path.splitext(path)[0]
+                logging.error(f"Capture: ffmpeg not found, writing PNG frames to {self.path} instead")
+        if self.encoder is None:
+            os.makedirs(self.path, exist_ok=True)
+        self.frames = queue.Queue(maxsize=max_queued)
+        self.size = None
+        self.process = None
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.writer = threading.Thread(target=self.write_frames, name='capture', daemon=True)
+        self.writer.start()
+
+    def add(self, frame):
+        """Queue a frame the caller no longer uses; dropped if the writer is behind"""
+        self.captured += 1
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self):
+        return self.captured, self.written, self.dropped
+
+    def close(self):
+        # let the writer drain what is queued; frames only arrive from the game thread
+        self.frames.put(None)
+        self.writer.join()
+        logging.info(f"Capture: {self.written} frames written to {self.path}, "
+                     f"{self.dropped} of {self.captured} dropped")
+
+    def write_frames(self):
+        try:
+            while True:
+                frame = self.frames.get()
+                if frame is None:
+                    break
+                if self.size is None:
+                    self.size = frame.get_size()
+                    if self.encoder is not None:
+                        command = self.encoder
+                        if callable(command):
+                            command = command(self.path, self.size, self.fps)
+                        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+                if frame.get_size() != self.size:
+                    frame = pygame.transform.scale(frame, self.size)
+                if self.process is not None:
+                    self.process.stdin.write(pygame.image.tobytes(frame, 'RGB'))
+                else:
+                    save_png(frame, os.path.join(self.path, f'frame_{self.written:06d}.png'))
+                self.written += 1
+        except (OSError, pygame.error) as e:
+            logging.error(f"Capture writer stopped: {e}")
+            self.dropped += 1
+            # keep draining, so add() never blocks and the rest count as dropped
+            while self.frames.get() is not None:
+                self.dropped += 1
+        finally:
+            if self.process is not None:
+                try:
+                    self.process.stdin.close()
+                except OSError:
+                    pass
+                try:
+                    self.process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    logging.error("Capture encoder did not finish, stopping it")
+                    self.process.kill()
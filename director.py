@@ -0,0 +1,133 @@
+"""Spawn director: places enemies in free space and spreads waves across frames.
+
+Only time.time gets a wall-clock budget; other clocks spawn a fixed count per tick so
+replays and headless runs stay deterministic.
+"""
+import collections
+import math
+import time
+
+from entities import Enemy
+
+
+class SpawnDirector:
+    BUDGET_MS = 1.0  # spawn work allowed per tick
+    FIXED_PER_TICK = 8  # spawns per tick on a recorded or stepped clock
+    CANDIDATES = 4  # points tried per spawn; the least crowded free one wins
+    MIN_RADIUS = 200  # spawn ring around the player
+    MAX_RADIUS = 480
+    CELL = 64  # crowd density grid
+    DENSITY_REFRESH = 30  # ticks before the density grid is rebuilt
+    CLEARANCE = 12  # distance kept from obstacle edges
+    # endless horde: waves grow until frames take HORDE_TARGET_MS, then hold there
+    HORDE_GROWTH = 1.25
+    HORDE_TARGET_MS = 12.0
+    HORDE_MAX = 5000  # wave size cap when frame time is not measured
+    # simulation state, saved and restored with the rest of the game (savestate.py)
+    STATE = ('pending', 'horde_size')
+
+    def __init__(self, game):
+        self.game = game
+        self.pending = 0
+        self.horde_size = 0
+        self.frame_ms = 0.0
+        self.density = None
+        self.density_age = 0
+
+    def realtime(self):
+        return self.game.time_source is time.time
+
+    def clear(self):
+        self.pending = 0
+        self.density = None
+
+    def queue(self, count):
+        self.pending += count
+
+    def update(self):
+        """Called once per simulation tick; spawns from the queue within the budget"""
+        if self.realtime():
+            # rawtime is the last frame's work, without the frame-rate cap's sleep
+            self.frame_ms += (self.game.clock.get_rawtime() - self.frame_ms) * 0.05
+        self.density_age += 1
+        if not self.pending:
+            return
+        if self.density is None or self.density_age >= self.DENSITY_REFRESH:
+            self.build_density()
+        if self.realtime():
+            deadline = time.perf_counter() + self.BUDGET_MS / 1000
+            # at least one per tick, so a slow machine still gets its wave
+            self.spawn_one()
+            while self.pending and time.perf_counter() < deadline:
+                self.spawn_one()
+        else:
+            for _ in range(min(self.pending, self.FIXED_PER_TICK)):
+                self.spawn_one()
+
+    def spawn_now(self, count):
+        # place count enemies immediately, bypassing the queue
+        self.build_density()
+        for _ in range(count):
+            self.pending += 1
+            self.spawn_one()
+
+    def build_density(self):
+        cell = self.CELL
+        self.density = collections.Counter((int(e.x // cell), int(e.y // cell)) for e in self.game.enemies if e.alive)
+        self.density_age = 0
+
+    def crowding(self, x, y):
+        cx, cy = int(x // self.CELL), int(y // self.CELL)
+        density = self.density
+        return sum(density[cx + i, cy + j] for i in (-1, 0, 1) for j in (-1, 0, 1))
+
+    def blocked(self, x, y):
+        game_map = self.game.current_map
+        if game_map is None:
+            return False
+        c = self.CLEARANCE
+        for ox, oy, ow, oh in game_map.obstacles_in(x - c, y - c, 2 * c, 2 * c):
+            if ox - c < x < ox + ow + c and oy - c < y < oy + oh + c:
+                return True
+        return False
+
+    def place(self):
+        game = self.game
+        rng = game.rng.spawn
+        px, py = game.player.x, game.player.y
+        best = None
+        # always draw every candidate, so the spawn stream advances the same amount per enemy
+        for _ in range(self.CANDIDATES):
+            ang = rng.uniform(0, 2 * math.pi)
+            dist = rng.uniform(self.MIN_RADIUS, self.MAX_RADIUS)
+            x = max(0, min(game.WORLD_WIDTH, px + math.cos(ang) * dist))
+            y = max(0, min(game.WORLD_HEIGHT, py + math.sin(ang) * dist))
+            score = (self.blocked(x, y), self.crowding(x, y))
+            if best is None or score < best[0]:
+                best = (score, x, y)
+        return best[1], best[2]
+
+    def spawn_one(self):
+        game = self.game
+        x, y = self.place()
+        e = Enemy(game, x, y, game.stats.enemy_speed)
+        # assign a random enemy sprite if available; it is the hitbox under
+        # pixel_collision, so it comes from the simulation's stream
+        if game.enemy_sprites:
+            e.sprite = game.rng.spawn.choice(game.enemy_sprites)
+        game.registry.enemies.add(e)
+        self.density[int(x // self.CELL), int(y // self.CELL)] += 1
+        self.pending -= 1
+
+    def next_horde_wave(self, base):
+        """Size of the next endless-horde wave, starting from base"""
+        if not self.horde_size:
+            self.horde_size = base
+        elif not self.realtime():
+            self.horde_size = min(self.HORDE_MAX, int(self.horde_size * self.HORDE_GROWTH) + 1)
+        elif self.frame_ms < self.HORDE_TARGET_MS:
+            self.horde_size = int(self.horde_size * self.HORDE_GROWTH) + 1
+        else:
+            # over target: back off a little and hold around the limit
+            self.horde_size = max(base, int(self.horde_size * 0.9))
+        return self.horde_size
@@ -1,7 +1,6 @@
 import pygame
-import random
-import time
 import math
+from masks import overlap
 
 class Upgrade:
     def __init__(self, name, key, inc, base_cost, cost_scaling, category='stat'):
@@ -44,6 +43,7 @@ class Upgrade:
                     game.MAX_AMMO = game.SETTINGS['max_ammo']
                 if self.key == 'player_speed':
                     game.PLAYER_SPEED = game.SETTINGS['player_speed']
+                game.stats.refresh()
 
 class Player:
     def __init__(self, game):
@@ -61,15 +61,17 @@ class Player:
         # Knockback
         self.knockback_velocity = [0, 0]
         self.knockback_friction = 0.85
+
+    def hit_mask(self):
+        masks = self.game.masks
+        return masks.get(self.game.player_sprite) if self.game.player_sprite else masks.circle(16)
+
     def draw(self):
         screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
         # draw sprite if available, otherwise a small fallback marker
         if self.game.player_sprite:
-            w, h = self.game.player_sprite.get_size()
-            w = int(w * self.game.game_zoom)
-            h = int(h * self.game.game_zoom)
-            scaled = pygame.transform.scale(self.game.player_sprite, (w, h))
-            self.game.display.blit(scaled, (int(screen_x - w/2), int(screen_y - h/2)))
+            # flushed together with the gun by GameScene.draw
+            self.game.render_queue.add_sprite('player', self.game.player_sprite, (screen_x, screen_y), self.game.game_zoom)
         else:
             # small, unobtrusive fallback marker (no large glow)
             pygame.draw.circle(self.game.display, self.game.white, (int(screen_x), int(screen_y)), int(6 * self.game.game_zoom))
@@ -94,9 +96,9 @@ class Player:
         ammo_surf = self.game.font.render(ammo_text, True, self.game.foam)
         self.game.display.blit(ammo_surf, (int(bx + bar_w + 10 * self.game.game_zoom), int(by - 5)))
         # draw shield bubble if active
-        if self.game.shield_end_time > time.time():
+        if self.game.shield_end_time > self.game.now():
             # radius shrinks as remaining time approaches zero
-            rem = self.game.shield_end_time - time.time()
+            rem = self.game.shield_end_time - self.game.now()
             max_r = 42 * self.game.game_zoom
             radius = max(2, int(max_r * (rem / self.game.SHIELD_DURATION)))
             width = max(1, int(3 * self.game.game_zoom))
@@ -109,7 +111,7 @@ class Player:
 
         # Obstacle collisions
         if self.game.current_map:
-            for obstacle in self.game.current_map.obstacles:
+            for obstacle in self.game.current_map.obstacles_in(self.x, self.y, self.width, self.height):
                 ox, oy, ow, oh = obstacle
                 # Check for collision
                 if (self.x < ox + ow and self.x + self.width > ox and
@@ -123,108 +125,114 @@ class Player:
         self.knockback_velocity[1] = direction[1] * strength
 
 class Bullet:
+    RADIUS = 3  # for collision
+
     def __init__(self, game, x, y, direction):
         self.game = game
         self.x = x
         self.y = y
         self.direction = direction
+        # per-tick displacement; rescaled by DerivedStats when bullet_speed changes
+        spd = game.stats.bullet_speed
+        self.vx = direction[0] * spd
+        self.vy = direction[1] * spd
         self.trail_counter = 0
     def draw(self):
+        # cull against the camera with the glow radius as margin
+        if not self.game.in_view(self.x, self.y, 6):
+            return
         screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
+        # core, accent and glow are baked into one stamp per zoom level
+        if self.game.lod_level >= 1:
+            # flat dot: just the core, no glow rings
+            core_r = max(1, int(4 * self.game.game_zoom))
+            stamp = self.game.stamps.circle((255, 220, 80), core_r)
+        else:
+            stamp = self.game.stamps.composite(('bullet', round(self.game.game_zoom, 3)), self.build_stamp)
+        half = stamp.get_width() // 2
+        self.game.render_queue.add('bullets', stamp, (int(screen_x) - half, int(screen_y) - half))
+
+    def build_stamp(self):
+        zoom = self.game.game_zoom
         # draw a visible solid core for the bullet first (bright), then a smaller accent and subtle glow
-        core_r = int(4 * self.game.game_zoom)
-        accent_r = int(2 * self.game.game_zoom)
+        core_r = int(4 * zoom)
+        accent_r = int(2 * zoom)
+        glow_r = int(6 * zoom)
+        half = max(1, core_r, glow_r)
+        surf = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
         # core (bright) to make bullet easily visible (gold)
-        pygame.draw.circle(self.game.display, (255, 220, 80), (int(screen_x), int(screen_y)), core_r)
+        pygame.draw.circle(surf, (255, 220, 80), (half, half), core_r)
         # inner accent for color
-        pygame.draw.circle(self.game.display, self.game.ocean_accent, (int(screen_x), int(screen_y)), accent_r)
-        # small subtle glow (reduced intensity)
-        self.game.draw_glow((screen_x, screen_y), 6 * self.game.game_zoom, self.game.ocean_accent, 0.08)
+        pygame.draw.circle(surf, self.game.ocean_accent, (half, half), accent_r)
+        # small subtle glow
+        glow = self.game.stamps.glow(glow_r, self.game.ocean_accent)
+        surf.blit(glow, (half - glow_r, half - glow_r))
+        return surf
     def update(self):
-        spd = self.game.SETTINGS.get('bullet_speed', 5)
-        self.x += self.direction[0] * spd
-        self.y += self.direction[1] * spd
-        # add trail particles
+        # GameScene moves bullets along the registry's velocity column; add trail particles
         self.trail_counter += 1
-        if self.trail_counter % 4 == 0:
+        if self.trail_counter % self.game.trail_every == 0:
             # fewer trail particles and in a different color so they don't mask the bullet core
             self.game.make_particles(self.x, self.y, self.game.ocean_accent, n=1)
 
 class Enemy:
+    SHIELD_PUSH = 16  # how far a shielded player shoves an enemy touching it
+
     def __init__(self, game, x, y, speed):
         self.game = game
         self.x = x
         self.y = y
+        self.vx = self.vy = 0.0  # last steering step (see simlod.py)
         self.speed = speed
         self.alive = True
         # ocean themed colors
-        self.color = random.choice([self.game.coral, self.game.biolum, self.game.ocean_accent, (150, 200, 255), (100, 180, 200)])
+        self.color = self.game.rng.fx.choice([self.game.coral, self.game.biolum, self.game.ocean_accent, (150, 200, 255), (100, 180, 200)])
         # optionally assign a sprite
         self.sprite = None
         self.avoid_radius = 60  # separation radius to avoid clustering
         # death animation
         self.death_time = 0  # frames since death started (0 = alive)
         self.death_duration = 12  # frames to animate death
+        # last tick this enemy steered; far enemies skip ticks (see simlod.py)
+        self.sim_tick = game.sim_lod.tick
 
     def draw(self):
+        # sprite half-size or the 15px glow, whichever reaches further
+        margin = max(self.sprite.get_size()) / 2 if self.sprite else 15
+        if not self.game.in_view(self.x, self.y, margin):
+            return
         screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
+        queue = self.game.render_queue
+        stamps = self.game.stamps
 
         if self.alive:
-            if self.sprite:
-                w, h = self.sprite.get_size()
-                w = int(w * self.game.game_zoom)
-                h = int(h * self.game.game_zoom)
-                scaled = pygame.transform.scale(self.sprite, (w, h))
-                self.game.display.blit(scaled, (int(screen_x - w/2), int(screen_y - h/2)))
+            if self.game.lod_level >= 2:
+                # pixel impostor in the sprite's average colour
+                color = stamps.average_color(self.sprite) if self.sprite else self.color
+                size = self.game.LOD_IMPOSTOR_SIZE
+                queue.add('enemies', stamps.pixel(color, size), (int(screen_x) - size // 2, int(screen_y) - size // 2))
+            elif self.sprite:
+                queue.add_sprite('enemies', self.sprite, (screen_x, screen_y), self.game.game_zoom)
             else:
-                pygame.draw.circle(self.game.display, self.color, (int(screen_x), int(screen_y)), int(10 * self.game.game_zoom))
-                # glow effect
-                self.game.draw_glow((screen_x, screen_y), 15 * self.game.game_zoom, self.color, 0.15)
+                r = int(10 * self.game.game_zoom)
+                queue.add('enemies', stamps.circle(self.color, r), (int(screen_x) - r, int(screen_y) - r))
+                # glow effect (dropped at reduced detail)
+                if self.game.lod_level >= 1:
+                    return
+                glow_r = int(15 * self.game.game_zoom)
+                queue.add('enemies', stamps.glow(glow_r, self.color), (int(screen_x) - glow_r, int(screen_y) - glow_r))
         else:
-            # death animation: rely on particles only (no large glow circle)
-            # spawn a short burst of particles on death start
-            if self.death_time == 0:
-                self.game.make_particles(self.x, self.y, self.color, n=8)
+            # death animation: rely on particles only (no large glow circle, the burst
+            # is spawned by GameScene.update)
             # optionally draw a subtle fading dot (very small)
             if self.death_time < self.death_duration:
                 alpha_progress = 1 - (self.death_time / self.death_duration)
                 small_r = max(1, int(6 * self.game.game_zoom * alpha_progress))
-                pygame.draw.circle(self.game.display, self.color, (int(screen_x), int(screen_y)), small_r)
-
-    def update(self, player, all_enemies):
-        if not self.alive:
-            return
-        # AI: move toward player but avoid other enemies
-        dx = player.x - self.x
-        dy = player.y - self.y
-        dist = (dx*dx + dy*dy) ** 0.5
-
-        # separation: move away from nearby enemies
-        sep_x, sep_y = 0, 0
-        for other in all_enemies:
-            if other is not self and other.alive:
-                odx = self.x - other.x
-                ody = self.y - other.y
-                odist = (odx*odx + ody*ody) ** 0.5
-                if 0 < odist < self.avoid_radius:
-                    # push away from other
-                    sep_x += (odx / odist) * 0.5
-                    sep_y += (ody / odist) * 0.5
-
-        # combine: 70% chase, 30% separation
-        if dist != 0:
-            chase_x = (dx / dist) * 0.7
-            chase_y = (dy / dist) * 0.7
-        else:
-            chase_x = chase_y = 0
+                queue.add('enemies', stamps.circle(self.color, small_r), (int(screen_x) - small_r, int(screen_y) - small_r))
 
-        total_x = chase_x + sep_x * 0.3
-        total_y = chase_y + sep_y * 0.3
-        total_dist = (total_x*total_x + total_y*total_y) ** 0.5
-
-        if total_dist > 0:
-            self.x += (total_x / total_dist) * self.speed
-            self.y += (total_y / total_dist) * self.speed
+    def hit_mask(self):
+        masks = self.game.masks
+        return masks.get(self.sprite) if self.sprite else masks.circle(10)
 
     def collide_with_bullet(self, bullet):
         # collision radius test (only if alive)
@@ -232,7 +240,14 @@ class Enemy:
             return False
         dx = self.x - bullet.x
         dy = self.y - bullet.y
-        return (dx*dx + dy*dy) <= (8 + 3) ** 2
+        d2 = dx*dx + dy*dy
+        if not self.game.SETTINGS['pixel_collision']:
+            return d2 <= (8 + Bullet.RADIUS) ** 2
+        # inline bounding circle of the widest enemy sprite, so misses stay as cheap as above
+        reach = self.game.enemy_mask_radius + Bullet.RADIUS
+        if d2 > reach * reach:
+            return False
+        return overlap(self.hit_mask(), self.x, self.y, self.game.masks.circle(Bullet.RADIUS), bullet.x, bullet.y)
 
 class PowerUp:
     def __init__(self, game, x, y, power_up_type):
@@ -240,9 +255,9 @@ class PowerUp:
         self.x = x
         self.y = y
         self.type = power_up_type
-        self.creation_time = time.time()
+        self.creation_time = self.game.now()
         self.lifespan = 10  # Power-up disappears after 10 seconds
-        self.size = 12 * self.game.game_zoom
+        self.size = 12 * self.game.sim_view[1]
 
         # Define properties for each power-up type
         if self.type == 'rapid_fire':
@@ -260,26 +275,44 @@ class PowerUp:
 
     def draw(self):
         # Draw the power-up as a rotating star
+        if not self.game.in_view(self.x, self.y, 20):
+            return
         screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
-        angle = (time.time() * 180) % 360  # Rotate over time
+        angle = (self.game.now() * 180) % 360  # Rotate over time
+        # the star repeats every 72 degrees, so 24 pre-rendered steps cover the full spin
+        step = int((angle % 72) // 3) * 3
+        # no glow at reduced detail
+        glow_r = int(20 * self.game.game_zoom) if self.game.lod_level == 0 else 0
+        size = self.size * self.game.render_scale
+        key = ('power_up', self.color, round(size, 3), glow_r, step)
+        stamp = self.game.stamps.composite(key, lambda: self.build_stamp(step, glow_r, size))
+        half = stamp.get_width() // 2
+        self.game.render_queue.add('power_ups', stamp, (int(screen_x) - half, int(screen_y) - half))
+
+    def build_stamp(self, angle, glow_r, size):
+        half = max(glow_r, int(size * 1.2) + 1)
+        surf = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
         points = []
         for i in range(5):
             # Outer point
             outer_angle = (angle + i * 72) * (3.14159 / 180)
-            points.append((screen_x + self.size * 1.2 * math.cos(outer_angle),
-                           screen_y + self.size * 1.2 * math.sin(outer_angle)))
+            points.append((half + size * 1.2 * math.cos(outer_angle),
+                           half + size * 1.2 * math.sin(outer_angle)))
             # Inner point
             inner_angle = (angle + (i * 72 + 36)) * (3.14159 / 180)
-            points.append((screen_x + self.size * 0.6 * math.cos(inner_angle),
-                           screen_y + self.size * 0.6 * math.sin(inner_angle)))
+            points.append((half + size * 0.6 * math.cos(inner_angle),
+                           half + size * 0.6 * math.sin(inner_angle)))
 
-        pygame.draw.polygon(self.game.display, self.color, points)
-        self.game.draw_glow((screen_x, screen_y), 20 * self.game.game_zoom, self.color, 0.15)
+        pygame.draw.polygon(surf, self.color, points)
+        if glow_r:
+            glow = self.game.stamps.glow(glow_r, self.color)
+            surf.blit(glow, (half - glow_r, half - glow_r))
+        return surf
 
     def update(self):
         # Check if the power-up's lifespan has expired
-        if time.time() - self.creation_time > self.lifespan:
-            self.game.power_ups.remove(self)
+        if self.game.now() - self.creation_time > self.lifespan:
+            self.game.registry.power_ups.destroy(self)
 
 class Boss:
     def __init__(self, game, x, y):
@@ -293,11 +326,11 @@ class Boss:
         self.alive = True
         self.state = 'idle'  # idle, chasing, telegraphing, attacking
         self.enraged = False
-        self.last_state_change = time.time()
+        self.last_state_change = self.game.now()
 
         # Ability cooldown
         self.ability_cooldown = 10.0
-        self.last_ability_time = time.time()
+        self.last_ability_time = self.game.now()
         self.telegraph_duration = 1.5
         self.jump_target = None
 
@@ -305,7 +338,7 @@ class Boss:
         if not self.alive:
             return
 
-        now = time.time()
+        now = self.game.now()
 
         # Enraged mode
         if self.hp < self.max_hp * 0.3 and not self.enraged:
@@ -316,11 +349,11 @@ class Boss:
         # State machine
         if self.state == 'idle':
             if now - self.last_state_change > 3.0:
-                if random.random() < 0.7:
+                if self.game.rng.ai.random() < 0.7:
                     self.state = 'chasing'
                 else:
                     self.state = 'jumping'
-                    self.jump_target = (player.x + random.uniform(-100, 100), player.y + random.uniform(-100, 100))
+                    self.jump_target = (player.x + self.game.rng.ai.uniform(-100, 100), player.y + self.game.rng.ai.uniform(-100, 100))
                 self.last_state_change = now
 
         elif self.state == 'chasing':
@@ -371,31 +404,44 @@ class Boss:
     def draw(self):
         if not self.alive:
             return
+        if not self.game.in_view(self.x, self.y, 40):
+            return
 
         screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
 
         if self.sprite:
-            w, h = self.sprite.get_size()
-            w = int(w * self.game.game_zoom)
-            h = int(h * self.game.game_zoom)
-            scaled = pygame.transform.scale(self.sprite, (w, h))
-            self.game.display.blit(scaled, (int(screen_x - w/2), int(screen_y - h/2)))
+            self.game.render_queue.add_sprite('boss', self.sprite, (screen_x, screen_y), self.game.game_zoom)
         else:
             pygame.draw.circle(self.game.display, self.game.coral, (int(screen_x), int(screen_y)), int(40 * self.game.game_zoom))
 
-        if self.state == 'telegraphing':
-            progress = (time.time() - self.last_state_change) / self.telegraph_duration
-            radius = 200 * progress * self.game.game_zoom
-            pygame.draw.circle(self.game.display, self.game.ocean_accent, (int(screen_x), int(screen_y)), int(radius), 2)
+    def draw_telegraph(self):
+        # drawn straight to the display, so call it after the 'boss' layer is flushed
+        if not self.alive or self.state != 'telegraphing':
+            return
+        if not self.game.in_view(self.x, self.y, 200):
+            return
+        screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
+        progress = (self.game.now() - self.last_state_change) / self.telegraph_duration
+        radius = 200 * progress * self.game.game_zoom
+        pygame.draw.circle(self.game.display, self.game.ocean_accent, (int(screen_x), int(screen_y)), int(radius), 2)
+
+    def hit_mask(self):
+        masks = self.game.masks
+        return masks.get(self.sprite) if self.sprite else masks.circle(40)
 
     def collide_with_bullet(self, bullet):
         if not self.alive:
             return False
+        if self.game.SETTINGS['pixel_collision']:
+            return overlap(self.hit_mask(), self.x, self.y, self.game.masks.circle(Bullet.RADIUS), bullet.x, bullet.y)
         dx = self.x - bullet.x
         dy = self.y - bullet.y
-        return (dx*dx + dy*dy) <= (40 + 3) ** 2
+        return (dx*dx + dy*dy) <= (40 + Bullet.RADIUS) ** 2
 
 class Shockwave:
+    TOLERANCE = 10  # how far from the ring an entity still counts as hit
+    PUSH = 40  # knockback distance for enemies
+
     def __init__(self, game, x, y, knockback=False):
         self.game = game
         self.x = x
@@ -405,12 +451,41 @@ class Shockwave:
         self.speed = 10 if knockback else 15
         self.alive = True
         self.knockback = knockback
+        # handles of enemies already pushed; frozen, so captured save states can share it
+        self.hit = frozenset()
 
     def update(self):
         self.radius += self.speed
         if self.radius > self.max_radius:
             self.alive = False
 
+    def hit_area(self, enemy_grid, pickup_grid):
+        """Destroy the pickups under the ring, and push (knockback) or kill the enemies there.
+        enemy_grid is (grid, margin): how far its enemies may have moved since it was built"""
+        game = self.game
+        inner, outer = self.radius - self.TOLERANCE, self.radius + self.TOLERANCE
+        for p, _, _, _ in pickup_grid.query_annulus(self.x, self.y, inner, outer):
+            # a zero ttl removes it in this tick's pickup pass
+            p['ttl'] = 0
+            game.make_particles(p['x'], p['y'], game.foam, n=4)
+        grid, margin = enemy_grid
+        pushed = []
+        for e, dx, dy, dist in grid.query_annulus(self.x, self.y, inner, outer, margin):
+            # the grid may be from last tick: skip enemies killed or removed since
+            if not e.alive or e.destroyed:
+                continue
+            if not self.knockback:
+                game.registry.enemies.kill(e)
+            elif dist > 0 and e.handle not in self.hit:
+                game.registry.enemies.move(e, max(0, min(game.WORLD_WIDTH, e.x + dx / dist * self.PUSH)),
+                                           max(0, min(game.WORLD_HEIGHT, e.y + dy / dist * self.PUSH)))
+                pushed.append(e.handle)
+        if pushed:
+            self.hit = self.hit.union(pushed)
+
     def draw(self):
+        # the ring is drawn in screen pixels, so convert its reach back to world units
+        if not self.game.in_view(self.x, self.y, (self.radius + 3) / self.game.game_zoom):
+            return
         screen_x, screen_y = self.game.world_to_screen(self.x, self.y)
         pygame.draw.circle(self.game.display, self.game.ocean_accent, (int(screen_x), int(screen_y)), int(self.radius), 3)
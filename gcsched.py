@@ -0,0 +1,111 @@
+"""Frame-aware garbage collection: keeps full cyclic collections out of busy frames.
+
+A full collection deferred for MAX_DEFER_FRAMES runs anyway, so memory stays bounded.
+"""
+import collections
+import gc
+import logging
+import time
+
+
+class GCScheduler:
+    MARGIN_MS = 1.0  # frame time left untouched, for the present and tick themselves
+    MAX_DEFER_FRAMES = 600  # frames a due full collection may wait for spare time
+    DISABLED_GEN2 = 1 << 30  # generation-2 threshold that never triggers
+    HISTORY = 120  # frames of pause times kept for the overlay
+
+    def __init__(self, game):
+        self.game = game
+        self.thresholds = gc.get_threshold()
+        self.active = False
+        self.frame_start = time.perf_counter()
+        self.deferred = 0
+        # running average cost of a collection per generation, learned from the callbacks
+        self.cost_ms = [0.0, 0.0, 0.0]
+        self.scheduled = False
+        self.started = 0.0
+        self.frame_pause = 0.0
+        self.auto_pause = 0.0
+        self.pauses = collections.deque(maxlen=self.HISTORY)
+        self.auto_collections = [0, 0, 0]
+        self.frozen = False
+        # the collector is process-wide: close() undoes all of this, or the callback keeps the game alive
+        gc.callbacks.append(self.on_gc)
+
+    def close(self):
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        gc.set_threshold(*self.thresholds)
+        self.active = False
+        if self.frozen:
+            gc.unfreeze()
+            self.frozen = False
+
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self.started = time.perf_counter()
+            return
+        ms = (time.perf_counter() - self.started) * 1000
+        generation = info['generation']
+        self.frame_pause += ms
+        self.cost_ms[generation] += (ms - self.cost_ms[generation]) * 0.3
+        if not self.scheduled:
+            self.auto_pause += ms
+            self.auto_collections[generation] += 1
+
+    def freeze(self):
+        """Exclude everything alive now from future collections; call once startup is done"""
+        self.collect(2)
+        gc.freeze()
+        self.frozen = True
+        logging.info(f"GC: froze {gc.get_freeze_count()} startup objects")
+
+    def set_active(self, active):
+        if active == self.active:
+            return
+        self.active = active
+        t0, t1, t2 = self.thresholds
+        gc.set_threshold(t0, t1, self.DISABLED_GEN2 if active else t2)
+
+    def collect(self, generation):
+        self.scheduled = True
+        try:
+            gc.collect(generation)
+        finally:
+            self.scheduled = False
+
+    def idle(self):
+        """Called by the render loop right before clock.tick: collect in the frame's spare time"""
+        if not self.active:
+            return
+        budget = 1000 / self.game.SETTINGS.get('fps_limit', 60)
+        spare = budget - (time.perf_counter() - self.frame_start) * 1000 - self.MARGIN_MS
+        count = gc.get_count()
+        t0, t1, t2 = self.thresholds
+        # the oldest generation that is due, or about to be
+        if count[2] >= t2:
+            generation = 2
+        elif count[1] >= t1 - 1:
+            generation = 1
+        elif count[0] >= t0 // 2:
+            generation = 0
+        else:
+            return
+        if self.cost_ms[generation] <= spare or (generation == 2 and self.deferred >= self.MAX_DEFER_FRAMES):
+            self.collect(generation)
+            if generation == 2:
+                self.deferred = 0
+        elif generation == 2:
+            self.deferred += 1
+
+    def frame_end(self):
+        """Called right after clock.tick; closes the frame's pause accounting"""
+        self.pauses.append((self.frame_pause, self.auto_pause))
+        self.frame_pause = self.auto_pause = 0.0
+        self.frame_start = time.perf_counter()
+        self.set_active(self.game.scene == 'game')
+
+    def stats(self):
+        last, last_auto = self.pauses[-1] if self.pauses else (0.0, 0.0)
+        worst = max((pause for pause, _ in self.pauses), default=0.0)
+        return last, last_auto, worst
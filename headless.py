@@ -0,0 +1,78 @@
+"""Run the game without a window: dummy SDL drivers, a stepped game clock and
+scripted input, for tools that play many games unattended (see tools/sweep.py).
+
+Import this module before pygame is initialised so the dummy drivers take effect."""
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+
+class StepClock:
+    """Game clock that only moves when advanced, one fixed tick at a time"""
+    # cooldowns start at 0.0, so begin far from it like time.time() would
+    START = 1_000_000.0
+
+    def __init__(self, dt=1 / 60, start=START):
+        self.dt = dt
+        self.t = start
+        self.ticks = 0
+
+    def __call__(self):
+        return self.t
+
+    def advance(self):
+        self.ticks += 1
+        self.t += self.dt
+
+    def seconds(self, ticks):
+        return ticks * self.dt
+
+
+class KeyState:
+    """Stand-in for pygame.key.get_pressed(): indexable by key code"""
+    def __init__(self):
+        self.held = set()
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ScriptedInput:
+    """Input source for Game.keys_pressed and Game.mouse_pos, set by a controller"""
+    def __init__(self):
+        self.keys = KeyState()
+        self.mouse = (0, 0)
+
+    def keys_pressed(self):
+        return self.keys
+
+    def mouse_pos(self):
+        return self.mouse
+
+
+def create_game(seed=None, dt=1 / 60, enemy_workers=0):
+    """A Game on the dummy display, driven by a StepClock and ScriptedInput"""
+    from main import Game
+
+    game = Game(seed=seed, enemy_workers=enemy_workers)
+    game.time_source = StepClock(dt)
+    game.input_source = ScriptedInput()
+    return game
+
+
+def tick(game, controller=None):
+    # one fixed step: the controller (if any) sets input and returns synthetic events
+    events = controller.act(game) if controller is not None else []
+    game.step(events)
+    game.time_source.advance()
+
+
+def click(pos, button=1):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button, pos=pos)
+
+
+def key_press(key):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode='')
@@ -1,35 +1,89 @@
+import startup  # first, so the startup profile covers every other import
 import pygame
 import sys
+import io
 import random
 import time
 import math
 import os
 import logging
 from scenes import MenuScene, SettingsScene, UpgradesScene, GameScene
-from entities import Player, Bullet, Enemy, Upgrade, PowerUp, Boss, Shockwave
-from maps import Map
+from entities import Player, Bullet, Upgrade, PowerUp, Boss, Shockwave
+from maps import Map, MapPreloader
+from render import StampCache, create_render_queue
+from snapshot import SimulationThread
+from replay import RandomStreams, Recorder
+from savestate import RewindBuffer, capture_state, restore_state
+from atlas import load_atlas
+from director import SpawnDirector
+from quality import QualityController
+from simlod import SimulationLOD
+from registry import EntityRegistry
+from gcsched import GCScheduler
+from masks import MaskCache
+from stats import DerivedStats
+from capture import FrameCapture
+
+startup.profile.mark('imports')
 
 class Game:
-    def __init__(self):
+    def __init__(self, render_backend='surface', threaded=False, enemy_workers=0, seed=None):
         pygame.init()
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        startup.profile.mark('pygame.init')
 
         self.window_res = (800, 480)
         self.window_title = "One In The Chamber"
-        self.display = pygame.display.set_mode(self.window_res)
+        # window is the OS surface; display is what everything draws into. They are the
+        # same surface unless fixed-resolution rendering is enabled (see set_fixed_render)
+        # or the texture backend is used, which has no window surface at all
+        self.render_backend = render_backend
+        # run the simulation on its own thread and draw published snapshots (see snapshot.py)
+        self.threaded = threaded
+        self.stamps = StampCache()
+        if self.render_backend == 'surface':
+            self.window = pygame.display.set_mode(self.window_res)
+            self.display = self.window
+        else:
+            self.window = None
+        # batched rendering: entities queue stamps per layer, scenes flush once per layer
+        self.render_queue = create_render_queue(
+            self.render_backend,
+            ['map', 'boss', 'enemies', 'bullets', 'power_ups', 'pickups', 'particles', 'player', 'minimap'],
+            self.stamps, self.window_res, self.window_title)
+        if self.window is None:
+            # the SDL renderer owns the window; Surface drawing goes to its overlay
+            self.display = self.render_queue.overlay
         pygame.display.set_caption(self.window_title)
         pygame.display.set_icon(pygame.Surface((1, 1)))  # placeholder blank icon
+        startup.profile.mark('display')
 
         # window state
         self.is_maximized = False
         self.base_window_res = self.window_res
         self.zoom_level = 1.0
 
+        # fixed internal render resolution, presented with one scale per frame
+        self.INTERNAL_RES = (800, 480)
+        self.SMOOTH_UPSCALE = False
+        self.fixed_render = False
+        self.window_zoom_level = 1.0
+        self.present_rect = pygame.Rect((0, 0), self.window_res)
+        # fraction of the window drawn when quality is reduced (see set_render_scale)
+        self.render_scale = 1.0
+
         # camera state
         self.camera_x = 0.0
         self.camera_y = 0.0
         self.camera_smooth = 0.1  # lower = smoother
         self.game_zoom = 1.0
+        # window_res and game_zoom as the simulation sees them: render scale shrinks the
+        # drawn target and zoom with it, but must not move the camera, aim or LOD
+        self.sim_view = (self.window_res, self.game_zoom)
+        # visible world rectangle, refreshed once per frame by update_view
+        self.view_left = self.view_top = 0.0
+        self.view_right = self.view_bottom = 0.0
+        self.cull_stats = {'drawn': 0, 'culled': 0}
 
         # world settings
         self.WORLD_WIDTH = 3200
@@ -39,12 +93,16 @@ class Game:
         # fonts
         font_path = os.path.join(os.path.dirname(__file__), 'assets', 'custom_font.ttf')
         try:
-            self.font = pygame.font.Font(font_path, 24)
-            self.big_font = pygame.font.Font(font_path, 36)
-        except pygame.error as e:
+            # read the file once; each Font keeps its own stream over the bytes
+            with open(font_path, 'rb') as f:
+                font_data = f.read()
+            self.font = pygame.font.Font(io.BytesIO(font_data), 24)
+            self.big_font = pygame.font.Font(io.BytesIO(font_data), 36)
+        except (pygame.error, OSError) as e:
             logging.error(f"Error loading font: {e}")
             self.font = pygame.font.SysFont(None, 24)
             self.big_font = pygame.font.SysFont(None, 36)
+        startup.profile.mark('fonts')
 
 
         # assets (generate simple pixel sprites at runtime if missing)
@@ -70,11 +128,38 @@ class Game:
         self.biolum = (100, 255, 200)  # bioluminescence
 
         self.generate_assets()
+        # collision masks for pixel_collision, built with the sprites (see masks.py)
+        self.masks = MaskCache()
         self.load_sprites()
+        startup.profile.mark('assets')
+
+        # level-of-detail: each entry is (max game_zoom, min on-screen enemies) for
+        # level 1 = flat dots instead of glows, 2 = pixel impostors, 3 = clustered blobs
+        self.LOD_THRESHOLDS = [(0.8, 80), (0.6, 250), (0.6, 500)]
+        self.LOD_HYSTERESIS = 0.8  # stay in a level until density drops below this fraction
+        self.LOD_IMPOSTOR_SIZE = 2
+        self.LOD_CLUSTER_CELL = 64
+        self.lod_level = 0
+        self.visible_enemies = 0
+
+        # adaptive quality: detail knobs lowered while frames overrun fps_limit (see quality.py)
+        self.quality = QualityController(self)
+        self.quality.apply()
 
         # game update loop
         self.running = True
         self.clock = pygame.time.Clock()
+        # game-time and input sources; headless tools swap in a stepped clock and
+        # scripted input (see headless.py), recordings their own (see replay.py)
+        self.time_source = time.time
+        self.input_source = None
+        self.frame_time = self.time_source()
+        self.recorder = None
+        # frames being written to disk, when capturing (see capture.py)
+        self.capture = None
+        # all gameplay randomness comes from per-subsystem streams of this seed
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = RandomStreams(self.seed)
         # player movement speed (pixels per frame)
         self.PLAYER_SPEED = 3
         # cooldown system
@@ -101,6 +186,8 @@ class Game:
             "fps_limit": 120,
             "max_ammo": 10,
             "bullet_speed": 5,
+            "horde_mode": False,  # endless waves sized to what the machine can hold
+            "pixel_collision": False,  # sprite-accurate hits instead of fixed radii
         }
 
         self.player = Player(self)
@@ -108,14 +195,19 @@ class Game:
         self.MAX_AMMO = self.SETTINGS.get('max_ammo', 10)
         self.reload_cooldown = 0.0
         self.RELOAD_TIME = 1.5  # increased reload time to prevent spamming
-        self.bullets = []
-        self.enemies = []
+        # bullets, enemies and power-ups live in the registry's dense lists (see registry.py);
+        # these are the same list objects, for iterating
+        self.registry = EntityRegistry()
+        self.bullets = self.registry.bullets.items
+        self.enemies = self.registry.enemies.items
         self.boss = None
         self.score = 0
         self.particles = []
         self.pickups = []
-        self.power_ups = []
+        self.power_ups = self.registry.power_ups.items
         self.active_power_ups = {}
+        # speeds and delays with upgrades and power-ups applied (see stats.py)
+        self.stats = DerivedStats(self)
         self.shockwaves = []
 
         # upgrades available in shop
@@ -153,6 +245,31 @@ class Game:
         self.available_maps = ["map1", "map2"]
         self.current_map_index = 0
         self.current_map = None
+        # the next map is built in the background during the last wave of the current one
+        self.map_preloader = MapPreloader(self)
+
+        # save states: F5/F9 quick-save/quick-load, Backspace rewinds (see savestate.py)
+        self.rewind = RewindBuffer(self)
+        self.quick_state = None
+
+        # optional multi-process enemy steering for very large hordes (see parallel_ai.py)
+        self.enemy_ai = None
+        self.set_enemy_workers(enemy_workers)
+        # waves are placed in free space and spread over frames (see director.py)
+        self.director = SpawnDirector(self)
+        # far enemies steer less often and more cheaply (see simlod.py)
+        self.sim_lod = SimulationLOD(self)
+        # full garbage collections run in spare frame time during play (see gcsched.py)
+        self.gc_scheduler = GCScheduler(self)
+        startup.profile.mark('game setup')
+
+    def set_enemy_workers(self, workers):
+        if self.enemy_ai is not None:
+            self.enemy_ai.close()
+            self.enemy_ai = None
+        if workers > 0:
+            from parallel_ai import EnemyAIPool
+            self.enemy_ai = EnemyAIPool(workers, self.WORLD_WIDTH)
 
     def create_player_sprite(self, path, size=32):
         surf = pygame.Surface((size, size), pygame.SRCALPHA)
@@ -189,61 +306,255 @@ class Game:
         except (pygame.error, IOError) as e:
             logging.error(f"Error generating assets: {e}")
 
+    def prepare_surface(self, surf, alpha=True):
+        # convert to the display format for fast blits; the texture backend has no
+        # display surface and uploads sprites as they are
+        if pygame.display.get_surface() is None:
+            return surf
+        return surf.convert_alpha() if alpha else surf.convert()
+
     def load_sprites(self):
-        # load sprites
+        # all sprites come from one atlas, rebuilt only when a source file changes
+        names = ['player', 'gun', 'boss'] + [f'enemy_{i}' for i in range(3)]
+        sources = {name: os.path.join(self.assets_dir, f'{name}.png') for name in names}
         try:
-            player_sprite_path = os.path.join(self.assets_dir, 'player.png')
-            gun_sprite_path = os.path.join(self.assets_dir, 'gun.png')
-            boss_sprite_path = os.path.join(self.assets_dir, 'boss.png')
-            self.player_sprite = pygame.image.load(player_sprite_path).convert_alpha()
-            self.gun_sprite = pygame.image.load(gun_sprite_path).convert_alpha()
-            self.boss_sprite = pygame.image.load(boss_sprite_path).convert_alpha()
-            self.enemy_sprites = []
-            for i in range(3):
-                enemy_sprite_path = os.path.join(self.assets_dir, f'enemy_{i}.png')
-                if os.path.isfile(enemy_sprite_path):
-                    self.enemy_sprites.append(pygame.image.load(enemy_sprite_path).convert_alpha())
-                else:
-                    logging.warning(f"Enemy sprite not found: {enemy_sprite_path}")
-            if not self.enemy_sprites:
-                logging.error("No enemy sprites could be loaded.")
+            self.atlas = load_atlas(sources, os.path.join(self.assets_dir, '.cache')).convert(self.prepare_surface)
         except pygame.error as e:
             logging.error(f"Error loading sprites: {e}")
-            self.player_sprite = None
-            self.gun_sprite = None
-            self.enemy_sprites = []
+            self.atlas = None
+        get = self.atlas.get if self.atlas else (lambda name: None)
+        self.player_sprite = get('player')
+        self.gun_sprite = get('gun')
+        self.boss_sprite = get('boss')
+        self.enemy_sprites = []
+        for i in range(3):
+            sprite = get(f'enemy_{i}')
+            if sprite is not None:
+                self.enemy_sprites.append(sprite)
+            else:
+                logging.warning(f"Enemy sprite not found: {sources[f'enemy_{i}']}")
+        if not self.enemy_sprites:
+            logging.error("No enemy sprites could be loaded.")
+        self.masks.prepare([self.player_sprite, self.boss_sprite] + self.enemy_sprites)
+        self.enemy_mask_radius = max([self.masks.get(s).radius for s in self.enemy_sprites] + [10])
 
     def toggle_maximize(self):
+        # window changes start from a full-size target; quality reapplies its scale after
+        self.set_render_scale(1.0)
+        self.toggle_maximize_window()
+        self.quality.apply()
+
+    def toggle_maximize_window(self):
+        if self.render_backend != 'surface':
+            self.toggle_maximize_texture()
+            return
         if not self.is_maximized:
             # maximize window
             info = pygame.display.get_desktop_sizes()[0]
-            self.display = pygame.display.set_mode(info, pygame.FULLSCREEN)
-            self.window_res = info
+            self.window = pygame.display.set_mode(info, pygame.FULLSCREEN)
             self.is_maximized = True
         else:
             # restore to base size
-            self.display = pygame.display.set_mode(self.base_window_res)
-            self.window_res = self.base_window_res
+            self.window = pygame.display.set_mode(self.base_window_res, pygame.RESIZABLE if self.fixed_render else 0)
             self.is_maximized = False
+        if self.fixed_render:
+            # the render target keeps its size, only the presentation changes
+            self.update_present_rect()
+        else:
+            self.display = self.window
+            self.window_res = self.window.get_size()
+
+    def toggle_maximize_texture(self):
+        window = self.render_queue.window
+        if not self.is_maximized:
+            window.set_fullscreen(desktop=True)
+        else:
+            window.set_windowed()
+            window.size = self.base_window_res
+        self.is_maximized = not self.is_maximized
+        if self.fixed_render:
+            self.update_present_rect()
+        else:
+            self.window_res = tuple(window.size)
+            self.display = self.render_queue.resize(self.window_res)
 
     def set_zoom(self, new_zoom):
+        self.set_render_scale(1.0)
+        self.set_window_zoom(new_zoom)
+        self.quality.apply()
+
+    def set_window_zoom(self, new_zoom):
+        if self.fixed_render:
+            # the window never changes with a fixed render target, so zoom the world instead
+            self.zoom_level = max(0.5, min(3.0, new_zoom))
+            self.game_zoom = self.zoom_level
+            return
         self.zoom_level = max(0.5, min(3.0, new_zoom))
         new_res = (int(self.base_window_res[0] * self.zoom_level), int(self.base_window_res[1] * self.zoom_level))
         self.window_res = new_res
-        self.display = pygame.display.set_mode(self.window_res)
+        if self.render_backend != 'surface':
+            self.render_queue.window.size = new_res
+            self.display = self.render_queue.resize(new_res)
+        else:
+            self.window = pygame.display.set_mode(self.window_res)
+            self.display = self.window
         pygame.display.set_caption(f"{self.window_title} (Zoom: {self.zoom_level:.1f}x)")
 
+    def set_fixed_render(self, enabled):
+        self.set_render_scale(1.0)
+        self.fixed_render = enabled
+        if enabled:
+            # +/- drive game_zoom while the render target is fixed
+            self.window_zoom_level = self.zoom_level
+            self.zoom_level = self.game_zoom
+            self.window_res = self.INTERNAL_RES
+            if self.render_backend != 'surface':
+                # SDL scales the logical size to the window on present
+                self.render_queue.window.resizable = True
+                self.render_queue.renderer.logical_size = self.INTERNAL_RES
+                self.display = self.render_queue.resize(self.INTERNAL_RES)
+            else:
+                # resizable window; the offscreen target is scaled to whatever size it ends up
+                if not self.is_maximized:
+                    self.window = pygame.display.set_mode(self.window.get_size(), pygame.RESIZABLE)
+                self.display = pygame.Surface(self.INTERNAL_RES).convert()
+            self.update_present_rect()
+        else:
+            self.zoom_level = self.window_zoom_level
+            self.window_res = self.window_size()
+            if self.render_backend != 'surface':
+                self.render_queue.renderer.logical_size = self.window_res
+                self.display = self.render_queue.resize(self.window_res)
+            else:
+                if not self.is_maximized:
+                    self.window = pygame.display.set_mode(self.window_res)
+                self.display = self.window
+            self.present_rect = pygame.Rect((0, 0), self.window_res)
+        self.quality.apply()
+        # stamps and scaled sprites do not depend on the target, but the camera does
+        self.update_camera(self.player.x, self.player.y)
+
+    def set_render_scale(self, scale):
+        """Draw into a target `scale` times the window size and scale it up on present.
+
+        The world zoom scales with it, so the view covers the same area. Only the
+        surface backend in its normal mode has a target to shrink: the texture backend
+        scales on the GPU already, and fixed rendering has its own resolution."""
+        if self.render_scale == 1.0:
+            # every window or zoom change happens at full scale, so this keeps sim_view current
+            self.sim_view = (self.window_res, self.game_zoom)
+        if scale == self.render_scale or self.render_backend != 'surface' or self.fixed_render:
+            return
+        win_size = self.window.get_size()
+        res, zoom = self.sim_view
+        if scale == 1.0:
+            self.display = self.window
+            self.window_res = res
+            self.game_zoom = zoom
+        else:
+            self.window_res = (int(win_size[0] * scale), int(win_size[1] * scale))
+            self.display = pygame.Surface(self.window_res).convert()
+            self.game_zoom = zoom * scale
+        self.present_rect = pygame.Rect((0, 0), win_size)
+        self.render_scale = scale
+
+    def window_size(self):
+        if self.render_backend != 'surface':
+            return tuple(self.render_queue.window.size)
+        return self.window.get_size()
+
+    def update_present_rect(self):
+        # largest aspect-preserving fit of the render target, centered in the window
+        win_w, win_h = self.window_size()
+        scale = min(win_w / self.window_res[0], win_h / self.window_res[1])
+        rect = pygame.Rect(0, 0, int(self.window_res[0] * scale), int(self.window_res[1] * scale))
+        rect.center = (win_w // 2, win_h // 2)
+        if rect != self.present_rect and self.window is not None:
+            self.window.fill((0, 0, 0))
+        self.present_rect = rect
+
+    def present(self):
+        if (self.fixed_render or self.render_scale != 1.0) and self.window is not None:
+            if self.present_rect.size == self.window_res:
+                self.window.blit(self.display, self.present_rect)
+            else:
+                # scale straight into the window to avoid an intermediate surface
+                scale = pygame.transform.smoothscale if self.SMOOTH_UPSCALE else pygame.transform.scale
+                scale(self.display, self.present_rect.size, self.window.subsurface(self.present_rect))
+        self.render_queue.present(self.display, self.capture)
+
+    def now(self):
+        # sampled once per tick in step(), so everything in a tick agrees on the time
+        return self.frame_time
+
+    def keys_pressed(self):
+        if self.input_source is not None:
+            return self.input_source.keys_pressed()
+        return pygame.key.get_pressed()
+
+    def mouse_pos(self):
+        # mouse position in render-target coordinates
+        if self.input_source is not None:
+            return self.input_source.mouse_pos()
+        return self.read_mouse()
+
+    def read_mouse(self):
+        # in sim_view coordinates; with render scale alone these are window coordinates
+        mx, my = pygame.mouse.get_pos()
+        if not self.fixed_render:
+            return mx, my
+        rect = self.present_rect
+        return ((mx - rect.x) * self.window_res[0] / max(1, rect.w),
+                (my - rect.y) * self.window_res[1] / max(1, rect.h))
+
     def update_camera(self, player_x, player_y):
         # smoothly follow player
-        target_x = player_x - (self.window_res[0] / 2) / self.game_zoom
-        target_y = player_y - (self.window_res[1] / 2) / self.game_zoom
-        
-        self.camera_x += (target_x - self.camera_x) * self.camera_smooth
-        self.camera_y += (target_y - self.camera_y) * self.camera_smooth
-        
-        # clamp to world bounds
-        self.camera_x = max(0, min(self.camera_x, self.WORLD_WIDTH - self.window_res[0] / self.game_zoom))
-        self.camera_y = max(0, min(self.camera_y, self.WORLD_HEIGHT - self.window_res[1] / self.game_zoom))
+        (res_w, res_h), zoom = self.sim_view
+        target_x = player_x - (res_w / 2) / zoom
+        target_y = player_y - (res_h / 2) / zoom
+        camera_x = self.camera_x + (target_x - self.camera_x) * self.camera_smooth
+        camera_y = self.camera_y + (target_y - self.camera_y) * self.camera_smooth
+
+        # clamp to world bounds before storing, so the render thread never sees an
+        # unclamped camera
+        self.camera_x = max(0, min(camera_x, self.WORLD_WIDTH - res_w / zoom))
+        self.camera_y = max(0, min(camera_y, self.WORLD_HEIGHT - res_h / zoom))
+
+    def update_view(self):
+        # cache the camera rectangle in world units and reset the culling counters
+        self.view_left = self.camera_x
+        self.view_top = self.camera_y
+        self.view_right = self.camera_x + self.window_res[0] / self.game_zoom
+        self.view_bottom = self.camera_y + self.window_res[1] / self.game_zoom
+        self.cull_stats['drawn'] = 0
+        self.cull_stats['culled'] = 0
+
+    def in_view(self, x, y, margin=0):
+        # margin is in world units and should cover the sprite or glow radius
+        if (self.view_left - margin <= x <= self.view_right + margin and
+                self.view_top - margin <= y <= self.view_bottom + margin):
+            self.cull_stats['drawn'] += 1
+            return True
+        self.cull_stats['culled'] += 1
+        return False
+
+    def rect_in_view(self, x, y, w, h):
+        if x <= self.view_right and x + w >= self.view_left and y <= self.view_bottom and y + h >= self.view_top:
+            self.cull_stats['drawn'] += 1
+            return True
+        self.cull_stats['culled'] += 1
+        return False
+
+    def update_lod(self):
+        # pick the cheapest level whose zoom and density thresholds are both met
+        level = 0
+        for i, (max_zoom, min_count) in enumerate(self.LOD_THRESHOLDS, start=1):
+            if i <= self.lod_level:
+                min_count *= self.LOD_HYSTERESIS
+            if self.game_zoom <= max_zoom + 1e-6 and self.visible_enemies >= min_count:
+                level = i
+        # adaptive quality can hold detail down regardless of the crowd
+        self.lod_level = max(level, self.lod_floor)
 
     def world_to_screen(self, world_x, world_y):
         screen_x = (world_x - self.camera_x) * self.game_zoom
@@ -251,14 +562,18 @@ class Game:
         return screen_x, screen_y
 
     def screen_to_world(self, screen_x, screen_y):
-        world_x = screen_x / self.game_zoom + self.camera_x
-        world_y = screen_y / self.game_zoom + self.camera_y
+        # for mouse_pos() coordinates, which are in sim_view's resolution
+        zoom = self.sim_view[1]
+        world_x = screen_x / zoom + self.camera_x
+        world_y = screen_y / zoom + self.camera_y
         return world_x, world_y
 
     def draw_tiles(self):
-        # draw tiled background
+        # draw tiled background, queued into the 'map' layer like map chunks
         tile_color_a = self.ocean_dark
         tile_color_b = self.ocean_med
+        tile_w = int(self.TILE_SIZE * self.game_zoom) + 1
+        tile_h = int(self.TILE_SIZE * self.game_zoom) + 1
         
         start_tile_x = int(self.camera_x // self.TILE_SIZE)
         start_tile_y = int(self.camera_y // self.TILE_SIZE)
@@ -272,13 +587,16 @@ class Game:
                 world_x = tx * self.TILE_SIZE
                 world_y = ty * self.TILE_SIZE
                 screen_x, screen_y = self.world_to_screen(world_x, world_y)
+                tile = self.stamps.composite(('tile', color, tile_w, tile_h),
+                                             lambda: self.build_tile(color, tile_w, tile_h))
+                self.render_queue.add('map', tile, (int(screen_x), int(screen_y)))
 
-                tile_w = int(self.TILE_SIZE * self.game_zoom) + 1
-                tile_h = int(self.TILE_SIZE * self.game_zoom) + 1
-
-                pygame.draw.rect(self.display, color, (screen_x, screen_y, tile_w, tile_h))
-                # grid lines with glow
-                pygame.draw.rect(self.display, (40, 80, 120), (screen_x, screen_y, tile_w, tile_h), 1)
+    def build_tile(self, color, w, h):
+        tile = pygame.Surface((w, h))
+        tile.fill(color)
+        # grid lines with glow
+        pygame.draw.rect(tile, (40, 80, 120), (0, 0, w, h), 1)
+        return tile
 
     def draw_glow(self, pos, radius, color, intensity=0.3):
         """Draw a soft glow effect around a point"""
@@ -291,16 +609,18 @@ class Game:
     def spawn_pickup(self, x, y, kind):
         # kind: 'ammo', 'health', 'coin'
         # include visual state for shrink-on-pickup
-        self.pickups.append({'x': x, 'y': y, 'kind': kind, 'ttl': 600, 'picked': False, 'size': 6 * self.game_zoom, 'shrink_rate': 0.35})
+        self.pickups.append({'x': x, 'y': y, 'kind': kind, 'ttl': 600, 'picked': False, 'size': 6 * self.sim_view[1], 'shrink_rate': 0.35})
 
     def spawn_power_up(self, x, y, power_up_type):
-        self.power_ups.append(PowerUp(self, x, y, power_up_type))
+        self.registry.power_ups.add(PowerUp(self, x, y, power_up_type))
 
     def make_particles(self, x, y, color, n=10):
+        # adaptive quality thins bursts out, but never below one particle
+        n = max(1, round(n * self.particle_scale)) if n else 0
         for i in range(n):
-            ang = random.uniform(0, 2*math.pi)
-            speed = random.uniform(1.5, 5.5)
-            lifetime = random.randint(20, 50)  # longer life for better fade effect
+            ang = self.rng.fx.uniform(0, 2*math.pi)
+            speed = self.rng.fx.uniform(1.5, 5.5)
+            lifetime = self.rng.fx.randint(20, 50)  # longer life for better fade effect
             self.particles.append({
                 'x': x, 'y': y,
                 'vx': math.cos(ang)*speed,
@@ -308,32 +628,23 @@ class Game:
                 'life': lifetime,
                 'max_life': lifetime,
                 'color': color,
-                'size': random.uniform(1.5, 4)  # larger particlesw
+                'size': self.rng.fx.uniform(1.5, 4)  # larger particlesw
             })
 
     def spawn_enemies(self, count, append=False):
-        # spawn enemies relative to the player's current position so gameplay is more intense
+        # spawn enemies around the player's current position right away; waves go
+        # through queue_wave instead, which spreads them over several frames
         # if append==False replace current enemies, otherwise add to them
         if not append:
-            self.enemies.clear()
-        px = self.player.x
-        py = self.player.y
-        # spawn radius around player (min, max)
-        min_r = 200
-        max_r = 480
-        for i in range(count):
-            ang = random.uniform(0, 2 * math.pi)
-            dist = random.uniform(min_r, max_r)
-            x = px + math.cos(ang) * dist
-            y = py + math.sin(ang) * dist
-            # clamp to world bounds
-            x = max(0, min(self.WORLD_WIDTH, x))
-            y = max(0, min(self.WORLD_HEIGHT, y))
-            e = Enemy(self, x, y, self.SETTINGS["enemy_speed"])
-            # assign a random enemy sprite if available
-            if self.enemy_sprites:
-                e.sprite = random.choice(self.enemy_sprites)
-            self.enemies.append(e)
+            self.registry.enemies.clear()
+            self.director.clear()
+        self.director.spawn_now(count)
+
+    def queue_wave(self, base_count):
+        # endless horde mode replaces the map's wave sizes with ever larger ones
+        if self.SETTINGS['horde_mode']:
+            base_count = self.director.next_horde_wave(base_count)
+        self.director.queue(base_count)
 
     def spawn_boss(self):
         self.boss = Boss(self, self.player.x + 400, self.player.y)
@@ -344,67 +655,223 @@ class Game:
         self.load_map(self.available_maps[self.current_map_index])
         self.scene = 'game'
         self.PLAYER_SPEED = self.SETTINGS['player_speed']
+        self.stats.refresh()
         self.wave = 1
         self.wave_active = True
-        self.spawn_enemies(self.current_map.waves[self.wave - 1]['count'])
-        self.bullets.clear()
+        self.registry.enemies.clear()
+        self.director.clear()
+        self.director.horde_size = 0
+        self.queue_wave(self.current_map.waves[self.wave - 1]['count'])
+        self.registry.bullets.clear()
         self.AMMO = self.SETTINGS.get('max_ammo', 10)
         self.MAX_AMMO = self.SETTINGS.get('max_ammo', 10)
         self.score = 0
         self.player.x, self.player.y = self.WORLD_WIDTH / 2, self.WORLD_HEIGHT / 2
+        self.rewind.clear()
         # reset camera
-        self.camera_x = self.player.x - (self.window_res[0] / 2) / self.game_zoom
-        self.camera_y = self.player.y - (self.window_res[1] / 2) / self.game_zoom
+        (res_w, res_h), zoom = self.sim_view
+        self.camera_x = self.player.x - (res_w / 2) / zoom
+        self.camera_y = self.player.y - (res_h / 2) / zoom
+
+    def quick_save(self):
+        self.quick_state = capture_state(self)
+        self.popups.append({'text': 'Saved', 'x': self.player.x, 'y': self.player.y - 20, 'life': 60, 'vy': -0.6, 'color': self.foam})
+
+    def quick_load(self):
+        if self.quick_state is None:
+            return
+        restore_state(self, self.quick_state)
+        # frames recorded after the save belong to a timeline that no longer exists
+        self.rewind.clear()
+
+    def next_map_name(self):
+        return self.available_maps[(self.current_map_index + 1) % len(self.available_maps)]
+
+    def preload_next_map(self):
+        self.map_preloader.preload(self.next_map_name())
 
     def load_map(self, map_name):
-        self.current_map = Map(self, map_name)
+        self.current_map = self.map_preloader.take(map_name) or Map(self, map_name)
+        # the world is as large as the map says; the enemy pool's strips follow it
+        resized = (self.current_map.width, self.current_map.height) != (self.WORLD_WIDTH, self.WORLD_HEIGHT)
+        self.WORLD_WIDTH, self.WORLD_HEIGHT = self.current_map.width, self.current_map.height
+        if resized and self.enemy_ai is not None:
+            self.set_enemy_workers(self.enemy_ai.workers)
+
+    def handle_window_event(self, event):
+        # window controls (available in all scenes)
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F11:
+                self.toggle_maximize()
+            if event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
+                self.set_zoom(self.zoom_level + 0.1)
+            if event.key == pygame.K_MINUS:
+                self.set_zoom(self.zoom_level - 0.1)
+            if event.key == pygame.K_0:
+                self.set_zoom(1.0)
+            if event.key == pygame.K_F10:
+                self.set_fixed_render(not self.fixed_render)
+
+        if event.type == pygame.VIDEORESIZE and self.fixed_render:
+            if self.window is not None:
+                self.window = pygame.display.get_surface()
+            self.update_present_rect()
+
+        # scroll wheel zooming (game zoom only, in game scene)
+        if event.type == pygame.MOUSEWHEEL:
+            self.set_render_scale(1.0)
+            if event.y > 0:  # scroll up = zoom in
+                self.game_zoom = min(3.0, self.game_zoom + 0.1)
+            elif event.y < 0:  # scroll down = zoom out
+                self.game_zoom = max(0.5, self.game_zoom - 0.1)
+            if self.fixed_render:
+                self.zoom_level = self.game_zoom
+            self.quality.apply()
+
+    def draw_debug_overlay(self):
+        # common: FPS display
+        fps_surf = self.font.render(f"FPS: {int(self.clock.get_fps())}", True, self.ocean_accent)
+        self.display.blit(fps_surf, (self.window_res[0] - fps_surf.get_width() - 5, 5))
+
+        # debug overlay: scene and player coords (helpful when player seems invisible)
+        try:
+            debug_text = f"Scene: {self.scene}  Player: {int(self.player.x)},{int(self.player.y)}  HP:{self.player.hp}"
+            if self.scene == 'game':
+                debug_text += f"  Drawn: {self.cull_stats['drawn']}  Culled: {self.cull_stats['culled']}"
+            debug_surf = self.font.render(debug_text, True, (200,200,200))
+            self.display.blit(debug_surf, (10, self.window_res[1]-24))
+            # adaptive quality telemetry: current level and the latest change
+            quality = self.quality
+            quality_text = f"Quality: {quality.level}  Frame: {quality.frame_ms:.1f}/{quality.budget_ms():.1f} ms"
+            if quality.changes:
+                when, old, new, change = quality.changes[-1]
+                quality_text += f"  {old}->{new} {self.now() - when:.0f}s ago: {change}"
+            quality_surf = self.font.render(quality_text, True, (200,200,200))
+            self.display.blit(quality_surf, (10, self.window_res[1]-44))
+            # collector pauses: last frame (of which automatic, i.e. unscheduled) and worst recent
+            last, last_auto, worst = self.gc_scheduler.stats()
+            gc_text = f"GC: {last:.2f} ms (auto {last_auto:.2f})  worst {worst:.2f} ms"
+            gc_text += "  gen2 scheduled" if self.gc_scheduler.active else "  gen2 automatic"
+            gc_surf = self.font.render(gc_text, True, (200,200,200))
+            self.display.blit(gc_surf, (10, self.window_res[1]-64))
+            if self.capture is not None:
+                captured, written, dropped = self.capture.stats()
+                capture_text = f"Capture: {written}/{captured} written  {dropped} dropped"
+                capture_surf = self.font.render(capture_text, True, (200,200,200))
+                self.display.blit(capture_surf, (10, self.window_res[1]-84))
+        except pygame.error as e:
+            logging.error(f"Error rendering debug overlay: {e}")
+
+    def start_recording(self, path):
+        self.recorder = Recorder(self, path)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+            self.time_source = time.time
+            self.input_source = None
+
+    def start_capture(self, path, encoder=None):
+        self.capture = FrameCapture(path, self.SETTINGS.get('fps_limit', 60), encoder=encoder)
+
+    def stop_capture(self):
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+
+    def close(self):
+        # release everything that would outlive the game in this process; tools that
+        # play many games in one process call this after each
+        self.stop_recording()
+        self.stop_capture()
+        self.set_enemy_workers(0)
+        self.gc_scheduler.close()
+        self.map_preloader.shutdown()
+        if self.current_map is not None:
+            self.current_map.close()
+
+    def step(self, events):
+        # one simulation tick of the current scene, without drawing
+        if self.recorder is not None:
+            self.recorder.capture(events)
+        self.frame_time = self.time_source()
+        current_scene = self.scenes[self.scene]
+        current_scene.handle_events(events)
+        current_scene.update()
 
     def run(self):
+        if self.threaded:
+            self.run_threaded()
+            return
         while self.running:
             events = pygame.event.get()
             for event in events:
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-                # window controls (available in all scenes)
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_F11:
-                        self.toggle_maximize()
-                    if event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
-                        self.set_zoom(self.zoom_level + 0.1)
-                    if event.key == pygame.K_MINUS:
-                        self.set_zoom(self.zoom_level - 0.1)
-                    if event.key == pygame.K_0:
-                        self.set_zoom(1.0)
-
-                # scroll wheel zooming (game zoom only, in game scene)
-                if event.type == pygame.MOUSEWHEEL:
-                    if event.y > 0:  # scroll up = zoom in
-                        self.game_zoom = min(3.0, self.game_zoom + 0.1)
-                    elif event.y < 0:  # scroll down = zoom out
-                        self.game_zoom = max(0.5, self.game_zoom - 0.1)
-
-            current_scene = self.scenes[self.scene]
-            current_scene.handle_events(events)
-            current_scene.update()
-            current_scene.draw(self.display)
-
-            # common: FPS display
-            fps_surf = self.font.render(f"FPS: {int(self.clock.get_fps())}", True, self.ocean_accent)
-            self.display.blit(fps_surf, (self.window_res[0] - fps_surf.get_width() - 5, 5))
-
-            # debug overlay: scene and player coords (helpful when player seems invisible)
-            try:
-                debug_surf = self.font.render(f"Scene: {self.scene}  Player: {int(self.player.x)},{int(self.player.y)}  HP:{self.player.hp}", True, (200,200,200))
-                self.display.blit(debug_surf, (10, self.window_res[1]-24))
-            except pygame.error as e:
-                logging.error(f"Error rendering debug overlay: {e}")
+                    self.running = False
+                self.handle_window_event(event)
+
+            self.step(events)
+            self.scenes[self.scene].draw(self.display)
+            self.draw_debug_overlay()
 
             # update the full display and cap the frame rate (from settings)
-            pygame.display.flip()
+            self.present()
+            if not startup.profile.reported:
+                startup.profile.mark('first frame')
+                startup.profile.report()
+                self.gc_scheduler.freeze()
+            self.gc_scheduler.idle()
             self.clock.tick(self.SETTINGS.get('fps_limit', 60))
+            self.gc_scheduler.frame_end()
+            self.quality.update(self.clock.get_rawtime())
+        self.close()
+        pygame.quit()
+
+    def run_threaded(self):
+        # this thread handles events and draws; the simulation thread owns update()
+        sim = SimulationThread(self)
+        render_scene = GameScene(self)
+        sim.start()
+        try:
+            while self.running:
+                events = pygame.event.get()
+                for event in events:
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                    self.handle_window_event(event)
+                sim.events.put(events)
+
+                snapshot = sim.snapshots.latest()
+                if self.scene == 'game' and snapshot is not None and snapshot.scene == 'game':
+                    render_scene.game = snapshot
+                    render_scene.draw(self.display)
+                else:
+                    self.scenes[self.scene].draw(self.display)
+                self.draw_debug_overlay()
+
+                self.present()
+                if not startup.profile.reported:
+                    startup.profile.mark('first frame')
+                    startup.profile.report()
+                    self.gc_scheduler.freeze()
+                self.gc_scheduler.idle()
+                self.clock.tick(self.SETTINGS.get('fps_limit', 60))
+                self.gc_scheduler.frame_end()
+                self.quality.update(self.clock.get_rawtime())
+        finally:
+            sim.stop()
+        self.close()
+        pygame.quit()
 
 if __name__ == '__main__':
-    game = Game()
+    enemy_workers = next((int(arg.split('=', 1)[1]) for arg in sys.argv if arg.startswith('--enemy-workers=')), 0)
+    record = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--record=')), None)
+    capture = next((arg.split('=', 1)[1] for arg in sys.argv if arg.startswith('--capture=')), None)
+    game = Game(render_backend='texture' if '--texture' in sys.argv else 'surface',
+                threaded='--threaded' in sys.argv, enemy_workers=enemy_workers)
+    if record:
+        game.start_recording(record)
+    if capture:
+        game.start_capture(capture)
     game.run()
@@ -1,32 +1,431 @@
 import pygame
+import concurrent.futures
 import json
+import mmap
 import os
+import struct
+import threading
+import weakref
+from collections import OrderedDict
 
 import logging
 
+MAPS_DIR = os.path.join(os.path.dirname(__file__), 'maps')
+
+# chunk tables: header, then (offset, count) per chunk in row-major order, then the
+# obstacles as int32 (x, y, w, h) records. Offsets are from the start of the table.
+# An obstacle crossing a chunk border is stored in every chunk it overlaps.
+CHUNK_MAGIC = b'OITCCHK1'
+CHUNK_HEADER = struct.Struct('<8sIII')  # magic, columns, rows, chunk size
+CHUNK_INDEX = struct.Struct('<II')
+OBSTACLE = struct.Struct('<4i')
+
+# compiled maps (maps/.cache/<name>.<version>.map): magic, JSON header length and header,
+# the chunk table, then the baked minimap as raw RGB. A recompile writes the next version
+# rather than replacing the file, which older Maps may still have mapped (Windows refuses
+# to replace or delete a mapped file).
+COMPILED_MAGIC = b'OITCMAP1'
+COMPILED_VERSION = 1
+HEADER_SIZE = struct.Struct('<I')
+
+
+def bucket_obstacles(obstacles, chunk_size, cols, rows):
+    chunks = {}
+    for x, y, w, h in obstacles:
+        for cx in range(max(0, x // chunk_size), min(cols - 1, (x + w - 1) // chunk_size) + 1):
+            for cy in range(max(0, y // chunk_size), min(rows - 1, (y + h - 1) // chunk_size) + 1):
+                chunks.setdefault((cx, cy), []).append((x, y, w, h))
+    return chunks
+
+
+def pack_chunks(obstacles, chunk_size, cols, rows):
+    chunks = bucket_obstacles(obstacles, chunk_size, cols, rows)
+    index = []
+    body = []
+    offset = CHUNK_HEADER.size + CHUNK_INDEX.size * cols * rows
+    for cy in range(rows):
+        for cx in range(cols):
+            records = chunks.get((cx, cy), [])
+            index.append(CHUNK_INDEX.pack(offset, len(records)))
+            body.extend(OBSTACLE.pack(*r) for r in records)
+            offset += OBSTACLE.size * len(records)
+    return CHUNK_HEADER.pack(CHUNK_MAGIC, cols, rows, chunk_size) + b''.join(index) + b''.join(body)
+
+
+def read_chunk(buf, base, cols, cx, cy):
+    # obstacles of one chunk from a chunk table starting at `base` in buf
+    offset, count = CHUNK_INDEX.unpack_from(buf, base + CHUNK_HEADER.size + CHUNK_INDEX.size * (cy * cols + cx))
+    start = base + offset
+    return list(OBSTACLE.iter_unpack(buf[start:start + OBSTACLE.size * count]))
+
+
+def save_chunked_map(name, world, obstacles, waves, chunk_size=512, maps_dir=MAPS_DIR):
+    """Write maps/<name>.json and its <name>.chunks obstacle file"""
+    cols = -(-world[0] // chunk_size)
+    rows = -(-world[1] // chunk_size)
+    with open(os.path.join(maps_dir, f'{name}.chunks'), 'wb') as f:
+        f.write(pack_chunks(obstacles, chunk_size, cols, rows))
+    with open(os.path.join(maps_dir, f'{name}.json'), 'w') as f:
+        json.dump({'world': list(world), 'chunk_size': chunk_size, 'chunks': f'{name}.chunks', 'waves': waves}, f, indent=4)
+
+
+def source_stamps(paths):
+    # a compiled map is current while its sources keep the same mtime and size
+    stamps = {}
+    for path in paths:
+        st = os.stat(path)
+        stamps[os.path.basename(path)] = [st.st_mtime_ns, st.st_size]
+    return stamps
+
+
+class Chunk:
+    def __init__(self, cx, cy, obstacles):
+        self.cx = cx
+        self.cy = cy
+        self.obstacles = obstacles
+        self.surface = None  # tiles and obstacles baked at zoom 1
+        self.prepared = False  # surface converted to the display format
+        self.scaled = None  # (size, surface) while visible at another zoom
+
+
 class Map:
-    def __init__(self, game, map_name):
+    """A map's obstacles, split into square chunks that are decoded and baked on demand.
+
+    Construction never touches the display, so a Map can be built on a worker thread
+    with prepare=False and prepared later on the main one."""
+    CHUNK_SIZE = 512  # for maps without their own chunk file
+    MAX_CHUNKS = 256  # decoded obstacle lists kept
+    MAX_BAKED = 48  # baked chunk surfaces kept (1 MiB each), or the view plus its prefetch ring if more
+    PREFETCH = 1  # chunks baked ahead of the camera, at most BAKES_PER_FRAME a frame
+    BAKES_PER_FRAME = 2
+
+    def __init__(self, game, map_name, maps_dir=MAPS_DIR, cache_dir=None, prepare=True):
         self.game = game
         self.name = map_name
-        self.obstacles = []
+        self.maps_dir = maps_dir
+        self.cache_dir = cache_dir or os.path.join(maps_dir, '.cache')
+        self.width = 3200
+        self.height = 1920
+        self.chunk_size = self.CHUNK_SIZE
+        self.cols = -(-self.width // self.chunk_size)
+        self.rows = -(-self.height // self.chunk_size)
         self.waves = []
+        self.mm = None
+        self.chunk_base = 0
+        self.chunks = OrderedDict()
+        self.baked = OrderedDict()
+        self.visible = set()
+        # the simulation thread (collision) and render thread (baking) share the caches
+        self.lock = threading.Lock()
+        self.minimap = self.empty_minimap()
         self.load_map_data()
+        if prepare:
+            self.prepare()
 
     def load_map_data(self):
-        map_path = os.path.join(os.path.dirname(__file__), 'maps', f'{self.name}.json')
+        map_path = os.path.join(self.maps_dir, f'{self.name}.json')
         if not os.path.isfile(map_path):
             logging.error(f"Map file not found at {map_path}")
             return
+        versions = self.compiled_versions()
+        latest = versions[-1] if versions else 0
+        if versions and self.open_compiled(self.compiled_path(latest)):
+            return
+        try:
+            self.compile(map_path, self.compiled_path(latest + 1))
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logging.error(f"Error compiling map {self.name}: {e}")
+            return
+        self.open_compiled(self.compiled_path(latest + 1))
+        self.remove_stale(versions)
+
+    def compiled_path(self, version):
+        return os.path.join(self.cache_dir, f'{self.name}.{version}.map')
+
+    def compiled_versions(self):
+        prefix = f'{self.name}.'
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return []
+        versions = [name[len(prefix):-len('.map')] for name in names
+                    if name.startswith(prefix) and name.endswith('.map')]
+        return sorted(int(v) for v in versions if v.isdigit())
+
+    def remove_stale(self, versions):
+        # best effort: a version still mapped elsewhere goes on a later recompile
+        for version in versions:
+            try:
+                os.remove(self.compiled_path(version))
+            except OSError:
+                pass
+
+    def open_compiled(self, path):
+        try:
+            # the mapping stays valid once the file is closed
+            with open(path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.mm[:len(COMPILED_MAGIC)] != COMPILED_MAGIC:
+                raise ValueError("not a compiled map")
+            size, = HEADER_SIZE.unpack_from(self.mm, len(COMPILED_MAGIC))
+            start = len(COMPILED_MAGIC) + HEADER_SIZE.size
+            header = json.loads(self.mm[start:start + size])
+            sources = [os.path.join(self.maps_dir, name) for name in header['sources']]
+            if (header['version'] != COMPILED_VERSION or source_stamps(sources) != header['sources']
+                    or header['minimap_size'] != [self.game.MINIMAP_W, self.game.MINIMAP_H]):
+                raise ValueError("compiled map is out of date")
+        except FileNotFoundError:
+            self.close()
+            return False
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logging.info(f"Recompiling map {self.name}: {e}")
+            self.close()
+            return False
+        self.width, self.height = header['world']
+        self.chunk_size = header['chunk_size']
+        self.cols = -(-self.width // self.chunk_size)
+        self.rows = -(-self.height // self.chunk_size)
+        self.waves = header['waves']
+        self.chunk_base = header['chunk_offset']
+        start = header['minimap_offset']
+        w, h = header['minimap_size']
+        self.minimap = pygame.image.frombytes(self.mm[start:start + w * h * 3], (w, h), 'RGB')
+        # a replaced map can live on in save states and the rewind buffer, so its
+        # mapping is released when the last of them lets go, if close() has not run
+        weakref.finalize(self, self.mm.close)
+        return True
 
+    def compile(self, map_path, compiled_path):
         with open(map_path, 'r') as f:
             data = json.load(f)
-            self.obstacles = data.get('obstacles', [])
-            self.waves = data.get('waves', [])
-
-    def draw_obstacles(self):
-        for obstacle in self.obstacles:
-            x, y, w, h = obstacle
-            screen_x, screen_y = self.game.world_to_screen(x, y)
-            rect = pygame.Rect(screen_x, screen_y, w * self.game.game_zoom, h * self.game.game_zoom)
-            pygame.draw.rect(self.game.display, self.game.ocean_light, rect)
-            pygame.draw.rect(self.game.display, self.game.ocean_accent, rect, 2)
+        width, height = data.get('world', (self.width, self.height))
+        chunk_size = data.get('chunk_size', self.CHUNK_SIZE)
+        cols = -(-width // chunk_size)
+        rows = -(-height // chunk_size)
+        sources = [map_path]
+        if 'chunks' in data:
+            chunks_path = os.path.join(self.maps_dir, data['chunks'])
+            sources.append(chunks_path)
+            with open(chunks_path, 'rb') as f:
+                table = f.read()
+            if CHUNK_HEADER.unpack_from(table, 0) != (CHUNK_MAGIC, cols, rows, chunk_size):
+                raise ValueError(f"{chunks_path} does not match the map")
+        else:
+            table = pack_chunks([tuple(o) for o in data.get('obstacles', [])], chunk_size, cols, rows)
+
+        # every obstacle once, for the minimap
+        obstacles = set()
+        for cy in range(rows):
+            for cx in range(cols):
+                obstacles.update(read_chunk(table, 0, cols, cx, cy))
+        minimap = pygame.image.tobytes(self.bake_minimap(obstacles, width, height), 'RGB')
+
+        header = {'version': COMPILED_VERSION, 'sources': source_stamps(sources), 'world': [width, height],
+                  'chunk_size': chunk_size, 'waves': data.get('waves', []),
+                  'minimap_size': [self.game.MINIMAP_W, self.game.MINIMAP_H]}
+        # the offsets depend on the header length, which depends on the offsets' digits;
+        # pad them to a fixed width so one pass is enough
+        header['chunk_offset'] = header['minimap_offset'] = 10 ** 15
+        prefix = len(COMPILED_MAGIC) + HEADER_SIZE.size + len(json.dumps(header))
+        header['chunk_offset'] = prefix
+        header['minimap_offset'] = prefix + len(table)
+        encoded = json.dumps(header).encode().ljust(prefix - len(COMPILED_MAGIC) - HEADER_SIZE.size)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write under a temporary name, so a reader never maps a half-written file
+        tmp_path = f'{compiled_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(COMPILED_MAGIC + HEADER_SIZE.pack(len(encoded)) + encoded)
+            f.write(table)
+            f.write(minimap)
+        os.replace(tmp_path, compiled_path)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def read_chunk(self, cx, cy):
+        if self.mm is None:
+            return []
+        return read_chunk(self.mm, self.chunk_base, self.cols, cx, cy)
+
+    def chunk(self, cx, cy):
+        with self.lock:
+            chunk = self.chunks.get((cx, cy))
+            if chunk is None:
+                chunk = Chunk(cx, cy, self.read_chunk(cx, cy))
+                self.chunks[(cx, cy)] = chunk
+                if len(self.chunks) > self.MAX_CHUNKS:
+                    self.chunks.popitem(last=False)
+            else:
+                self.chunks.move_to_end((cx, cy))
+            return chunk
+
+    def chunk_range(self, left, top, right, bottom, margin=0):
+        size = self.chunk_size
+        return (range(max(0, int(left // size) - margin), min(self.cols, int(right // size) + 1 + margin)),
+                range(max(0, int(top // size) - margin), min(self.rows, int(bottom // size) + 1 + margin)))
+
+    def obstacles_in(self, x, y, w, h):
+        # obstacles of every chunk the rect touches; one crossing chunks may repeat
+        xs, ys = self.chunk_range(x, y, x + w, y + h)
+        found = []
+        for cx in xs:
+            for cy in ys:
+                found.extend(self.chunk(cx, cy).obstacles)
+        return found
+
+    def bake_chunk(self, chunk, prepare=True):
+        # same look as Game.draw_tiles at zoom 1, plus the obstacles
+        game = self.game
+        size = self.chunk_size
+        tile = game.TILE_SIZE
+        x0, y0 = chunk.cx * size, chunk.cy * size
+        w = min(size, self.width - x0)
+        h = min(size, self.height - y0)
+        surf = pygame.Surface((w, h))
+        for tx in range(x0 // tile, -(-(x0 + w) // tile)):
+            for ty in range(y0 // tile, -(-(y0 + h) // tile)):
+                color = game.ocean_dark if (tx + ty) % 2 == 0 else game.ocean_med
+                rect = (tx * tile - x0, ty * tile - y0, tile + 1, tile + 1)
+                pygame.draw.rect(surf, color, rect)
+                pygame.draw.rect(surf, (40, 80, 120), rect, 1)
+        for ox, oy, ow, oh in chunk.obstacles:
+            rect = pygame.Rect(ox - x0, oy - y0, ow, oh)
+            pygame.draw.rect(surf, game.ocean_light, rect)
+            pygame.draw.rect(surf, game.ocean_accent, rect, 2)
+        chunk.surface = game.prepare_surface(surf, alpha=False) if prepare else surf
+        chunk.prepared = prepare
+
+    def baked_chunk(self, cx, cy):
+        chunk = self.baked.get((cx, cy))
+        if chunk is None:
+            chunk = self.chunk(cx, cy)
+            self.baked[(cx, cy)] = chunk
+        else:
+            self.baked.move_to_end((cx, cy))
+        if chunk.surface is None:
+            self.bake_chunk(chunk)
+        elif not chunk.prepared:
+            # baked by the preloader; converted the first time it is drawn
+            chunk.surface = self.game.prepare_surface(chunk.surface, alpha=False)
+            chunk.prepared = True
+        return chunk
+
+    def draw(self, view):
+        """Queue the chunks in view, the game or the WorldSnapshot being drawn, into the
+        'map' layer, so the map uses the same camera as the entities drawn over it"""
+        size = self.chunk_size
+        bounds = (view.view_left, view.view_top, view.view_right, view.view_bottom)
+        xs, ys = self.chunk_range(*bounds)
+        visible = set()
+        for cx in xs:
+            for cy in ys:
+                chunk = self.baked_chunk(cx, cy)
+                x0, y0 = view.world_to_screen(cx * size, cy * size)
+                surf = chunk.surface
+                if view.game_zoom != 1:
+                    # scale to where the next chunk starts, so neighbours meet without seams
+                    w, h = surf.get_size()
+                    x1, y1 = view.world_to_screen(cx * size + w, cy * size + h)
+                    scaled_size = (int(x1) - int(x0), int(y1) - int(y0))
+                    if chunk.scaled is None or chunk.scaled[0] != scaled_size:
+                        chunk.scaled = (scaled_size, pygame.transform.scale(surf, scaled_size))
+                    surf = chunk.scaled[1]
+                visible.add(chunk)
+                view.render_queue.add('map', surf, (int(x0), int(y0)))
+        # scaled copies only live while their chunk is on screen
+        for chunk in self.visible - visible:
+            chunk.scaled = None
+        self.visible = visible
+
+        # bake the ring just outside the view ahead of time, a few chunks per frame
+        budget = self.BAKES_PER_FRAME
+        pxs, pys = self.chunk_range(*bounds, self.PREFETCH)
+        for cx in pxs:
+            for cy in pys:
+                if budget and (cx, cy) not in self.baked:
+                    self.baked_chunk(cx, cy)
+                    budget -= 1
+        # zoomed far out the view alone can cover more than MAX_BAKED chunks; evicting
+        # those would rebake them every frame. The view still bounds the cache
+        limit = max(self.MAX_BAKED, len(pxs) * len(pys))
+        while len(self.baked) > limit:
+            chunk = next(iter(self.baked.values()))
+            if chunk in visible:
+                break  # least recently used first, so the rest were drawn this frame too
+            self.baked.popitem(last=False)
+            chunk.surface = chunk.scaled = None
+
+    def warm(self, x, y):
+        """Decode and bake (unprepared) the chunks a camera centred on (x, y) shows first"""
+        (res_w, res_h), zoom = self.game.sim_view
+        half_w = res_w / zoom / 2
+        half_h = res_h / zoom / 2
+        xs, ys = self.chunk_range(x - half_w, y - half_h, x + half_w, y + half_h, self.PREFETCH)
+        for cx in xs:
+            for cy in ys:
+                chunk = self.chunk(cx, cy)
+                if chunk.surface is None:
+                    self.bake_chunk(chunk, prepare=False)
+                self.baked[(cx, cy)] = chunk
+
+    def prepare(self):
+        # display-format conversion, which must happen on the thread that owns the display;
+        # warmed chunks are converted one by one as baked_chunk first hands them out
+        self.minimap = self.game.prepare_surface(self.minimap, alpha=False)
+
+    def empty_minimap(self):
+        return self.bake_minimap((), self.width, self.height)
+
+    def bake_minimap(self, obstacles, width, height):
+        # background, obstacles and border never change while the map is loaded
+        w, h = self.game.MINIMAP_W, self.game.MINIMAP_H
+        scale_x = w / width
+        scale_y = h / height
+        surf = pygame.Surface((w, h))
+        surf.fill(self.game.ocean_med)
+        for x, y, ow, oh in obstacles:
+            rect = pygame.Rect(int(x * scale_x), int(y * scale_y), max(1, int(ow * scale_x)), max(1, int(oh * scale_y)))
+            pygame.draw.rect(surf, self.game.ocean_light, rect)
+        pygame.draw.rect(surf, self.game.foam, surf.get_rect(), 1)
+        return surf
+
+
+class MapPreloader:
+    """Builds maps on a worker thread ahead of need, so a map change only swaps them in"""
+    def __init__(self, game):
+        self.game = game
+        self.pending = {}
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='map-preload')
+
+    def preload(self, map_name):
+        if map_name not in self.pending:
+            self.pending[map_name] = self.executor.submit(self.build, map_name)
+
+    def build(self, map_name):
+        game_map = Map(self.game, map_name, prepare=False)
+        # the player starts in the middle of the world
+        game_map.warm(game_map.width / 2, game_map.height / 2)
+        return game_map
+
+    def take(self, map_name):
+        """The preloaded map, waiting for it if it is still being built, or None"""
+        future = self.pending.pop(map_name, None)
+        if future is None:
+            return None
+        try:
+            game_map = future.result()
+        except Exception as e:
+            logging.error(f"Error preloading map {map_name}: {e}")
+            return None
+        game_map.prepare()
+        return game_map
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for future in self.pending.values():
+            if not future.cancelled() and future.exception() is None:
+                future.result().close()
+        self.pending.clear()
@@ -0,0 +1,61 @@
+"""Pixel masks for sprite-accurate collision, with a bounding-circle prefilter.
+
+Masks are in world units, which zoom never changes, so one mask per sprite is enough.
+"""
+import math
+
+import pygame
+
+
+class SpriteMask:
+    def __init__(self, mask):
+        self.mask = mask
+        w, h = mask.get_size()
+        self.half_w = w / 2
+        self.half_h = h / 2
+        # farthest corner of any opaque pixel from the centre
+        radius2 = 0.0
+        for x in range(w):
+            for y in range(h):
+                if mask.get_at((x, y)):
+                    dx = max(abs(x - self.half_w), abs(x + 1 - self.half_w))
+                    dy = max(abs(y - self.half_h), abs(y + 1 - self.half_h))
+                    radius2 = max(radius2, dx * dx + dy * dy)
+        self.radius = math.sqrt(radius2)
+
+
+class MaskCache:
+    def __init__(self):
+        self.sprites = {}
+        self.circles = {}
+
+    def prepare(self, sprites):
+        for sprite in sprites:
+            if sprite is not None:
+                self.get(sprite)
+
+    def get(self, sprite):
+        mask = self.sprites.get(sprite)
+        if mask is None:
+            mask = self.sprites[sprite] = SpriteMask(pygame.mask.from_surface(sprite))
+        return mask
+
+    def circle(self, radius):
+        """Mask of a filled circle, for bullets and entities drawn without a sprite"""
+        mask = self.circles.get(radius)
+        if mask is None:
+            surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surf, (255, 255, 255), (radius, radius), radius)
+            mask = self.circles[radius] = SpriteMask(pygame.mask.from_surface(surf))
+        return mask
+
+
+def overlap(a, ax, ay, b, bx, by):
+    """Whether SpriteMasks a and b, centred at (ax, ay) and (bx, by), touch"""
+    dx = bx - ax
+    dy = by - ay
+    reach = a.radius + b.radius
+    if dx * dx + dy * dy > reach * reach:
+        return False
+    offset = (round(dx - b.half_w + a.half_w), round(dy - b.half_h + a.half_h))
+    return a.mask.overlap(b.mask, offset) is not None
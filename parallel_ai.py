@@ -0,0 +1,220 @@
+"""Optional multi-process enemy steering over shared-memory arrays.
+
+Deliberately free of pygame so spawned workers start quickly.
+"""
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import numpy
+
+# cell keys pack (cx, cy) into one int64; the offset keeps off-world cells positive
+CELL_OFFSET = 1 << 20
+CELL_STRIDE = 1 << 21
+# ctrl slots
+N, PLAYER_X, PLAYER_Y, SPEED, CUR, STOP, RADIUS = range(7)
+
+
+def steer(xs, ys, mine, cand, px, py, speed, radius, chunk=4096):
+    """Chase-plus-separation step from SimulationLOD, vectorized over a uniform grid.
+
+    mine are the indices to move, cand the indices that may push them apart. All
+    enemies read the same positions (a Jacobi step), where SimulationLOD sees the
+    already-moved earlier enemies; the difference is well under a pixel per tick."""
+    out_x = numpy.empty(len(mine))
+    out_y = numpy.empty(len(mine))
+    if not len(mine):
+        return out_x, out_y
+    ccx = numpy.floor(xs[cand] / radius).astype(numpy.int64) + CELL_OFFSET
+    ccy = numpy.floor(ys[cand] / radius).astype(numpy.int64) + CELL_OFFSET
+    order = numpy.argsort(ccx * CELL_STRIDE + ccy, kind='stable')
+    skey = (ccx * CELL_STRIDE + ccy)[order]
+    sx = xs[cand][order]
+    sy = ys[cand][order]
+
+    for c0 in range(0, len(mine), chunk):
+        m = mine[c0:c0 + chunk]
+        mx = xs[m]
+        my = ys[m]
+        count = len(m)
+        mcx = numpy.floor(mx / radius).astype(numpy.int64) + CELL_OFFSET
+        mcy = numpy.floor(my / radius).astype(numpy.int64) + CELL_OFFSET
+        sep_x = numpy.zeros(count)
+        sep_y = numpy.zeros(count)
+        for ox in (-1, 0, 1):
+            for oy in (-1, 0, 1):
+                key = (mcx + ox) * CELL_STRIDE + (mcy + oy)
+                lo = numpy.searchsorted(skey, key, 'left')
+                counts = numpy.searchsorted(skey, key, 'right') - lo
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # expand each member's [lo, hi) candidate range into flat pair arrays
+                owner = numpy.repeat(numpy.arange(count), counts)
+                idx = numpy.repeat(lo - numpy.cumsum(counts) + counts, counts) + numpy.arange(total)
+                dx = mx[owner] - sx[idx]
+                dy = my[owner] - sy[idx]
+                d = numpy.hypot(dx, dy)
+                close = (d > 0) & (d < radius)
+                inv = numpy.where(close, 0.5 / numpy.where(close, d, 1.0), 0.0)
+                sep_x += numpy.bincount(owner, weights=dx * inv, minlength=count)
+                sep_y += numpy.bincount(owner, weights=dy * inv, minlength=count)
+
+        # combine: 70% chase, 30% separation
+        cdx = px - mx
+        cdy = py - my
+        dist = numpy.hypot(cdx, cdy)
+        safe = numpy.where(dist != 0, dist, 1.0)
+        tx = numpy.where(dist != 0, cdx / safe * 0.7, 0.0) + sep_x * 0.3
+        ty = numpy.where(dist != 0, cdy / safe * 0.7, 0.0) + sep_y * 0.3
+        td = numpy.hypot(tx, ty)
+        moving = td > 0
+        td = numpy.where(moving, td, 1.0)
+        out_x[c0:c0 + count] = numpy.where(moving, mx + tx / td * speed, mx)
+        out_y[c0:c0 + count] = numpy.where(moving, my + ty / td * speed, my)
+    return out_x, out_y
+
+
+def _views(capacity, blocks):
+    pos = numpy.ndarray((2, 2, capacity), dtype=numpy.float64, buffer=blocks[0].buf)
+    alive = numpy.ndarray((capacity,), dtype=numpy.bool_, buffer=blocks[1].buf)
+    ctrl = numpy.ndarray((8,), dtype=numpy.float64, buffer=blocks[2].buf)
+    return pos, alive, ctrl
+
+
+def _worker_loop(index, workers, world_width, capacity, blocks, start, done):
+    pos, alive, ctrl = _views(capacity, blocks)
+    strip = world_width / workers
+    # outer strips are open-ended so enemies pushed off the world still belong somewhere
+    lo = -numpy.inf if index == 0 else index * strip
+    hi = numpy.inf if index == workers - 1 else (index + 1) * strip
+    while True:
+        start.wait()
+        if ctrl[STOP]:
+            return
+        n = int(ctrl[N])
+        cur = int(ctrl[CUR])
+        radius = ctrl[RADIUS]
+        xs = pos[cur, 0, :n]
+        ys = pos[cur, 1, :n]
+        live = alive[:n]
+        mine = numpy.flatnonzero(live & (xs >= lo) & (xs < hi))
+        cand = numpy.flatnonzero(live & (xs >= lo - radius) & (xs < hi + radius))
+        nx, ny = steer(xs, ys, mine, cand, ctrl[PLAYER_X], ctrl[PLAYER_Y], ctrl[SPEED], radius)
+        pos[1 - cur, 0, mine] = nx
+        pos[1 - cur, 1, mine] = ny
+        done.wait()
+
+
+def _worker(index, workers, world_width, capacity, names, start, done):
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        _worker_loop(index, workers, world_width, capacity, blocks, start, done)
+    finally:
+        # the array views died with _worker_loop, so the blocks can be released
+        for block in blocks:
+            block.close()
+
+
+class EnemyAIPool:
+    """Steps enemy movement across worker processes, one world strip each"""
+    TIMEOUT = 10.0  # seconds before a stuck or dead worker is reported
+    def __init__(self, workers, world_width, capacity=4096, avoid_radius=60):
+        self.workers = workers
+        self.world_width = world_width
+        self.avoid_radius = avoid_radius
+        self.procs = []
+        self.start_pool(capacity)
+
+    def start_pool(self, capacity):
+        ctx = multiprocessing.get_context('spawn')
+        self.capacity = capacity
+        self.blocks = [
+            shared_memory.SharedMemory(create=True, size=2 * 2 * capacity * 8),
+            shared_memory.SharedMemory(create=True, size=capacity),
+            shared_memory.SharedMemory(create=True, size=8 * 8),
+        ]
+        self.pos, self.alive, self.ctrl = _views(capacity, self.blocks)
+        self.ctrl[:] = 0
+        self.ctrl[RADIUS] = self.avoid_radius
+        self.cur = 0
+        # the main process is the extra party on both barriers
+        self.start = ctx.Barrier(self.workers + 1)
+        self.done = ctx.Barrier(self.workers + 1)
+        names = [block.name for block in self.blocks]
+        self.procs = [
+            ctx.Process(target=_worker, name=f'enemy-ai-{i}', daemon=True,
+                        args=(i, self.workers, self.world_width, capacity, names, self.start, self.done))
+            for i in range(self.workers)
+        ]
+        for proc in self.procs:
+            proc.start()
+
+    def step(self, xs, ys, alive, player_x, player_y, speed):
+        """Advance one tick and return views of the new x and y positions"""
+        n = len(xs)
+        if n > self.capacity:
+            self.close()
+            self.start_pool(max(n, self.capacity * 2))
+        cur = self.cur
+        self.pos[cur, 0, :n] = xs
+        self.pos[cur, 1, :n] = ys
+        # dead enemies stay put: seed the next buffer, workers overwrite the living
+        self.pos[1 - cur, :, :n] = self.pos[cur, :, :n]
+        self.alive[:n] = alive
+        self.ctrl[N] = n
+        self.ctrl[PLAYER_X] = player_x
+        self.ctrl[PLAYER_Y] = player_y
+        self.ctrl[SPEED] = speed
+        self.ctrl[CUR] = cur
+        try:
+            self.start.wait(timeout=self.TIMEOUT)
+            self.done.wait(timeout=self.TIMEOUT)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("enemy AI worker did not finish its tick") from None
+        self.cur = 1 - cur
+        return self.pos[self.cur, 0, :n], self.pos[self.cur, 1, :n]
+
+    def update_enemies(self, pool, player, speed):
+        # step the registry pool's position columns and write the results back, into the
+        # columns and the Enemy objects that mirror them
+        enemies = pool.items
+        n = len(enemies)
+        if not n:
+            return
+        xs = numpy.array(pool.xs, dtype=numpy.float64)
+        ys = numpy.array(pool.ys, dtype=numpy.float64)
+        alive = numpy.fromiter((e.alive for e in enemies), dtype=numpy.bool_, count=n)
+        nx, ny = self.step(xs, ys, alive, player.x, player.y, speed)
+        vx = (nx - xs).tolist()
+        vy = (ny - ys).tolist()
+        nx = nx.tolist()
+        ny = ny.tolist()
+        pool.xs[:] = nx
+        pool.ys[:] = ny
+        pool.vxs[:] = vx
+        pool.vys[:] = vy
+        for e, x, y, dx, dy in zip(enemies, nx, ny, vx, vy):
+            e.x = x
+            e.y = y
+            e.vx = dx
+            e.vy = dy
+
+    def close(self):
+        if not self.procs:
+            return
+        self.ctrl[STOP] = 1
+        try:
+            self.start.wait(timeout=5)
+        except Exception:
+            pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self.procs = []
+        self.pos = self.alive = self.ctrl = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
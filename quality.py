@@ -0,0 +1,76 @@
+"""Adaptive quality: trades visual detail for frame time to hold the fps_limit target.
+
+Every knob is cosmetic, so quality changes never affect the simulation, replays or
+save states.
+"""
+import collections
+import logging
+
+# each level is the full knob set; every step changes as little as possible
+# particles: fraction of make_particles counts, trail_every: ticks between bullet
+# trail particles, lod_floor: lowest level of detail (1 drops glows), render_scale:
+# fraction of the window size drawn (the HUD shrinks with it, as with fixed rendering,
+# so it stops at 0.75), minimap_every: frames between heatmap refreshes
+QUALITY_LEVELS = [
+    {'particles': 1.0, 'trail_every': 4, 'lod_floor': 0, 'minimap_every': 1, 'render_scale': 1.0},
+    {'particles': 0.5, 'trail_every': 4, 'lod_floor': 0, 'minimap_every': 1, 'render_scale': 1.0},
+    {'particles': 0.5, 'trail_every': 8, 'lod_floor': 0, 'minimap_every': 1, 'render_scale': 1.0},
+    {'particles': 0.5, 'trail_every': 8, 'lod_floor': 1, 'minimap_every': 1, 'render_scale': 1.0},
+    {'particles': 0.5, 'trail_every': 8, 'lod_floor': 1, 'minimap_every': 6, 'render_scale': 1.0},
+    {'particles': 0.25, 'trail_every': 16, 'lod_floor': 1, 'minimap_every': 6, 'render_scale': 1.0},
+    {'particles': 0.25, 'trail_every': 16, 'lod_floor': 1, 'minimap_every': 12, 'render_scale': 0.75},
+]
+
+
+def describe(old, new):
+    return ', '.join(f"{name} {old[name]}->{new[name]}" for name in new if old[name] != new[name])
+
+
+class QualityController:
+    SMOOTHING = 0.1  # weight of the newest frame in the running average
+    DEGRADE_AT = 1.0  # fraction of the frame budget that counts as over
+    RECOVER_AT = 0.6  # and as comfortably under
+    DEGRADE_FRAMES = 30  # consecutive frames over budget before stepping down
+    RECOVER_FRAMES = 240  # consecutive frames under before stepping back up
+    HISTORY = 8  # changes kept for the debug overlay
+
+    def __init__(self, game):
+        self.game = game
+        self.level = 0
+        self.frame_ms = 0.0
+        self.over = 0
+        self.under = 0
+        self.changes = collections.deque(maxlen=self.HISTORY)
+
+    def budget_ms(self):
+        return 1000 / self.game.SETTINGS.get('fps_limit', 60)
+
+    def update(self, frame_ms):
+        """Feed one frame's work time; called by the render loop after every frame"""
+        self.frame_ms += (frame_ms - self.frame_ms) * self.SMOOTHING
+        budget = self.budget_ms()
+        self.over = self.over + 1 if self.frame_ms > budget * self.DEGRADE_AT else 0
+        self.under = self.under + 1 if self.frame_ms < budget * self.RECOVER_AT else 0
+        if self.over >= self.DEGRADE_FRAMES and self.level < len(QUALITY_LEVELS) - 1:
+            self.set_level(self.level + 1)
+        elif self.under >= self.RECOVER_FRAMES and self.level > 0:
+            self.set_level(self.level - 1)
+
+    def set_level(self, level):
+        old = QUALITY_LEVELS[self.level]
+        new = QUALITY_LEVELS[level]
+        change = describe(old, new)
+        logging.info(f"Quality {self.level}->{level} at {self.frame_ms:.1f}/{self.budget_ms():.1f} ms: {change}")
+        self.changes.append((self.game.frame_time, self.level, level, change))
+        self.level = level
+        self.over = self.under = 0
+        self.apply()
+
+    def apply(self):
+        knobs = QUALITY_LEVELS[self.level]
+        game = self.game
+        game.particle_scale = knobs['particles']
+        game.trail_every = knobs['trail_every']
+        game.lod_floor = knobs['lod_floor']
+        game.minimap_every = knobs['minimap_every']
+        game.set_render_scale(knobs['render_scale'])
@@ -0,0 +1,155 @@
+"""Entity registry: generational handles over dense per-type entity lists.
+
+The lists and their x/y/vx/vy columns are mutated in place, never rebound, and
+removals wait for EntityRegistry.flush() at the end of the tick. Entity attributes
+mirror the columns, so pooled entities move through move() and set_velocity().
+"""
+
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+
+class EntityPool:
+    def __init__(self, name):
+        self.name = name
+        self.items = []  # dense: what systems iterate
+        self.ids = []  # dense: id of the entity at the same index
+        self.xs = []  # dense columns: position and velocity of the entity at the same index
+        self.ys = []
+        self.vxs = []
+        self.vys = []
+        self.index = []  # sparse: id -> dense index, or -1 when free
+        self.generations = []  # sparse: id -> current generation
+        self.free = []
+        self.pending = []
+        self.alive = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, entity):
+        if self.free:
+            eid = self.free.pop()
+        else:
+            eid = len(self.index)
+            self.index.append(-1)
+            self.generations.append(0)
+        self.index[eid] = len(self.items)
+        self.items.append(entity)
+        self.ids.append(eid)
+        self.xs.append(entity.x)
+        self.ys.append(entity.y)
+        self.vxs.append(getattr(entity, 'vx', 0.0))
+        self.vys.append(getattr(entity, 'vy', 0.0))
+        entity.handle = self.generations[eid] << ID_BITS | eid
+        entity.destroyed = False
+        if getattr(entity, 'alive', True):
+            self.alive += 1
+        return entity.handle
+
+    def get(self, handle):
+        """The entity behind handle, or None once it has been removed"""
+        eid = handle & ID_MASK
+        if eid < len(self.index) and self.generations[eid] == handle >> ID_BITS and self.index[eid] >= 0:
+            return self.items[self.index[eid]]
+        return None
+
+    def move(self, entity, x, y):
+        i = self.index[entity.handle & ID_MASK]
+        self.xs[i] = entity.x = x
+        self.ys[i] = entity.y = y
+
+    def set_velocity(self, entity, vx, vy):
+        i = self.index[entity.handle & ID_MASK]
+        self.vxs[i] = entity.vx = vx
+        self.vys[i] = entity.vy = vy
+
+    def kill(self, entity):
+        if entity.alive:
+            entity.alive = False
+            self.alive -= 1
+
+    def destroy(self, entity):
+        # removed at the end of the tick by EntityRegistry.flush; repeats are harmless
+        if not entity.destroyed:
+            entity.destroyed = True
+            self.pending.append(entity)
+
+    def remove(self, entity):
+        eid = entity.handle & ID_MASK
+        i = self.index[eid]
+        last = self.items.pop()
+        last_id = self.ids.pop()
+        columns = (self.xs.pop(), self.ys.pop(), self.vxs.pop(), self.vys.pop())
+        if last is not entity:
+            self.items[i] = last
+            self.ids[i] = last_id
+            self.index[last_id] = i
+            self.xs[i], self.ys[i], self.vxs[i], self.vys[i] = columns
+        self.index[eid] = -1
+        self.generations[eid] += 1
+        self.free.append(eid)
+        entity.destroyed = True
+        if getattr(entity, 'alive', True):
+            self.alive -= 1
+
+    def flush(self):
+        for entity in self.pending:
+            self.remove(entity)
+        self.pending.clear()
+
+    def clear(self):
+        # every handle goes stale; ids are reused from the lowest up
+        for entity in self.items:
+            entity.destroyed = True
+        for eid in self.ids:
+            self.generations[eid] += 1
+        self.items.clear()
+        self.ids.clear()
+        for column in (self.xs, self.ys, self.vxs, self.vys):
+            column.clear()
+        self.index = [-1] * len(self.index)
+        self.free = list(range(len(self.index) - 1, -1, -1))
+        self.pending.clear()
+        self.alive = 0
+
+    def replace(self, entities):
+        """Make entities (which carry the handles they were registered with) the contents"""
+        entities = list(entities)
+        for entity in self.items:
+            entity.destroyed = True
+        size = max([len(self.index)] + [(e.handle & ID_MASK) + 1 for e in entities])
+        # handles of entities not coming back must stay stale
+        self.generations = [g + 1 for g in self.generations] + [0] * (size - len(self.generations))
+        self.index = [-1] * size
+        self.items[:] = entities
+        self.ids = []
+        for i, e in enumerate(entities):
+            eid = e.handle & ID_MASK
+            self.index[eid] = i
+            self.generations[eid] = e.handle >> ID_BITS
+            self.ids.append(eid)
+            e.destroyed = False
+        self.xs[:] = [e.x for e in entities]
+        self.ys[:] = [e.y for e in entities]
+        self.vxs[:] = [getattr(e, 'vx', 0.0) for e in entities]
+        self.vys[:] = [getattr(e, 'vy', 0.0) for e in entities]
+        self.free = [eid for eid in range(size - 1, -1, -1) if self.index[eid] < 0]
+        self.pending.clear()
+        self.alive = sum(1 for e in entities if getattr(e, 'alive', True))
+
+
+class EntityRegistry:
+    KINDS = ('enemies', 'bullets', 'power_ups')
+
+    def __init__(self):
+        self.pools = {kind: EntityPool(kind) for kind in self.KINDS}
+        self.enemies = self.pools['enemies']
+        self.bullets = self.pools['bullets']
+        self.power_ups = self.pools['power_ups']
+
+    def flush(self):
+        """Apply every destroy() queued this tick"""
+        for pool in self.pools.values():
+            if pool.pending:
+                pool.flush()
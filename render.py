@@ -0,0 +1,250 @@
+import weakref
+
+import pygame
+
+try:
+    import numpy
+except ImportError:  # heatmaps fall back to per-enemy dots without numpy
+    numpy = None
+
+try:
+    from pygame._sdl2 import video as sdl2_video
+except ImportError:  # the texture backend is unavailable on builds without _sdl2
+    sdl2_video = None
+
+
+class RenderQueue:
+    """Collects (surface, position) pairs per layer and submits each layer in one call"""
+    def __init__(self, layers, stamps):
+        self.layers = list(layers)
+        self.queues = {name: [] for name in self.layers}
+        self.stamps = stamps
+
+    def add(self, layer, surface, pos):
+        self.queues[layer].append((surface, pos))
+
+    def add_sprite(self, layer, sprite, center, zoom, angle=0.0, alpha=255):
+        # angle follows pygame.transform.rotate: degrees, counter-clockwise
+        surf = self.stamps.scale(sprite, zoom)
+        if angle:
+            surf = pygame.transform.rotate(surf, angle)
+        if alpha < 255:
+            surf = surf.copy()
+            surf.set_alpha(alpha)
+        w, h = surf.get_size()
+        self.queues[layer].append((surf, (int(center[0] - w/2), int(center[1] - h/2))))
+
+    def clear(self):
+        for q in self.queues.values():
+            q.clear()
+
+    def fill(self, display, color):
+        # the frame's background
+        display.fill(color)
+
+    def flush(self, display):
+        # pygame-ce exposes fblits (no return rects), stock pygame only blits
+        fblits = getattr(display, 'fblits', None)
+        for name in self.layers:
+            q = self.queues[name]
+            if not q:
+                continue
+            if fblits:
+                fblits(q)
+            else:
+                display.blits(q, doreturn=False)
+            q.clear()
+
+    def present(self, display, capture=None):
+        if capture is not None:
+            capture.add(display.copy())
+        pygame.display.flip()
+
+
+class TextureRenderQueue(RenderQueue):
+    """RenderQueue on an SDL2 Renderer: sprites are uploaded once and scaled, rotated
+    and faded per draw. Everything still drawn with Surface calls lands on a transparent
+    overlay, uploaded once per frame in present and drawn over all the layers."""
+    def __init__(self, layers, stamps, size, title, software=False):
+        super().__init__(layers, stamps)
+        self.window = sdl2_video.Window(title, size)
+        self.renderer = sdl2_video.Renderer(self.window, accelerated=0 if software else -1)
+        self.textures = {}
+        self.resize(size)
+
+    def resize(self, size):
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+        self.overlay_texture = sdl2_video.Texture(self.renderer, size, streaming=True)
+        self.overlay_texture.blend_mode = pygame.BLENDMODE_BLEND
+        self.clear_frame()
+        return self.overlay
+
+    def clear_frame(self):
+        # the whole target, letterbox bars included, which nothing else draws over
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+
+    def texture(self, surface):
+        # keyed by identity, like StampCache.scale; an entry goes when its surface does, so
+        # the textures of dropped map chunks and heatmaps are freed with them
+        key = id(surface)
+        entry = self.textures.get(key)
+        if entry is None or entry[0]() is not surface:
+            ref = weakref.ref(surface, lambda _, key=key: self.textures.pop(key, None))
+            entry = (ref, sdl2_video.Texture.from_surface(self.renderer, surface))
+            self.textures[key] = entry
+        return entry[1]
+
+    def add(self, layer, surface, pos):
+        w, h = surface.get_size()
+        self.queues[layer].append((self.texture(surface), (int(pos[0]), int(pos[1]), w, h), 0.0, 255))
+
+    def add_sprite(self, layer, sprite, center, zoom, angle=0.0, alpha=255):
+        w, h = sprite.get_size()
+        w = int(w * zoom)
+        h = int(h * zoom)
+        dst = (int(center[0] - w/2), int(center[1] - h/2), w, h)
+        # SDL rotates clockwise, transform.rotate counter-clockwise
+        self.queues[layer].append((self.texture(sprite), dst, -angle, alpha))
+
+    def fill(self, display, color):
+        # straight to the renderer, so the overlay stays transparent
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.fill_rect((0, 0, *display.get_size()))
+
+    def draw_overlay(self):
+        # the HUD is drawn here every frame, so there is no clean frame worth detecting
+        self.overlay_texture.update(self.overlay)
+        self.overlay_texture.draw()
+        self.overlay.fill((0, 0, 0, 0))
+
+    def flush(self, display):
+        for name in self.layers:
+            q = self.queues[name]
+            for tex, dst, angle, alpha in q:
+                if alpha < 255:
+                    tex.alpha = alpha
+                    tex.draw(dstrect=dst, angle=angle)
+                    tex.alpha = 255
+                else:
+                    tex.draw(dstrect=dst, angle=angle)
+            q.clear()
+
+    def present(self, display, capture=None):
+        self.flush(display)
+        self.draw_overlay()
+        if capture is not None:
+            # the finished frame only exists in the renderer, so read it back
+            capture.add(self.renderer.to_surface())
+        self.renderer.present()
+        self.clear_frame()
+
+
+def create_render_queue(backend, layers, stamps, size, title):
+    # 'texture' prefers a hardware renderer, 'texture-software' forces SDL's software one
+    if backend == 'texture' or backend == 'texture-software':
+        if sdl2_video is None:
+            raise RuntimeError("texture backend needs pygame._sdl2")
+        return TextureRenderQueue(layers, stamps, size, title, software=(backend == 'texture-software'))
+    return RenderQueue(layers, stamps)
+
+
+class StampCache:
+    """Pre-rendered circles, glows and zoom-scaled sprites, keyed by their draw parameters"""
+    def __init__(self):
+        self.circles = {}
+        self.glows = {}
+        self.scaled = {}
+        self.scaled_zoom = None
+        self.composites = {}
+        self.pixels = {}
+        self.averages = {}
+
+    def clear(self):
+        self.circles.clear()
+        self.glows.clear()
+        self.scaled.clear()
+        self.scaled_zoom = None
+        self.composites.clear()
+        self.pixels.clear()
+        self.averages.clear()
+
+    def pixel(self, color, size=1):
+        key = (color, size)
+        surf = self.pixels.get(key)
+        if surf is None:
+            surf = pygame.Surface((size, size))
+            surf.fill(color)
+            self.pixels[key] = surf
+        return surf
+
+    def average_color(self, sprite):
+        # used by pixel impostors; the sprite itself is kept so the id key stays valid
+        entry = self.averages.get(id(sprite))
+        if entry is None or entry[0] is not sprite:
+            entry = (sprite, tuple(pygame.transform.average_color(sprite))[:3])
+            self.averages[id(sprite)] = entry
+        return entry[1]
+
+    def circle(self, color, radius):
+        radius = int(radius)
+        key = (color, radius)
+        surf = self.circles.get(key)
+        if surf is None:
+            size = max(1, radius * 2)
+            surf = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(surf, color, (radius, radius), radius)
+            self.circles[key] = surf
+        return surf
+
+    def glow(self, radius, color):
+        # mirrors Game.draw_glow: concentric 1px rings in a lightened colour (its
+        # intensity never reaches the pixels, so it is not part of the key)
+        radius = int(radius)
+        key = (color, radius)
+        surf = self.glows.get(key)
+        if surf is None:
+            size = max(1, radius * 2)
+            surf = pygame.Surface((size, size), pygame.SRCALPHA)
+            c = tuple(min(255, int(col + (255 - col) * 0.3)) for col in color)
+            for i in range(radius, 0, -2):
+                pygame.draw.circle(surf, c, (radius, radius), i, 1)
+            self.glows[key] = surf
+        return surf
+
+    def scale(self, sprite, zoom):
+        # one zoom level at a time, or every level passed through while zooming stays alive
+        zoom = round(zoom, 3)
+        if zoom != self.scaled_zoom:
+            self.scaled.clear()
+            self.scaled_zoom = zoom
+        key = id(sprite)
+        entry = self.scaled.get(key)
+        if entry is None or entry[0] is not sprite:
+            w, h = sprite.get_size()
+            scaled = pygame.transform.scale(sprite, (int(w * zoom), int(h * zoom)))
+            # keep the source alive alongside the result so the id key stays valid
+            entry = (sprite, scaled)
+            self.scaled[key] = entry
+        return entry[1]
+
+    def composite(self, key, build):
+        # arbitrary stamps built once by the caller, e.g. layered bullet sprites
+        surf = self.composites.get(key)
+        if surf is None:
+            surf = build()
+            self.composites[key] = surf
+        return surf
+
+
+def density_heatmap(xs, ys, world_size, size, color, cell=4, gain=64):
+    """Bin world positions into a 2D histogram and return it as an alpha-shaded surface"""
+    bins = (max(1, size[0] // cell), max(1, size[1] // cell))
+    counts, _, _ = numpy.histogram2d(xs, ys, bins=bins, range=[[0, world_size[0]], [0, world_size[1]]])
+    surf = pygame.Surface(bins, pygame.SRCALPHA)
+    surf.fill((*color, 0))
+    # surfarray is indexed [x][y], which matches histogram2d(xs, ys)
+    alpha = pygame.surfarray.pixels_alpha(surf)
+    alpha[:] = numpy.minimum(counts * gain, 255).astype(numpy.uint8)
+    del alpha  # release the surface lock
+    return pygame.transform.smoothscale(surf, size)
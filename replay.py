@@ -0,0 +1,209 @@
+"""Deterministic session recording and replay.
+
+Exact for the default run loop only; with --threaded, window events and simulation
+ticks are not ordered the same way on replay.
+"""
+import json
+import logging
+import random
+import struct
+import time
+import zlib
+
+import pygame
+
+MAGIC = b'OITCREC1'
+VERSION = 1
+CHECK_INTERVAL = 60
+# clock advance in microseconds, held-key bits, mouse x, mouse y, event count
+TICK = struct.Struct('<IBffB')
+EVENT = struct.Struct('<Bi')
+CHECK = struct.Struct('<I')
+END = 255
+F32 = struct.Struct('<ff')
+
+# only the keys GameScene.update polls are recorded
+RECORDED_KEYS = (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d,
+                 pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s)
+KEY_BITS = {key: i for i, key in enumerate(RECORDED_KEYS)}
+# recorded event kinds and the attribute carried as the payload
+EVENT_KINDS = {pygame.KEYDOWN: (1, 'key'), pygame.MOUSEBUTTONDOWN: (2, 'button'), pygame.MOUSEWHEEL: (3, 'y')}
+
+
+class RandomStreams:
+    """One random.Random per subsystem, all derived from the game seed, so cosmetic
+    randomness (fx) can change without shifting spawns, AI or loot"""
+    NAMES = ('spawn', 'ai', 'loot', 'fx')
+
+    def __init__(self, seed):
+        self.seed = seed
+        for name in self.NAMES:
+            setattr(self, name, random.Random(f'{seed}:{name}'))
+
+
+class RecordedKeys:
+    """pygame.key.get_pressed() stand-in backed by the recorded key bits"""
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    def __getitem__(self, key):
+        bit = KEY_BITS.get(key)
+        return bit is not None and bool(self.mask >> bit & 1)
+
+
+def state_crc(game):
+    # cheap fingerprint of the simulated state, not of rendering
+    player = game.player
+    h = zlib.crc32(struct.pack('<qqddd', game.score, game.wave, player.x, player.y, player.hp))
+    h = zlib.crc32(game.scene.encode(), h)
+    for e in game.enemies:
+        h = zlib.crc32(struct.pack('<dd?', e.x, e.y, e.alive), h)
+    for b in game.bullets:
+        h = zlib.crc32(struct.pack('<dd', b.x, b.y), h)
+    if game.boss is not None:
+        h = zlib.crc32(struct.pack('<ddd', game.boss.x, game.boss.y, game.boss.hp), h)
+    return h
+
+
+class Recorder:
+    """Records a live session; installed as the game's time and input source"""
+    def __init__(self, game, path):
+        self.game = game
+        self.file = open(path, 'wb')
+        self.compressor = zlib.compressobj(9)
+        self.base_time = float(int(time.time()))
+        self.elapsed_us = 0
+        self.last = time.perf_counter()
+        self.ticks = 0
+        self.keys = RecordedKeys()
+        self.mouse = (0.0, 0.0)
+        header = json.dumps({'version': VERSION, 'seed': game.seed, 'base_time': self.base_time,
+                             'enemy_workers': game.enemy_ai.workers if game.enemy_ai else 0,
+                             'check_interval': CHECK_INTERVAL}).encode()
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        game.time_source = self
+        game.input_source = self
+
+    def __call__(self):
+        return self.base_time + self.elapsed_us / 1e6
+
+    def keys_pressed(self):
+        return self.keys
+
+    def mouse_pos(self):
+        return self.mouse
+
+    def capture(self, events):
+        # called by Game.step before the tick runs; the game then sees exactly what is written
+        now = time.perf_counter()
+        dt_us = min(int((now - self.last) * 1e6), 0xFFFFFFFF)
+        self.last = now
+        self.elapsed_us += dt_us
+
+        pressed = pygame.key.get_pressed()
+        mask = 0
+        for key, bit in KEY_BITS.items():
+            if pressed[key]:
+                mask |= 1 << bit
+        self.keys = RecordedKeys(mask)
+        # round through float32 so the live game uses the stored value
+        self.mouse = F32.unpack(F32.pack(*self.game.read_mouse()))
+
+        recorded = [(EVENT_KINDS[e.type][0], getattr(e, EVENT_KINDS[e.type][1]))
+                    for e in events if e.type in EVENT_KINDS][:END - 1]
+        parts = [TICK.pack(dt_us, mask, self.mouse[0], self.mouse[1], len(recorded))]
+        parts.extend(EVENT.pack(kind, value) for kind, value in recorded)
+        if self.ticks % CHECK_INTERVAL == 0:
+            parts.append(CHECK.pack(state_crc(self.game)))
+        self.file.write(self.compressor.compress(b''.join(parts)))
+        self.ticks += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        # the end marker carries a checksum of the final state
+        self.file.write(self.compressor.compress(TICK.pack(0, 0, 0.0, 0.0, END) + CHECK.pack(state_crc(self.game))))
+        self.file.write(self.compressor.flush())
+        self.file.close()
+        self.file = None
+        logging.info(f"Recorded {self.ticks} ticks")
+
+
+class Replayer:
+    """Feeds a recording back into a game built with the recorded seed"""
+    EVENT_TYPES = {kind: (etype, attr) for etype, (kind, attr) in EVENT_KINDS.items()}
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        size, = struct.unpack('<I', self.file.read(4))
+        self.header = json.loads(self.file.read(size))
+        self.decompressor = zlib.decompressobj()
+        self.buffer = b''
+        self.offset = 0
+        self.game = None
+        self.elapsed_us = 0
+        self.ticks = 0
+        self.keys = RecordedKeys()
+        self.mouse = (0.0, 0.0)
+        self.divergence = None
+
+    def attach(self, game):
+        if game.seed != self.header['seed']:
+            raise ValueError("game seed does not match the recording")
+        self.game = game
+        game.time_source = self
+        game.input_source = self
+
+    def __call__(self):
+        return self.header['base_time'] + self.elapsed_us / 1e6
+
+    def keys_pressed(self):
+        return self.keys
+
+    def mouse_pos(self):
+        return self.mouse
+
+    def read(self, size):
+        while len(self.buffer) - self.offset < size:
+            chunk = self.file.read(1 << 16)
+            if not chunk:
+                raise EOFError("recording ends mid-tick")
+            self.buffer = self.buffer[self.offset:] + self.decompressor.decompress(chunk)
+            self.offset = 0
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+    def verify(self, data):
+        expected, = CHECK.unpack(data)
+        if self.divergence is None and expected != state_crc(self.game):
+            self.divergence = self.ticks
+            logging.warning(f"Replay diverged from the recording at tick {self.ticks}")
+
+    def tick(self):
+        """Replay one tick; returns False once the recording is exhausted"""
+        dt_us, mask, mx, my, count = TICK.unpack(self.read(TICK.size))
+        if count == END:
+            self.verify(self.read(CHECK.size))
+            return False
+        events = []
+        for _ in range(count):
+            kind, value = EVENT.unpack(self.read(EVENT.size))
+            etype, attr = self.EVENT_TYPES[kind]
+            events.append(pygame.event.Event(etype, {attr: value, 'pos': (int(mx), int(my)), 'mod': 0, 'unicode': ''}))
+        if self.ticks % self.header['check_interval'] == 0:
+            self.verify(self.read(CHECK.size))
+        self.elapsed_us += dt_us
+        self.keys = RecordedKeys(mask)
+        self.mouse = (mx, my)
+        # same order as Game.run: window events first, then the scene tick
+        for event in events:
+            self.game.handle_window_event(event)
+        self.game.step(events)
+        self.ticks += 1
+        return True
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,368 @@
+"""Save states: capture and restore the simulated game state, plus a rewind buffer.
+
+Clock-based fields are shifted on restore, so timers resume with the time they had left.
+"""
+import collections
+import io
+import itertools
+import logging
+import operator
+import pickle
+import zlib
+
+import pygame
+from entities import Enemy, Bullet, PowerUp, Boss, Shockwave
+from maps import Map
+from director import SpawnDirector
+from simlod import SimulationLOD
+
+SCALARS = ('score', 'wave', 'wave_active', 'wave_timer', 'AMMO', 'MAX_AMMO', 'PLAYER_SPEED',
+           'shoot_cooldown', 'SHOOT_DELAY', 'reload_cooldown', 'shield_active', 'shield_end_time',
+           'shield_last_used', 'SHIELD_DURATION', 'SHIELD_COOLDOWN', 'current_map_index',
+           'current_map', 'WORLD_WIDTH', 'WORLD_HEIGHT', 'camera_x', 'camera_y')
+# absolute game-clock values, shifted by the time elapsed since capture on restore
+TIME_SCALARS = ('wave_timer', 'shoot_cooldown', 'reload_cooldown', 'shield_end_time', 'shield_last_used')
+TIME_FIELDS = {PowerUp: ('creation_time',), Boss: ('last_state_change', 'last_ability_time')}
+ENTITY_LISTS = {'enemies': Enemy, 'bullets': Bullet, 'power_ups': PowerUp, 'shockwaves': Shockwave}
+# cosmetic randomness (fx) does not need rewinding to keep the game deterministic
+RNG_STREAMS = ('spawn', 'ai', 'loot')
+
+
+def capture_state(game):
+    player = dict(game.player.__dict__)
+    player['knockback_velocity'] = list(player['knockback_velocity'])
+    state = {
+        'time': game.now(),
+        'scalars': {name: getattr(game, name) for name in SCALARS},
+        'settings': dict(game.SETTINGS),
+        'active_power_ups': dict(game.active_power_ups),
+        'upgrades': [up.level for up in game.upgrades],
+        'rng': {name: getattr(game.rng, name).getstate() for name in RNG_STREAMS},
+        'player': player,
+        'boss': dict(game.boss.__dict__) if game.boss else None,
+        'pickups': [dict(p) for p in game.pickups],
+        'director': {name: getattr(game.director, name) for name in SpawnDirector.STATE},
+        'sim_lod': {name: getattr(game.sim_lod, name) for name in SimulationLOD.STATE},
+    }
+    # the objects themselves are kept too, so an in-memory restore can reuse them
+    # instead of allocating new ones; RewindBuffer drops them before pickling
+    objects = {}
+    for name in ENTITY_LISTS:
+        items = list(getattr(game, name))
+        objects[name] = items
+        state[name] = [*map(dict.copy, map(vars, items))]
+    state['objects'] = objects
+    return state
+
+
+def revive(cls, states, shift, objects=None):
+    # map() keeps the per-entity work in C; this runs for every entity on restore.
+    # Reused objects are overwritten rather than cleared: entities set all their
+    # attributes in __init__, so the captured dicts cover every key they have
+    if objects is None:
+        objects = [*map(cls.__new__, [cls] * len(states))]
+    [*map(dict.update, map(vars, objects), states)]
+    for name in TIME_FIELDS.get(cls, ()):
+        for obj in objects:
+            setattr(obj, name, getattr(obj, name) + shift)
+    return objects
+
+
+def restore_state(game, state):
+    shift = game.now() - state['time']
+    for name, value in state['scalars'].items():
+        setattr(game, name, value + shift if name in TIME_SCALARS else value)
+    game.SETTINGS.clear()
+    game.SETTINGS.update(state['settings'])
+    game.active_power_ups = {name: end + shift for name, end in state['active_power_ups'].items()}
+    game.stats.sync_power_ups()
+    for up, level in zip(game.upgrades, state['upgrades']):
+        up.level = level
+    for name, rng_state in state['rng'].items():
+        getattr(game.rng, name).setstate(rng_state)
+    # the player object is shared with scenes and snapshots, so update it in place
+    game.player.__dict__.update(state['player'])
+    game.player.knockback_velocity = list(state['player']['knockback_velocity'])
+    game.boss = revive(Boss, [state['boss']], shift)[0] if state['boss'] else None
+    game.pickups = [*map(dict.copy, state['pickups'])]
+    game.director.__dict__.update(state['director'])
+    game.director.density = None
+    game.sim_lod.__dict__.update(state['sim_lod'])
+    # the neighbour grid was built from the state being replaced
+    game.sim_lod.clear_grid()
+    objects = state.get('objects') or {}
+    for name, cls in ENTITY_LISTS.items():
+        entities = revive(cls, state[name], shift, objects.get(name))
+        # registry lists are shared with Game, so they are refilled rather than rebound
+        if name in game.registry.pools:
+            game.registry.pools[name].replace(entities)
+        else:
+            setattr(game, name, entities)
+
+
+def shared_object(key):
+    # placeholder resolved by StateUnpickler.find_class; never called directly
+    raise RuntimeError("shared objects only resolve inside StateUnpickler")
+
+
+class StatePickler(pickle.Pickler):
+    # the game, maps and surfaces are stored by reference rather than copied.
+    # reducer_override (unlike persistent_id) is skipped for plain numbers, strings
+    # and containers, which are almost everything in a state
+    def __init__(self, file, shared):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.shared = shared
+
+    def reducer_override(self, obj):
+        if isinstance(obj, (pygame.Surface, Map)) or obj is self.shared.get('game'):
+            self.shared[id(obj)] = obj
+            return shared_object, (id(obj),)
+        return NotImplemented
+
+
+class StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, shared):
+        super().__init__(file)
+        self.shared = shared
+
+    def find_class(self, module, name):
+        if module == __name__ and name == 'shared_object':
+            return self.shared.__getitem__
+        return super().find_class(module, name)
+
+
+def rows(items):
+    # each entity's field names and values as tuples, built in C
+    return [*map(tuple, items)], [*map(tuple, map(dict.values, items))]
+
+
+def diff_list(base_keys, base_values, base_ids, base_index, items, ids):
+    keys, values = rows(items)
+    if ids == base_ids and keys == base_keys:
+        # same entities in the same order, the usual case: the changed positions and
+        # their values, found without a Python-level loop
+        changed = [*itertools.compress(itertools.count(), map(operator.ne, values, base_values))]
+        return 'same', changed, [*map(values.__getitem__, changed)]
+    # otherwise per entity: keyframe index alone when unchanged, (index, values) when
+    # only values changed, or (-1, fields) when new or its field names changed
+    entries = []
+    for k, v, fields, key in zip(keys, values, items, ids):
+        i = base_index.get(key)
+        if i is None or k != base_keys[i]:
+            entries.append((-1, fields))
+        elif v == base_values[i]:
+            entries.append(i)
+        else:
+            entries.append((i, v))
+    return 'entries', entries
+
+
+def diff_dict(old, new):
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    if new.keys() == old.keys():
+        return changed, ()
+    return changed, tuple(k for k in old if k not in new)
+
+
+def patch_dict(old, changed, removed):
+    fields = dict(old)
+    fields.update(changed)
+    for k in removed:
+        del fields[k]
+    return fields
+
+
+def patch_list(base, diff):
+    if diff[0] == 'same':
+        items = [dict(fields) for fields in base]
+        for i, values in zip(*diff[1:]):
+            items[i] = dict(zip(base[i], values))
+        return items
+    items = []
+    for entry in diff[1]:
+        if isinstance(entry, int):
+            items.append(dict(base[entry]))
+        elif entry[0] < 0:
+            items.append(entry[1])
+        else:
+            items.append(dict(zip(base[entry[0]], entry[1])))
+    return items
+
+
+class RewindBuffer:
+    """Ring buffer of compressed save states covering the last `seconds` of play"""
+    KEYFRAME_EVERY = 10
+    LISTS = tuple(ENTITY_LISTS) + ('pickups',)
+
+    def __init__(self, game, seconds=10.0, interval=6, max_bytes=32 << 20, max_entities=3000):
+        self.game = game
+        self.seconds = seconds
+        self.interval = interval  # ticks between captured frames
+        self.max_bytes = max_bytes
+        # above this many entities a keyframe takes ~6 ms, more than a tick can spare;
+        # recording pauses (and the buffer empties) until the count drops again, and the
+        # player is told both ways
+        self.max_entities = max_entities
+        self.paused = False
+        self.clear()
+
+    def clear(self):
+        # each segment: [keyframe time, keyframe bytes, [(time, delta bytes), ...]],
+        # times from game.now()
+        self.segments = collections.deque()
+        # objects the stored frames refer to; rebuilt with them, or every map ever
+        # played would stay alive in here
+        self.shared = {'game': self.game}
+        self.bytes = 0
+        self.ticks = 0
+        self.base = None
+        self.base_ids = None
+        self.base_index = None
+        self.base_rows = None
+        self.rng_stored = {}
+
+    def __len__(self):
+        return sum(1 + len(segment[2]) for segment in self.segments)
+
+    def encode(self, obj):
+        f = io.BytesIO()
+        StatePickler(f, self.shared).dump(obj)
+        return zlib.compress(f.getvalue(), 1)
+
+    def decode(self, data):
+        return StateUnpickler(io.BytesIO(zlib.decompress(data)), self.shared).load()
+
+    def entity_ids(self):
+        return {name: [id(e) for e in getattr(self.game, name)] for name in self.LISTS}
+
+    def notify(self, text):
+        # floating text over the player, like quick_save's; popups are not game state
+        player = self.game.player
+        self.game.popups.append({'text': text, 'x': player.x, 'y': player.y - 20, 'life': 90, 'vy': -0.6,
+                                 'color': self.game.coral})
+
+    def tick(self):
+        # called once per simulation tick; captures every `interval` ticks
+        self.ticks += 1
+        if self.ticks % self.interval == 0:
+            self.record()
+
+    def record(self):
+        count = sum(len(getattr(self.game, name)) for name in self.LISTS)
+        if count > self.max_entities:
+            if not self.paused:
+                logging.info(f"Rewind paused: {count} entities is over {self.max_entities}")
+                self.clear()
+                self.paused = True
+                self.notify('Rewind off: too many enemies')
+            return
+        if self.paused:
+            self.paused = False
+            self.notify('Rewind on')
+        now = self.game.now()
+        state = capture_state(self.game)
+        del state['objects']
+        ids = self.entity_ids()
+        if self.base is None or len(self.segments[-1][2]) >= self.KEYFRAME_EVERY - 1:
+            data = self.encode(state)
+            self.segments.append([now, data, []])
+            self.base = state
+            self.base_ids = ids
+            self.base_index = {name: {key: i for i, key in enumerate(ids[name])} for name in self.LISTS}
+            self.base_rows = {name: rows(state[name]) for name in self.LISTS}
+            self.rng_stored = {}
+        else:
+            data = self.encode(self.make_delta(state, ids))
+            self.segments[-1][2].append((now, data))
+        self.bytes += len(data)
+        self.evict(now)
+
+    def make_delta(self, state, ids):
+        base = self.base
+        fields = {}
+        for k, v in state.items():
+            if k in self.LISTS or k == 'rng' or v == base[k]:
+                continue
+            if isinstance(v, dict) and isinstance(base[k], dict):
+                fields[k] = ('patch', *diff_dict(base[k], v))
+            else:
+                fields[k] = ('set', v)
+        # a stream state is ~2.5k ints: store each distinct one once per segment and
+        # refer back to the delta that holds it
+        rng = {}
+        index = len(self.segments[-1][2])
+        for name, rng_state in state['rng'].items():
+            if rng_state == base['rng'][name]:
+                continue
+            stored = self.rng_stored.get(name)
+            if stored is not None and stored[0] == rng_state:
+                rng[name] = stored[1]
+            else:
+                rng[name] = rng_state
+                self.rng_stored[name] = (rng_state, index)
+        return {'fields': fields, 'rng': rng,
+                'lists': {name: diff_list(*self.base_rows[name], self.base_ids[name], self.base_index[name],
+                                          state[name], ids[name])
+                          for name in self.LISTS}}
+
+    def evict(self, now):
+        # whole segments go at once, since their deltas depend on the keyframe
+        while len(self.segments) > 1:
+            oldest = self.segments[0]
+            newest_time = self.segments[1][0]
+            if self.bytes <= self.max_bytes and now - newest_time < self.seconds:
+                break
+            self.segments.popleft()
+            self.bytes -= len(oldest[1]) + sum(len(data) for _, data in oldest[2])
+
+    def load(self, segment, delta_index):
+        base = self.decode(segment[1])
+        if delta_index < 0:
+            return base
+        delta = self.decode(segment[2][delta_index][1])
+        state = dict(base)
+        for k, change in delta['fields'].items():
+            state[k] = patch_dict(base[k], *change[1:]) if change[0] == 'patch' else change[1]
+        state['rng'] = dict(base['rng'])
+        for name, rng_state in delta['rng'].items():
+            if isinstance(rng_state, int):
+                rng_state = self.decode(segment[2][rng_state][1])['rng'][name]
+            state['rng'][name] = rng_state
+        for name, diff in delta['lists'].items():
+            state[name] = patch_list(base[name], diff)
+        return state
+
+    def rewind(self, seconds):
+        """Restore the newest frame at least `seconds` old and drop everything after it"""
+        if self.paused:
+            self.notify('Rewind off: too many enemies')
+            return False
+        now = self.game.now()
+        target = now - seconds
+        for si in range(len(self.segments) - 1, -1, -1):
+            segment = self.segments[si]
+            if segment[0] > target:
+                continue
+            delta_index = -1
+            stamp = segment[0]
+            for di, (frame_time, _) in enumerate(segment[2]):
+                if frame_time <= target:
+                    delta_index, stamp = di, frame_time
+            restore_state(self.game, self.load(segment, delta_index))
+            # cut the timeline after the restored frame and continue recording from it
+            while len(self.segments) > si + 1:
+                dropped = self.segments.pop()
+                self.bytes -= len(dropped[1]) + sum(len(data) for _, data in dropped[2])
+            for _, data in segment[2][delta_index + 1:]:
+                self.bytes -= len(data)
+            del segment[2][delta_index + 1:]
+            # the restored frame is now; older frames keep their distance to it
+            shift = now - stamp
+            for kept in self.segments:
+                kept[0] += shift
+                kept[2][:] = [(frame_time + shift, data) for frame_time, data in kept[2]]
+            # the restored entities are new objects, so the next frame starts a new keyframe
+            self.base = None
+            return True
+        logging.info("Nothing to rewind to yet")
+        return False
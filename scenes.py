@@ -1,10 +1,10 @@
 import pygame
-import sys
-import time
 import math
-import random
-import logging
-from entities import Bullet
+import operator
+from entities import Bullet, Shockwave
+from masks import overlap
+from spatial import SpatialGrid
+import render
 
 class Scene:
     def __init__(self, game):
@@ -34,7 +34,7 @@ class Scene:
             text_w, text_h = font.size(text)
             w = max(w, text_w + 40)  # Add some padding
 
-        mouse = pygame.mouse.get_pos()
+        mouse = self.game.mouse_pos()
         rect = pygame.Rect(0, 0, w, h)
         rect.center = (x, y)
         on_button = rect.collidepoint(mouse)
@@ -63,7 +63,7 @@ class MenuScene(Scene):
                 if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
                     self.handle_menu_selection()
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mx, my = pygame.mouse.get_pos()
+                mx, my = self.game.mouse_pos()
                 for i, item in enumerate(self.menu_items):
                     button_rect = pygame.Rect(0, 0, 250, 50)
                     button_rect.center = (self.game.window_res[0] // 2, 250 + i * 60)
@@ -80,8 +80,7 @@ class MenuScene(Scene):
         elif choice == 'Settings':
             self.game.scene = 'settings'
         elif choice == 'Quit':
-            pygame.quit()
-            sys.exit()
+            self.game.running = False
 
     def update(self):
         pass
@@ -107,7 +106,7 @@ class MenuScene(Scene):
 class SettingsScene(Scene):
     def __init__(self, game):
         super().__init__(game)
-        self.settings_items = ["player_speed", "enemy_count", "enemy_speed", "fps_limit"]
+        self.settings_items = ["player_speed", "enemy_count", "enemy_speed", "fps_limit", "horde_mode", "pixel_collision"]
         self.settings_index = 0
 
     def handle_events(self, events):
@@ -123,6 +122,8 @@ class SettingsScene(Scene):
                         self.game.SETTINGS['enemy_speed'] = max(0.1, round(self.game.SETTINGS['enemy_speed'] - 0.1, 2))
                     elif key == 'fps_limit':
                         self.game.SETTINGS['fps_limit'] = max(15, self.game.SETTINGS['fps_limit'] - 5)
+                    elif key in ('horde_mode', 'pixel_collision'):
+                        self.game.SETTINGS[key] = not self.game.SETTINGS[key]
                 if event.key == pygame.K_RIGHT:
                     key = self.settings_items[self.settings_index]
                     if key == 'player_speed':
@@ -133,6 +134,10 @@ class SettingsScene(Scene):
                         self.game.SETTINGS['enemy_speed'] = min(10.0, round(self.game.SETTINGS['enemy_speed'] + 0.1, 2))
                     elif key == 'fps_limit':
                         self.game.SETTINGS['fps_limit'] = min(240, self.game.SETTINGS['fps_limit'] + 5)
+                    elif key in ('horde_mode', 'pixel_collision'):
+                        self.game.SETTINGS[key] = not self.game.SETTINGS[key]
+                if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    self.game.stats.refresh()
                 if event.key == pygame.K_UP:
                     self.settings_index = (self.settings_index - 1) % len(self.settings_items)
                 if event.key == pygame.K_DOWN:
@@ -140,7 +145,7 @@ class SettingsScene(Scene):
                 if event.key == pygame.K_ESCAPE or event.key == pygame.K_BACKSPACE:
                     self.game.scene = 'menu'
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mx, my = pygame.mouse.get_pos()
+                mx, my = self.game.mouse_pos()
                 back_button_rect = pygame.Rect(0, 0, 150, 50)
                 back_button_rect.center = (self.game.window_res[0] // 2, 420)
                 if back_button_rect.collidepoint(mx, my):
@@ -159,8 +164,8 @@ class SettingsScene(Scene):
             self.draw_button(
                 label,
                 self.game.window_res[0] // 2,
-                150 + i * 60,
-                300, 50,
+                130 + i * 46,
+                300, 40,
                 self.game.ocean_med,
                 self.game.ocean_light,
                 is_selected=(i == self.settings_index),
@@ -209,7 +214,7 @@ class UpgradesScene(Scene):
                 if event.key == pygame.K_ESCAPE:
                     self.game.scene = 'menu'
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mx, my = pygame.mouse.get_pos()
+                mx, my = self.game.mouse_pos()
 
                 # Tab buttons
                 for i, tab_name in enumerate(self.tabs):
@@ -284,15 +289,73 @@ class UpgradesScene(Scene):
 class GameScene(Scene):
     def __init__(self, game):
         super().__init__(game)
+        # the minimap heatmap is redrawn every game.minimap_every frames
+        self.minimap_heat = None
+        self.minimap_age = 0
+
+    def draw_minimap(self, display):
+        map_x = self.game.window_res[0] - self.game.MINIMAP_W - 8
+        map_y = 8
+        # queued with the dots, so they land on it with either render backend
+        queue = self.game.render_queue
+        if self.game.current_map:
+            queue.add('minimap', self.game.current_map.minimap, (map_x, map_y))
+        scale_x = self.game.MINIMAP_W / self.game.WORLD_WIDTH
+        scale_y = self.game.MINIMAP_H / self.game.WORLD_HEIGHT
+        # enemies: one density heatmap for the whole crowd (dead enemies are skipped)
+        alive = [e for e in self.game.enemies if e.alive]
+        self.minimap_age += 1
+        if alive and render.numpy is not None:
+            if self.minimap_heat is None or self.minimap_age >= self.game.minimap_every:
+                xs = render.numpy.fromiter((e.x for e in alive), dtype=float, count=len(alive))
+                ys = render.numpy.fromiter((e.y for e in alive), dtype=float, count=len(alive))
+                self.minimap_heat = render.density_heatmap(xs, ys, (self.game.WORLD_WIDTH, self.game.WORLD_HEIGHT),
+                                                           (self.game.MINIMAP_W, self.game.MINIMAP_H), self.game.coral)
+                self.minimap_age = 0
+            queue.add('minimap', self.minimap_heat, (map_x, map_y))
+        elif alive:
+            dot = self.game.stamps.circle(self.game.coral, 2)
+            for e in alive:
+                queue.add('minimap', dot, (map_x + int(e.x * scale_x) - 2, map_y + int(e.y * scale_y) - 2))
+        queue.flush(display)
+        # player
+        px = map_x + int(self.game.player.x * scale_x)
+        py = map_y + int(self.game.player.y * scale_y)
+        pygame.draw.circle(display, self.game.biolum, (px, py), 3)
+
+    def draw_enemy_clusters(self):
+        # aggregate on-screen enemies into one blob per grid cell, sized by head count
+        cell = self.game.LOD_CLUSTER_CELL
+        cells = {}
+        for e in self.game.enemies:
+            if not e.alive:
+                # dead enemies keep their fading dot
+                e.draw()
+                continue
+            if not self.game.in_view(e.x, e.y, cell):
+                continue
+            key = (int(e.x // cell), int(e.y // cell))
+            entry = cells.get(key)
+            if entry is None:
+                cells[key] = [e.x, e.y, 1]
+            else:
+                entry[0] += e.x
+                entry[1] += e.y
+                entry[2] += 1
+        queue = self.game.render_queue
+        for sx, sy, count in cells.values():
+            screen_x, screen_y = self.game.world_to_screen(sx / count, sy / count)
+            r = max(1, int(min(cell / 2, 4 * math.sqrt(count)) * self.game.game_zoom))
+            queue.add('enemies', self.game.stamps.circle(self.game.coral, r), (int(screen_x) - r, int(screen_y) - r))
 
     def handle_events(self, events):
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # left click
-                    now = time.time()
+                    now = self.game.now()
                     # check shooting cooldown and ensure not reloading
                     if not self.game.paused and now >= self.game.shoot_cooldown and now >= self.game.reload_cooldown:
-                        mouse_x, mouse_y = pygame.mouse.get_pos()
+                        mouse_x, mouse_y = self.game.mouse_pos()
                         # convert screen coords to world coords
                         world_mx, world_my = self.game.screen_to_world(mouse_x, mouse_y)
                         dir_x = world_mx - self.game.player.x
@@ -304,60 +367,51 @@ class GameScene(Scene):
                         # decrement ammo properly
                         if self.game.AMMO > 0:
                             self.game.AMMO -= 1
-                            self.game.bullets.append(Bullet(self.game, self.game.player.x, self.game.player.y, (dir_x, dir_y)))
-                            shoot_delay = self.game.SHOOT_DELAY
-                            if 'rapid_fire' in self.game.active_power_ups:
-                                shoot_delay /= 2
-                            self.game.shoot_cooldown = now + shoot_delay
+                            self.game.registry.bullets.add(Bullet(self.game, self.game.player.x, self.game.player.y, (dir_x, dir_y)))
+                            self.game.shoot_cooldown = now + self.game.stats.shoot_delay
                         else:
                             # out of ammo sound or feedback could go here
                             pass
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:
                     # reload when R pressed (with a tiny cooldown)
-                    now = time.time()
+                    now = self.game.now()
                     if now >= self.game.reload_cooldown and self.game.AMMO < self.game.MAX_AMMO:
                         self.game.AMMO = self.game.MAX_AMMO
                         self.game.reload_cooldown = now + self.game.RELOAD_TIME
                 # pause toggle
                 if event.key == pygame.K_p:
                     self.game.paused = not self.game.paused
-                # debug: spawn 20 additional enemies (append)
+                # debug: spawn 20 additional enemies (queued, like a wave)
                 if event.key == pygame.K_2:
-                    self.game.spawn_enemies(20, append=True)
+                    self.game.director.queue(20)
                 # shield activation
                 if event.key == pygame.K_f:
-                    now = time.time()
+                    now = self.game.now()
                     if now >= self.game.shield_last_used + self.game.SHIELD_COOLDOWN:
                         self.game.shield_last_used = now
                         self.game.shield_end_time = now + self.game.SHIELD_DURATION
                         self.game.shield_active = True
+                if event.key == pygame.K_F5:
+                    self.game.quick_save()
+                if event.key == pygame.K_F9:
+                    self.game.quick_load()
+                if event.key == pygame.K_BACKSPACE:
+                    self.game.rewind.rewind(1.0)
                 if event.key == pygame.K_ESCAPE:
                     self.game.scene = 'menu'
 
     def update(self):
         if self.game.paused:
             return
+        self.game.rewind.tick()
 
-        # Power-up effects
-        original_speed = self.game.SETTINGS['player_speed']
-        original_shoot_delay = self.game.SHOOT_DELAY
-
-        now = time.time()
-        active_effects = self.game.active_power_ups.copy()
-
-        for effect, end_time in active_effects.items():
-            if now > end_time:
-                del self.game.active_power_ups[effect]
-                continue
-
-            if effect == 'speed_boost':
-                original_speed *= 1.5
-            if effect == 'rapid_fire':
-                original_shoot_delay /= 2
-            if effect == 'invincibility':
-                self.game.shield_active = True
-                self.game.shield_end_time = end_time
+        # Power-up effects; speed and fire rate come from game.stats
+        self.game.stats.expire_power_ups(self.game.now())
+        invincible_until = self.game.active_power_ups.get('invincibility')
+        if invincible_until is not None:
+            self.game.shield_active = True
+            self.game.shield_end_time = invincible_until
 
         # handle continuous key presses for movement (only in game scene)
         self.game.player.prev_x = self.game.player.x
@@ -369,8 +423,8 @@ class GameScene(Scene):
         self.game.player.knockback_velocity[0] *= self.game.player.knockback_friction
         self.game.player.knockback_velocity[1] *= self.game.player.knockback_friction
 
-        keys = pygame.key.get_pressed()
-        speed = original_speed
+        keys = self.game.keys_pressed()
+        speed = self.game.stats.player_speed
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
             self.game.player.x -= speed
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
@@ -386,7 +440,7 @@ class GameScene(Scene):
         # update camera to follow player FIRST, before rendering anything
         self.game.update_camera(self.game.player.x, self.game.player.y)
         # update shield state
-        if self.game.shield_end_time <= time.time():
+        if self.game.shield_end_time <= self.game.now():
             self.game.shield_active = False
 
         # Update boss
@@ -399,11 +453,30 @@ class GameScene(Scene):
                 for _ in range(5):
                     self.game.spawn_pickup(self.game.boss.x, self.game.boss.y, 'coin')
                 self.game.wave_active = False
-                self.game.wave_timer = time.time() + self.game.WAVE_DELAY
-
-        # Update shockwaves
+                self.game.wave_timer = self.game.now() + self.game.WAVE_DELAY
+
+        # Update shockwaves. Each ring queries grids for just the band around its edge:
+        # the enemies' is the one steering built last tick, when there is one
+        enemy_grid = pickup_grid = None
+        if self.game.shockwaves:
+            enemy_grid = self.game.sim_lod.enemy_grid()
+            if enemy_grid is None:
+                grid = SpatialGrid()
+                for e in self.game.enemies:
+                    if e.alive:
+                        grid.insert(e)
+                enemy_grid = (grid, 0)
+            pickup_grid = SpatialGrid(position=operator.itemgetter('x', 'y'))
+            for p in self.game.pickups:
+                if not p.get('picked'):
+                    pickup_grid.insert(p)
         for shockwave in self.game.shockwaves:
             shockwave.update()
+            shockwave.hit_area(enemy_grid, pickup_grid)
+            if shockwave.knockback:
+                # the enemies it pushed are up to PUSH further from where the grid has them
+                grid, margin = enemy_grid
+                enemy_grid = (grid, margin + Shockwave.PUSH)
             # Check for collision with player
             dx = shockwave.x - self.game.player.x
             dy = shockwave.y - self.game.player.y
@@ -416,90 +489,124 @@ class GameScene(Scene):
                         self.game.player.apply_knockback(direction, 15)
         self.game.shockwaves = [s for s in self.game.shockwaves if s.alive]
 
+        # queued spawns, as many as fit in this tick's budget
+        self.game.director.update()
+
         # update/draw enemies and check collisions with player
+        enemy_ai = self.game.enemy_ai
+        if enemy_ai is not None:
+            # steering for the whole crowd runs in the worker pool
+            enemy_ai.update_enemies(self.game.registry.enemies, self.game.player, self.game.stats.enemy_speed)
+            self.game.sim_lod.clear_grid()
+        else:
+            # full steering near the player, round-robin slices far away (see simlod.py)
+            self.game.sim_lod.update_enemies(self.game.registry.enemies, self.game.player)
+        enemies = self.game.registry.enemies
+        pixel_collision = self.game.SETTINGS['pixel_collision']
+        player_mask = self.game.player.hit_mask()
+        contact_reach = self.game.enemy_mask_radius + player_mask.radius
         for e in self.game.enemies:
-            e.speed = self.game.SETTINGS['enemy_speed']
-            if e.alive:
-                e.update(self.game.player, self.game.enemies)
-            else:
-                # death animation update
+            if not e.alive:
+                # death animation update: a short burst of particles on death start
+                if e.death_time == 0:
+                    self.game.make_particles(e.x, e.y, e.color, n=8)
                 e.death_time += 1
+                # removed at the end of the tick once the animation is done
+                if e.death_time >= e.death_duration:
+                    enemies.destroy(e)
             # enemy-player collision
             if e.alive:
                 dx = e.x - self.game.player.x
                 dy = e.y - self.game.player.y
                 dist_ep = math.hypot(dx, dy)
-                if dist_ep <= 16:
+                if pixel_collision:
+                    touching = dist_ep <= contact_reach and overlap(
+                        e.hit_mask(), e.x, e.y, player_mask, self.game.player.x, self.game.player.y)
+                else:
+                    touching = dist_ep <= 16
+                if touching:
                     # if shield is active, push enemy away and prevent damage
                     if self.game.shield_active:
                         # push enemy away from player a bit
                         if dist_ep == 0:
-                            nx, ny = random.uniform(-1,1), random.uniform(-1,1)
+                            nx, ny = self.game.rng.ai.uniform(-1,1), self.game.rng.ai.uniform(-1,1)
                         else:
                             nx, ny = dx / dist_ep, dy / dist_ep
-                        e.x += nx * 16
-                        e.y += ny * 16
+                        enemies.move(e, e.x + nx * e.SHIELD_PUSH, e.y + ny * e.SHIELD_PUSH)
                         # small visual feedback
                         self.game.make_particles(e.x, e.y, e.color, n=6)
                     else:
                         # enemy hits player
-                        e.alive = False
+                        enemies.kill(e)
                         e.death_time = 0  # start death animation
                         self.game.player.hp -= 1
                         self.game.make_particles(e.x, e.y, e.color, n=12)
                         self.game.spawn_pickup(e.x, e.y, 'coin')
 
-        # update bullets and collisions (bullets can destroy enemies)
-        for b in self.game.bullets[:]:
+        # update bullets and collisions (bullets can destroy enemies); removals are
+        # deferred to the end of the tick, so the lists are iterated as they are. Both
+        # loops run over the registry's position columns (see registry.py)
+        bullets = self.game.registry.bullets
+        bxs, bys, bvxs, bvys = bullets.xs, bullets.ys, bullets.vxs, bullets.vys
+        exs, eys = enemies.xs, enemies.ys
+        # no enemy further than this from a bullet can be hit by it
+        reach = (self.game.enemy_mask_radius if pixel_collision else 8) + Bullet.RADIUS
+        reach2 = reach * reach
+        for i, b in enumerate(self.game.bullets):
+            bx = bxs[i] = b.x = bxs[i] + bvxs[i]
+            by = bys[i] = b.y = bys[i] + bvys[i]
             b.update()
             # remove out-of-world bullets
-            if not (0 < b.x < self.game.WORLD_WIDTH and 0 < b.y < self.game.WORLD_HEIGHT):
-                self.game.bullets.remove(b)
+            if not (0 < bx < self.game.WORLD_WIDTH and 0 < by < self.game.WORLD_HEIGHT):
+                bullets.destroy(b)
                 continue
             # check collision with enemies
-            for e in self.game.enemies:
-                if e.alive and e.collide_with_bullet(b):
-                    e.alive = False
+            for e, ex, ey in zip(self.game.enemies, exs, eys):
+                dx = ex - bx
+                dy = ey - by
+                if dx*dx + dy*dy <= reach2 and e.alive and e.collide_with_bullet(b):
+                    enemies.kill(e)
                     e.death_time = 0  # start death animation
                     # reward player
                     self.game.score += 5
                     # cooler particle effect with more particles
                     self.game.make_particles(e.x, e.y, e.color, n=20)
                     # random pickup drop
-                    r = random.random()
+                    r = self.game.rng.loot.random()
                     if r < 0.35:
                         self.game.spawn_pickup(e.x, e.y, 'coin')
                     elif r < 0.7:
                         self.game.spawn_pickup(e.x, e.y, 'ammo')
                     else:
                         # 10% chance to drop a power-up instead of a regular pickup
-                        if random.random() < 0.1:
+                        if self.game.rng.loot.random() < 0.1:
                             unlocked_power_ups = [up.key for up in self.game.upgrades if up.category == 'power_up' and up.level > 0]
                             if unlocked_power_ups:
-                                power_up_type = random.choice(unlocked_power_ups)
+                                power_up_type = self.game.rng.loot.choice(unlocked_power_ups)
                                 self.game.spawn_power_up(e.x, e.y, power_up_type)
                         else:
                             self.game.spawn_pickup(e.x, e.y, 'health')
-                    if b in self.game.bullets:
-                        self.game.bullets.remove(b)
+                    bullets.destroy(b)
                     break
 
             # Check collision with boss
             if self.game.boss and self.game.boss.alive and self.game.boss.collide_with_bullet(b):
                 self.game.boss.hp -= 10
                 self.game.make_particles(b.x, b.y, self.game.coral, n=15)
-                if b in self.game.bullets:
-                    self.game.bullets.remove(b)
+                bullets.destroy(b)
 
         # update power-ups
-        for p in self.game.power_ups[:]:
+        for p in self.game.power_ups:
             p.update()
+            if p.destroyed:
+                continue
             # Check for collision with player
             dx = p.x - self.game.player.x
             dy = p.y - self.game.player.y
             if math.hypot(dx, dy) < 20:  # 20 is the collision radius
-                self.game.active_power_ups[p.type] = time.time() + p.duration
-                self.game.power_ups.remove(p)
+                self.game.active_power_ups[p.type] = self.game.now() + p.duration
+                self.game.stats.sync_power_ups()
+                self.game.registry.power_ups.destroy(p)
 
         # update pickups
         for p in self.game.pickups[:]:
@@ -520,7 +627,7 @@ class GameScene(Scene):
                     p['y'] += (dym / mdist) * (self.game.MAGNET_STRENGTH * mdist)
             # if already picked, shrink until consumed
             if p.get('picked'):
-                p['size'] = max(0, p.get('size', 6 * self.game.game_zoom) - p.get('shrink_rate', 0.35))
+                p['size'] = max(0, p.get('size', 6 * self.game.sim_view[1]) - p.get('shrink_rate', 0.35))
                 if p['size'] <= 0:
                     # apply pickup effect when shrink completes
                     if p['kind'] == 'coin':
@@ -567,15 +674,18 @@ class GameScene(Scene):
             self.game.scene = 'menu'
             self.game.player.hp = self.game.player.max_hp
 
-        # remove dead enemies after death animation completes
-        self.game.enemies = [e for e in self.game.enemies if e.alive or e.death_time < e.death_duration]
+        # end of tick: apply the removals queued above
+        self.game.registry.flush()
         if self.game.boss and not self.game.boss.alive:
             # A simple timer could be added to the boss for a death animation
             self.game.boss = None
 
         # wave management: if all enemies are dead, schedule/advance wave
-        alive = any(e.alive for e in self.game.enemies)
-        now = time.time()
+        alive = self.game.director.pending > 0 or self.game.registry.enemies.alive > 0
+        now = self.game.now()
+        if self.game.wave >= len(self.game.current_map.waves) and not self.game.SETTINGS['horde_mode']:
+            # final wave: get the next map ready before it is needed
+            self.game.preload_next_map()
         if not alive and self.game.wave_active:
             # wave cleared
             self.game.wave_active = False
@@ -583,10 +693,13 @@ class GameScene(Scene):
         if not self.game.wave_active and now >= self.game.wave_timer:
             # advance to next wave
             self.game.wave += 1
-            if self.game.wave == 10:
+            if self.game.SETTINGS['horde_mode']:
+                # endless: the map's last wave size grows with every wave
+                self.game.queue_wave(self.game.current_map.waves[-1]['count'])
+            elif self.game.wave == 10:
                 self.game.spawn_boss()
             elif self.game.wave <= len(self.game.current_map.waves):
-                self.game.spawn_enemies(self.game.current_map.waves[self.game.wave - 1]['count'])
+                self.game.queue_wave(self.game.current_map.waves[self.game.wave - 1]['count'])
             else:
                 # All waves cleared, move to the next map
                 self.game.current_map_index = (self.game.current_map_index + 1) % len(self.game.available_maps)
@@ -595,67 +708,83 @@ class GameScene(Scene):
             self.game.wave_active = True
 
     def draw(self, display):
-        display.fill(self.game.ocean_dark)
-
-        # Boss health bar
-        if self.game.boss and self.game.boss.alive:
-            bar_width = self.game.window_res[0] - 40
-            bar_height = 20
-            hp_ratio = self.game.boss.hp / self.game.boss.max_hp
-            pygame.draw.rect(display, self.game.ocean_dark, (19, 19, bar_width + 2, bar_height + 2))
-            pygame.draw.rect(display, (60, 60, 60), (20, 20, bar_width, bar_height))
-            pygame.draw.rect(display, self.game.coral, (20, 20, bar_width * hp_ratio, bar_height))
-            self.draw_text("BOSS", self.game.big_font, self.game.coral, display, self.game.window_res[0] // 2, 30)
+        queue = self.game.render_queue
+        queue.fill(display, self.game.ocean_dark)
+        self.game.update_view()
 
-        # draw tiled world background
-        self.game.draw_tiles()
-
-        # draw map obstacles
+        # draw the world: the map's baked chunks, or plain tiles without a map
         if self.game.current_map:
-            self.game.current_map.draw_obstacles()
+            self.game.current_map.draw(self.game)
+        else:
+            self.game.draw_tiles()
+        queue.flush(display)
 
+        # the boss goes down before its telegraph and the shockwave rings drawn over it
         if self.game.boss:
             self.game.boss.draw()
+            queue.flush(display)
+            self.game.boss.draw_telegraph()
 
         for shockwave in self.game.shockwaves:
             shockwave.draw()
 
-        for e in self.game.enemies:
-            e.draw()
+        # level-of-detail is chosen from last frame's on-screen enemy count
+        self.game.update_lod()
+        drawn_before = self.game.cull_stats['drawn']
+        if self.game.lod_level >= 3:
+            self.draw_enemy_clusters()
+        else:
+            for e in self.game.enemies:
+                e.draw()
+        self.game.visible_enemies = self.game.cull_stats['drawn'] - drawn_before
         for b in self.game.bullets:
             b.draw()
         for p in self.game.power_ups:
             p.draw()
+        stamps = self.game.stamps
         for p in self.game.pickups:
+            # pickup sizes are screen pixels, in_view wants a world margin
+            if not self.game.in_view(p['x'], p['y'], p.get('size', 6 * self.game.game_zoom) / self.game.game_zoom):
+                continue
             kind = p['kind']
             color = (255, 220, 80) if kind == 'coin' else (120, 255, 160) if kind == 'ammo' else (255, 100, 120)
             screen_px, screen_py = self.game.world_to_screen(p['x'], p['y'])
-            sz = int(p.get('size', 6 * self.game.game_zoom))
-            pygame.draw.circle(display, color, (int(screen_px), int(screen_py)), sz)
+            sz = int(p.get('size', 6 * self.game.sim_view[1]) * self.game.render_scale)
+            if sz > 0:
+                queue.add('pickups', stamps.circle(color, sz), (int(screen_px) - sz, int(screen_py) - sz))
         for q in self.game.particles:
+            if not self.game.in_view(q['x'], q['y'], q.get('size', 2)):
+                continue
             screen_px, screen_py = self.game.world_to_screen(q['x'], q['y'])
             alpha_ratio = q['life'] / q['max_life'] if q.get('max_life') else 1
             fade_size = int(q.get('size', 2) * self.game.game_zoom * alpha_ratio)
             if fade_size > 0:
-                pygame.draw.circle(display, q['color'], (int(screen_px), int(screen_py)), fade_size)
+                queue.add('particles', stamps.circle(q['color'], fade_size), (int(screen_px) - fade_size, int(screen_py) - fade_size))
+        # submit every queued world layer in one call each
+        queue.flush(display)
 
         # draw player, gun and HUD (static)
         self.game.player.draw()
         if self.game.gun_sprite:
-            mx, my = pygame.mouse.get_pos()
+            mx, my = self.game.mouse_pos()
             world_mx, world_my = self.game.screen_to_world(mx, my)
             ang = math.degrees(math.atan2(world_my - self.game.player.y, world_mx - self.game.player.x))
-            w, h = self.game.gun_sprite.get_size()
-            w_scaled = int(w * self.game.game_zoom)
-            h_scaled = int(h * self.game.game_zoom)
-            gun_scaled = pygame.transform.scale(self.game.gun_sprite, (w_scaled, h_scaled))
-            rot = pygame.transform.rotate(gun_scaled, -ang)
             player_screen_x, player_screen_y = self.game.world_to_screen(self.game.player.x, self.game.player.y)
-            rrect = rot.get_rect(center=(int(player_screen_x), int(player_screen_y)))
-            display.blit(rot, rrect.topleft)
+            queue.add_sprite('player', self.game.gun_sprite, (int(player_screen_x), int(player_screen_y)), self.game.game_zoom, angle=-ang)
+        queue.flush(display)
 
         # HUD
-        now = time.time()
+        now = self.game.now()
+
+        # Boss health bar
+        if self.game.boss and self.game.boss.alive:
+            bar_width = self.game.window_res[0] - 40
+            bar_height = 20
+            hp_ratio = self.game.boss.hp / self.game.boss.max_hp
+            pygame.draw.rect(display, self.game.ocean_dark, (19, 19, bar_width + 2, bar_height + 2))
+            pygame.draw.rect(display, (60, 60, 60), (20, 20, bar_width, bar_height))
+            pygame.draw.rect(display, self.game.coral, (20, 20, bar_width * hp_ratio, bar_height))
+            self.draw_text("BOSS", self.game.big_font, self.game.coral, display, self.game.window_res[0] // 2, 30)
 
         # Top-left HUD elements
         top_left_y = 5
@@ -709,21 +838,7 @@ class GameScene(Scene):
             display.blit(txt, (int(sx - txt.get_width() / 2), int(sy)))
 
         # minimap (static)
-        map_x = self.game.window_res[0] - self.game.MINIMAP_W - 8
-        map_y = 8
-        pygame.draw.rect(display, self.game.ocean_med, (map_x, map_y, self.game.MINIMAP_W, self.game.MINIMAP_H))
-        pygame.draw.rect(display, self.game.foam, (map_x, map_y, self.game.MINIMAP_W, self.game.MINIMAP_H), 1)
-        scale_x = self.game.MINIMAP_W / self.game.WORLD_WIDTH
-        scale_y = self.game.MINIMAP_H / self.game.WORLD_HEIGHT
-        # enemies
-        for e in self.game.enemies:
-            ex = map_x + int(e.x * scale_x)
-            ey = map_y + int(e.y * scale_y)
-            pygame.draw.circle(display, self.game.coral if e.alive else (60,60,60), (ex, ey), 2)
-        # player
-        px = map_x + int(self.game.player.x * scale_x)
-        py = map_y + int(self.game.player.y * scale_y)
-        pygame.draw.circle(display, self.game.biolum, (px, py), 3)
+        self.draw_minimap(display)
 
         if self.game.paused:
             # paused overlay
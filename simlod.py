@@ -0,0 +1,153 @@
+"""Simulation level of detail for in-process enemy steering.
+
+Near enemies get the full step every tick, far ones a round-robin slice; the choice
+depends only on simulated state and a tick counter, so replays stay exact.
+"""
+import itertools
+
+from entities import Enemy
+from spatial import SpatialGrid
+
+
+class SimulationLOD:
+    FAR_EVERY = 4  # far enemies steer every FAR_EVERY-th tick
+    NEAR_RADIUS = 600  # full steering within this distance of the player...
+    VIEW_MARGIN = 200  # ...or within this far of the screen edge
+    CELL = 60  # neighbour grid cell; matches Enemy.avoid_radius
+    # simulation state, saved and restored with the rest of the game (savestate.py)
+    STATE = ('tick',)
+
+    def __init__(self, game):
+        self.game = game
+        self.tick = 0
+        self.stats = {'near': 0, 'far': 0, 'steered': 0}
+        self.grid = None  # last steering's cells, as (cells of indices, the enemies indexed)
+        self.spatial = None  # grid as a SpatialGrid of enemies, built on demand
+
+    def clear_grid(self):
+        self.grid = self.spatial = None
+
+    def view_bounds(self):
+        # computed from the simulated camera, not the render thread's view rect
+        game = self.game
+        m = self.VIEW_MARGIN
+        (res_w, res_h), zoom = game.sim_view
+        return (game.camera_x - m, game.camera_y - m,
+                game.camera_x + res_w / zoom + m,
+                game.camera_y + res_h / zoom + m)
+
+    def enemy_grid(self):
+        """The last tick's neighbour grid and how far its enemies may have moved since, or None"""
+        if self.grid is None:
+            return None
+        if self.spatial is None:
+            cells, members = self.grid
+            self.spatial = SpatialGrid(self.CELL, cells={key: [*map(members.__getitem__, bucket)]
+                                                         for key, bucket in cells.items()})
+        # their steering step, which is each enemy's velocity (or an older, larger one for
+        # far enemies that skipped this tick), then the shield's push, which comes after
+        pool = self.game.registry.enemies
+        step = max(map(abs, pool.vxs), default=0.0) + max(map(abs, pool.vys), default=0.0)
+        return self.spatial, step + Enemy.SHIELD_PUSH
+
+    def update_enemies(self, pool, player):
+        """Steer the enemies in pool, the registry's, through its position and velocity columns"""
+        self.tick += 1
+        tick = self.tick
+        px, py = player.x, player.y
+        r2 = self.NEAR_RADIUS * self.NEAR_RADIUS
+        left, top, right, bottom = self.view_bounds()
+        cell = self.CELL
+        items, xs, ys, vxs, vys = pool.items, pool.xs, pool.ys, pool.vxs, pool.vys
+        grid = {}
+        near = []
+        far = []
+        for i, e, x, y in zip(itertools.count(), items, xs, ys):
+            if not e.alive:
+                continue
+            grid.setdefault((int(x // cell), int(y // cell)), []).append(i)
+            dx = x - px
+            dy = y - py
+            if dx * dx + dy * dy < r2 or (left < x < right and top < y < bottom):
+                near.append(i)
+            else:
+                far.append(i)
+
+        for i in near:
+            # chase plus separation from the enemies in neighbouring cells, which see the
+            # moves made earlier in this loop
+            e = items[i]
+            x = xs[i]
+            y = ys[i]
+            dx = px - x
+            dy = py - y
+            dist = (dx*dx + dy*dy) ** 0.5
+            avoid = e.avoid_radius
+            sep_x, sep_y = 0, 0
+            cx, cy = int(x // cell), int(y // cell)
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    for j in grid.get((gx, gy), ()):
+                        if j == i:
+                            continue
+                        odx = x - xs[j]
+                        ody = y - ys[j]
+                        odist = (odx*odx + ody*ody) ** 0.5
+                        if 0 < odist < avoid:
+                            sep_x += (odx / odist) * 0.5
+                            sep_y += (ody / odist) * 0.5
+
+            # combine: 70% chase, 30% separation
+            if dist != 0:
+                chase_x = (dx / dist) * 0.7
+                chase_y = (dy / dist) * 0.7
+            else:
+                chase_x = chase_y = 0
+            total_x = chase_x + sep_x * 0.3
+            total_y = chase_y + sep_y * 0.3
+            total_dist = (total_x*total_x + total_y*total_y) ** 0.5
+            if total_dist > 0:
+                vx = (total_x / total_dist) * e.speed
+                vy = (total_y / total_dist) * e.speed
+                xs[i] = e.x = x + vx
+                ys[i] = e.y = y + vy
+            else:
+                vx = vy = 0.0
+            vxs[i] = e.vx = vx
+            vys[i] = e.vy = vy
+            e.sim_tick = tick
+
+        k = self.FAR_EVERY
+        phase = tick % k
+        steered = 0
+        for n, i in enumerate(far):
+            # list positions shift as enemies die or change band; anything that missed
+            # its slice that way catches up on the next tick
+            e = items[i]
+            if n % k != phase and tick - e.sim_tick < 2 * k:
+                continue
+            # chase only, all the skipped ticks' worth at once; capped, in case another
+            # stepper (parallel_ai.py) moved it in between
+            x = xs[i]
+            y = ys[i]
+            dx = px - x
+            dy = py - y
+            dist = (dx*dx + dy*dy) ** 0.5
+            if dist > 0:
+                move = min(e.speed * min(tick - e.sim_tick, 2 * k), dist)
+                vx = dx / dist * move
+                vy = dy / dist * move
+                xs[i] = e.x = x + vx
+                ys[i] = e.y = y + vy
+            else:
+                vx = vy = 0.0
+            vxs[i] = e.vx = vx
+            vys[i] = e.vy = vy
+            e.sim_tick = tick
+            steered += 1
+        self.stats['near'] = len(near)
+        self.stats['far'] = len(far)
+        self.stats['steered'] = len(near) + steered
+        # the grid holds indices, and the end-of-tick flush reorders the list they index, so keep a copy
+        self.grid = (grid, list(items))
+        self.spatial = None
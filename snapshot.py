@@ -0,0 +1,101 @@
+import copy
+import queue
+import threading
+import logging
+import pygame
+
+
+class WorldSnapshot:
+    """Frozen copy of everything GameScene.draw reads, taken at the end of a simulation tick.
+
+    Anything not captured is read through from the live game."""
+    # frame-to-frame render bookkeeping; only the render thread touches it, on the game
+    RENDER_STATE = frozenset(('view_left', 'view_top', 'view_right', 'view_bottom', 'lod_level', 'visible_enemies'))
+    # game_zoom, window_res and display are owned by the render thread, not copied
+    SCALARS = ('scene', 'camera_x', 'camera_y', 'score', 'AMMO', 'MAX_AMMO',
+               'reload_cooldown', 'RELOAD_TIME', 'shield_last_used', 'SHIELD_COOLDOWN',
+               'shield_end_time', 'SHIELD_DURATION', 'wave', 'paused', 'current_map', 'frame_time')
+
+    def __init__(self, game):
+        object.__setattr__(self, 'game', game)
+        for name in self.SCALARS:
+            object.__setattr__(self, name, getattr(game, name))
+        self.active_power_ups = dict(game.active_power_ups)
+        self.player = self.freeze(game.player)
+        self.boss = self.freeze(game.boss) if game.boss else None
+        self.enemies = [self.freeze(e) for e in game.enemies]
+        self.bullets = [self.freeze(b) for b in game.bullets]
+        self.power_ups = [self.freeze(p) for p in game.power_ups]
+        self.shockwaves = [self.freeze(s) for s in game.shockwaves]
+        self.pickups = [dict(p) for p in game.pickups]
+        self.particles = [dict(q) for q in game.particles]
+        self.popups = [dict(p) for p in game.popups]
+
+    def freeze(self, entity):
+        clone = copy.copy(entity)
+        clone.game = self
+        return clone
+
+    def __getattr__(self, name):
+        # only called for names the snapshot does not hold itself
+        attr = getattr(type(self.game), name, None)
+        if callable(attr):
+            return attr.__get__(self)
+        return getattr(self.game, name)
+
+    def __setattr__(self, name, value):
+        if name in self.RENDER_STATE:
+            setattr(self.game, name, value)
+        else:
+            object.__setattr__(self, name, value)
+
+
+class SnapshotBuffer:
+    """Double buffer: the simulation fills the back slot, then swaps it to the front"""
+    def __init__(self):
+        self.slots = [None, None]
+        self.front = 0
+        self.lock = threading.Lock()
+
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        with self.lock:
+            self.front = back
+
+    def latest(self):
+        # snapshots are never modified once published, so holding one after a swap is safe
+        with self.lock:
+            return self.slots[self.front]
+
+
+class SimulationThread(threading.Thread):
+    """Runs scene events and updates at the fps_limit rate, publishing a snapshot per tick"""
+    def __init__(self, game):
+        super().__init__(name='simulation', daemon=True)
+        self.game = game
+        self.events = queue.Queue()
+        self.snapshots = SnapshotBuffer()
+        self.clock = pygame.time.Clock()
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self.join(timeout=1.0)
+
+    def run(self):
+        try:
+            while self.running and self.game.running:
+                events = []
+                while True:
+                    try:
+                        events.extend(self.events.get_nowait())
+                    except queue.Empty:
+                        break
+                self.game.step(events)
+                if self.game.scene == 'game':
+                    self.snapshots.publish(WorldSnapshot(self.game))
+                self.clock.tick(self.game.SETTINGS.get('fps_limit', 60))
+        except Exception:
+            logging.exception("Simulation thread crashed")
+            self.game.running = False
@@ -0,0 +1,68 @@
+"""Uniform grid over entities, for range queries against many of them at once.
+
+Buckets hold the entities and positions are read at query time, so a grid built
+earlier in the tick stays valid while its entities move less than `margin`.
+"""
+import math
+import operator
+
+POSITION = operator.attrgetter('x', 'y')
+
+
+class SpatialGrid:
+    def __init__(self, cell=64, position=POSITION, cells=None):
+        self.cell = cell
+        self.position = position
+        self.cells = {} if cells is None else cells
+        self.visited = 0  # entities distance-tested by queries, for benchmarks
+
+    def insert(self, item):
+        x, y = self.position(item)
+        key = (int(x // self.cell), int(y // self.cell))
+        bucket = self.cells.get(key)
+        if bucket is None:
+            self.cells[key] = [item]
+        else:
+            bucket.append(item)
+
+    def query_annulus(self, x, y, inner, outer, margin=0):
+        """(item, dx, dy, dist) for every item with inner <= dist <= outer from (x, y)"""
+        cell = self.cell
+        cells = self.cells
+        position = self.position
+        inner2 = max(0.0, inner) ** 2
+        outer2 = outer * outer
+        # the cells to visit, widened by how far entities may have moved since insertion
+        hole2 = max(0.0, inner - margin) ** 2
+        rim = outer + margin
+        found = []
+        for cy in range(int((y - rim) // cell), int((y + rim) // cell) + 1):
+            # nearest and farthest vertical distance from the centre within this row
+            top = cy * cell - y
+            bottom = top + cell
+            near = 0.0 if top <= 0 <= bottom else min(abs(top), abs(bottom))
+            far = max(abs(top), abs(bottom))
+            reach = math.sqrt(max(0.0, rim * rim - near * near))
+            spans = [(int((x - reach) // cell), int((x + reach) // cell))]
+            if hole2 > far * far:
+                # columns within the hole's width in this row lie wholly inside it
+                hole = math.sqrt(hole2 - far * far)
+                first = math.ceil((x - hole) / cell)
+                last = math.floor((x + hole) / cell) - 1
+                if first <= last:
+                    lo, hi = spans[0]
+                    spans = [(lo, min(hi, first - 1)), (max(lo, last + 1), hi)]
+            for lo, hi in spans:
+                for cx in range(lo, hi + 1):
+                    bucket = cells.get((cx, cy))
+                    if not bucket:
+                        continue
+                    self.visited += len(bucket)
+                    for item in bucket:
+                        ix, iy = position(item)
+                        dx = ix - x
+                        dy = iy - y
+                        d2 = dx * dx + dy * dy
+                        if inner2 <= d2 <= outer2:
+                            found.append((item, dx, dy, math.sqrt(d2)))
+        return found
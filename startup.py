@@ -0,0 +1,38 @@
+"""Startup timing. main.py imports this first, marks each phase as it completes and
+reports once the first menu frame is on screen."""
+import logging
+import time
+
+START = time.perf_counter()
+
+
+class StartupProfile:
+    BUDGET_MS = 300  # target for a menu the player can interact with
+
+    def __init__(self, start=START):
+        self.start = start
+        self.last = start
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        # time since the previous mark is charged to this phase
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total_ms(self):
+        return (self.last - self.start) * 1000
+
+    def report(self):
+        self.reported = True
+        total = self.total_ms()
+        breakdown = ', '.join(f"{phase} {seconds * 1000:.0f}" for phase, seconds in self.phases)
+        message = f"Startup took {total:.0f} ms ({breakdown})"
+        if total > self.BUDGET_MS:
+            logging.warning(f"{message}, over the {self.BUDGET_MS} ms budget")
+        else:
+            logging.info(message)
+
+
+profile = StartupProfile()
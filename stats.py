@@ -0,0 +1,67 @@
+"""Derived stats: the values hot loops read, cached until something changes them.
+
+Anything that changes a base value or a modifier must call DerivedStats.refresh().
+"""
+import math
+
+# multipliers each power-up applies while active
+POWER_UP_MODIFIERS = {
+    'speed_boost': {'player_speed': 1.5},
+    'rapid_fire': {'shoot_delay': 0.5},
+}
+
+
+class DerivedStats:
+    def __init__(self, game):
+        self.game = game
+        self.modifiers = {}
+        self.next_expiry = math.inf  # earliest end time in game.active_power_ups
+        self.enemy_speed = None
+        self.bullet_speed = None
+        self.refresh()
+
+    def refresh(self):
+        """Recompute every derived value; call after a base value changes"""
+        game = self.game
+        values = {
+            'player_speed': game.SETTINGS['player_speed'],
+            'shoot_delay': game.SHOOT_DELAY,
+            'bullet_speed': game.SETTINGS.get('bullet_speed', 5),
+            'enemy_speed': game.SETTINGS['enemy_speed'],
+        }
+        for factors in self.modifiers.values():
+            for name, factor in factors.items():
+                values[name] *= factor
+        self.player_speed = values['player_speed']
+        self.shoot_delay = values['shoot_delay']
+        if values['bullet_speed'] != self.bullet_speed:
+            # bullets in flight keep their velocity, set when they are fired
+            bullets = game.registry.bullets
+            for b in game.bullets:
+                bullets.set_velocity(b, b.direction[0] * values['bullet_speed'], b.direction[1] * values['bullet_speed'])
+        self.bullet_speed = values['bullet_speed']
+        if values['enemy_speed'] != self.enemy_speed:
+            # enemies keep their own copy, set when they spawn
+            for e in game.enemies:
+                e.speed = values['enemy_speed']
+        self.enemy_speed = values['enemy_speed']
+
+    def sync_power_ups(self):
+        """Rebuild the power-up modifiers from game.active_power_ups after it changes"""
+        active = self.game.active_power_ups
+        for name in POWER_UP_MODIFIERS:
+            self.modifiers.pop(name, None)
+        for name in active:
+            if name in POWER_UP_MODIFIERS:
+                self.modifiers[name] = POWER_UP_MODIFIERS[name]
+        self.next_expiry = min(active.values(), default=math.inf)
+        self.refresh()
+
+    def expire_power_ups(self, now):
+        if now <= self.next_expiry:
+            return
+        active = self.game.active_power_ups
+        for name, end_time in list(active.items()):
+            if now > end_time:
+                del active[name]
+        self.sync_power_ups()
@@ -0,0 +1,138 @@
+"""Generate seeded stress maps: thousands of obstacles and long wave schedules.
+
+Writes maps/<name>.json and its .chunks obstacle file (maps.save_chunked_map), which
+Map loads like any other map:
+
+    python tools/genmap.py stress_maze --layout maze --obstacles 5000 --world 12800 7680 \\
+        --waves 300 --first 10 --growth 1.02 --max-count 400
+
+Layouts: corridors (long walls with doorways), maze (the walls of a perfect maze),
+pillars (small squares scattered evenly) and clutter (rectangles of all sizes piled
+into clusters). The middle of the world, where the player starts, is kept clear.
+The same seed and arguments always give the same map.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLEAR = 160  # half-size of the empty square around the player's start
+
+
+def corridors(rng, width, height, count):
+    # horizontal walls in evenly spaced lanes, cut into segments by doorways
+    segment = 500
+    per_lane = max(1, width // (segment + 110))
+    lanes = max(1, -(-count // per_lane))
+    spacing = height / (lanes + 1)
+    obstacles = []
+    for lane in range(1, lanes + 1):
+        y = int(lane * spacing)
+        x = rng.randrange(0, 120)
+        while x < width and len(obstacles) < count:
+            length = rng.randrange(segment // 2, segment * 3 // 2)
+            obstacles.append((x, y, min(length, width - x), 16))
+            x += length + rng.randrange(80, 140)
+    return obstacles
+
+
+def maze(rng, width, height, count):
+    # a perfect maze leaves about one wall per cell, so size the cells from the count
+    cell = max(64, int(math.sqrt(width * height / count)))
+    cols, rows = width // cell, height // cell
+    wall = max(8, cell // 8)
+    visited = [[False] * rows for _ in range(cols)]
+    # walls still standing: (x, y, 'v') right of cell (x, y), (x, y, 'h') below it
+    walls = {(x, y, side) for x in range(cols) for y in range(rows) for side in 'vh'}
+    stack = [(cols // 2, rows // 2)]
+    visited[cols // 2][rows // 2] = True
+    while stack:
+        x, y = stack[-1]
+        options = [(nx, ny) for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                   if 0 <= nx < cols and 0 <= ny < rows and not visited[nx][ny]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        if nx != x:
+            walls.discard((min(x, nx), y, 'v'))
+        else:
+            walls.discard((x, min(y, ny), 'h'))
+        visited[nx][ny] = True
+        stack.append((nx, ny))
+    obstacles = []
+    for x, y, side in sorted(walls):
+        if side == 'v' and x < cols - 1:
+            obstacles.append(((x + 1) * cell - wall // 2, y * cell, wall, cell))
+        elif side == 'h' and y < rows - 1:
+            obstacles.append((x * cell, (y + 1) * cell - wall // 2, cell, wall))
+    return obstacles
+
+
+def pillars(rng, width, height, count):
+    obstacles = []
+    for _ in range(count):
+        size = rng.randrange(16, 48)
+        obstacles.append((rng.randrange(0, width - size), rng.randrange(0, height - size), size, size))
+    return obstacles
+
+
+def clutter(rng, width, height, count):
+    clusters = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range(max(1, count // 50))]
+    spread = math.sqrt(width * height / len(clusters)) / 3
+    obstacles = []
+    for _ in range(count):
+        cx, cy = rng.choice(clusters)
+        w, h = rng.randrange(20, 200), rng.randrange(20, 200)
+        x = int(min(max(0, rng.gauss(cx, spread)), width - w))
+        y = int(min(max(0, rng.gauss(cy, spread)), height - h))
+        obstacles.append((x, y, w, h))
+    return obstacles
+
+
+LAYOUTS = {'corridors': corridors, 'maze': maze, 'pillars': pillars, 'clutter': clutter}
+
+
+def generate(layout, seed, width, height, count):
+    """Obstacles as (x, y, w, h) ints, with the start area clear"""
+    rng = random.Random(seed)
+    left, top = width // 2 - CLEAR, height // 2 - CLEAR
+    right, bottom = width // 2 + CLEAR, height // 2 + CLEAR
+    return [(x, y, w, h) for x, y, w, h in LAYOUTS[layout](rng, width, height, count)
+            if x >= right or x + w <= left or y >= bottom or y + h <= top]
+
+
+def wave_schedule(waves, first, growth, max_count):
+    return [{'count': min(max_count, round(first * growth ** i))} for i in range(waves)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('name', help='map name; writes <maps-dir>/<name>.json')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='pillars')
+    parser.add_argument('--obstacles', type=int, default=2000)
+    parser.add_argument('--world', type=int, nargs=2, default=[12800, 7680], metavar=('W', 'H'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--waves', type=int, default=100)
+    parser.add_argument('--first', type=int, default=10, help='enemies in the first wave')
+    parser.add_argument('--growth', type=float, default=1.03, help='wave size factor per wave')
+    parser.add_argument('--max-count', type=int, default=500, help='largest wave')
+    parser.add_argument('--chunk-size', type=int, default=512)
+    parser.add_argument('--maps-dir', default=os.path.join(ROOT, 'maps'))
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from maps import save_chunked_map
+
+    width, height = args.world
+    obstacles = generate(args.layout, args.seed, width, height, args.obstacles)
+    waves = wave_schedule(args.waves, args.first, args.growth, args.max_count)
+    save_chunked_map(args.name, (width, height), obstacles, waves, args.chunk_size, args.maps_dir)
+    print(f"{args.name}: {args.layout}, {len(obstacles)} obstacles in {width}x{height}, "
+          f"{len(waves)} waves of {waves[0]['count']} to {waves[-1]['count']} -> {args.maps_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Replay a session recorded with `python main.py --record=session.rec`.
+
+Runs headless as fast as possible and reports throughput; exits non-zero if the
+replay diverges from the recorded state checksums, so a recording doubles as a
+regression test and a benchmark:
+
+    python tools/replay.py session.rec          # simulation only
+    python tools/replay.py session.rec --draw   # also render every tick
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# imported for its side effect: it selects the dummy SDL drivers before pygame starts
+import headless
+import pygame
+from main import Game
+from replay import Replayer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recording')
+    parser.add_argument('--draw', action='store_true', help='render every tick as well')
+    args = parser.parse_args()
+
+    replayer = Replayer(args.recording)
+    game = Game(seed=replayer.header['seed'], enemy_workers=replayer.header['enemy_workers'])
+    replayer.attach(game)
+    start = time.perf_counter()
+    try:
+        while game.running and replayer.tick():
+            if args.draw:
+                game.scenes[game.scene].draw(game.display)
+                game.present()
+    finally:
+        elapsed = time.perf_counter() - start
+        replayer.close()
+        game.close()
+        pygame.quit()
+
+    ticks = replayer.ticks
+    print(f"{ticks} ticks ({replayer.elapsed_us / 1e6:.1f} s of play) in {elapsed:.2f} s: "
+          f"{ticks / max(elapsed, 1e-9):.0f} ticks/s, {elapsed / max(ticks, 1) * 1000:.3f} ms/tick")
+    if replayer.divergence is not None:
+        print(f"diverged at tick {replayer.divergence}")
+        sys.exit(1)
+    print("replay matches the recording")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Soak test: play headless for hours and fail if memory, entity lists or frame time keep growing.
+
+The autoplay bot plays on a stepped clock, buying upgrades between waves, and every
+map is played in turn; each visit also fights the wave 10 boss, which the maps' own
+wave lists never reach. The player is revived at the start of the same map when it
+dies. Every --sample-every seconds of game time a sample records the size of the
+game's lists, the process RSS and the median wall time of a tick (simulation plus a
+drawn frame, unless --no-draw):
+
+    python tools/soak.py --hours 2 --out soak.jsonl
+
+After the warm-up, the samples are split into an early and a late half. A metric
+fails if its late peak is above its early peak by more than the tolerance in LIMITS;
+bounded lists and caches level off, leaks keep climbing. The exit status is 1 when
+any metric fails.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LISTS = ('particles', 'pickups', 'popups', 'shockwaves', 'enemies', 'bullets', 'power_ups')
+# metric: (relative, absolute) growth allowed from the early to the late peak
+LIMITS = {name: (0.5, 20) for name in LISTS}
+LIMITS['rss_mb'] = (0.1, 16)
+LIMITS['tick_ms'] = (0.5, 1.0)
+
+
+def rss_mb():
+    # current resident size on Linux; elsewhere the peak, which still shows growth
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def sample(game, clock, tick_ms):
+    row = {'seconds': round(clock.seconds(clock.ticks)), 'map': game.current_map_index, 'wave': game.wave}
+    for name in LISTS:
+        row[name] = len(getattr(game, name))
+    row['rss_mb'] = round(rss_mb(), 1)
+    row['tick_ms'] = round(statistics.median(tick_ms), 3)
+    return row
+
+
+def check(samples, warmup):
+    """(metric, early peak, late peak) for every metric over its limit"""
+    settled = [row for row in samples if row['seconds'] >= warmup]
+    if len(settled) < 4:
+        return []
+    half = len(settled) // 2
+    failures = []
+    for name, (relative, absolute) in LIMITS.items():
+        early = max(row[name] for row in settled[:half])
+        late = max(row[name] for row in settled[half:])
+        if late > early * (1 + relative) + absolute:
+            failures.append((name, early, late))
+    return failures
+
+
+def soak(args):
+    sys.path.insert(0, ROOT)
+    import pygame
+    import headless
+    from bot import AutoplayBot
+
+    game = headless.create_game(seed=args.seed)
+    clock = game.time_source
+    scene = game.scenes['game']
+    bot = AutoplayBot(shop=True)
+    out = open(args.out, 'w') if args.out else None
+    samples = []
+    deaths = bosses = maps = 0
+    try:
+        game.start_game()
+        map_index = game.current_map_index
+        boss_due = True
+        tick_ms = []
+        end = args.hours * 3600 / clock.dt
+        every = int(args.sample_every / clock.dt)
+        while clock.ticks < end:
+            if game.scene != 'game':
+                deaths += 1
+                game.start_game()
+                boss_due = True
+            if game.current_map_index != map_index:
+                maps += 1
+                map_index = game.current_map_index
+                boss_due = True
+            # between the map's last wave and the next map, detour through wave 10
+            if boss_due and not game.wave_active and game.wave == len(game.current_map.waves):
+                game.wave = 9
+                boss_due = False
+                bosses += 1
+
+            start = time.perf_counter()
+            headless.tick(game, bot)
+            if args.draw and game.scene == 'game':
+                scene.draw(game.display)
+                game.draw_debug_overlay()
+            tick_ms.append((time.perf_counter() - start) * 1000)
+
+            if clock.ticks % every == 0:
+                row = sample(game, clock, tick_ms)
+                tick_ms = []
+                samples.append(row)
+                if out:
+                    out.write(json.dumps(row) + '\n')
+                    out.flush()
+                print(f"{row['seconds']:>7}s map {row['map']} wave {row['wave']:>2}  "
+                      + '  '.join(f"{name} {row[name]}" for name in LISTS)
+                      + f"  rss {row['rss_mb']} MB  tick {row['tick_ms']} ms")
+    finally:
+        if out:
+            out.close()
+        game.close()
+        pygame.quit()
+    print(f"{clock.seconds(clock.ticks) / 3600:.2f} h of play: {maps} map changes, {bosses} boss waves, {deaths} deaths")
+    return check(samples, args.warmup * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=1.0, help='game time to play')
+    parser.add_argument('--sample-every', type=float, default=30.0, metavar='SECONDS')
+    parser.add_argument('--warmup', type=float, default=5.0, metavar='MINUTES',
+                        help='game time before samples count towards the growth check')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-draw', dest='draw', action='store_false', help='simulate only')
+    parser.add_argument('--out', help='JSON-lines file for the samples')
+    args = parser.parse_args()
+
+    failures = soak(args)
+    for name, early, late in failures:
+        print(f"FAIL {name}: early peak {early}, late peak {late}")
+    if failures:
+        sys.exit(1)
+    print("no unbounded growth")
+
+
+if __name__ == '__main__':
+    main()
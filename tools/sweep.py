@@ -0,0 +1,199 @@
+"""Balance sweep: play many seeded headless games across a process pool.
+
+Every combination of the grid is played once per seed by the autoplay bot on a
+stepped clock, so runs are reproducible and independent of machine speed. Rows are
+appended to a JSON-lines file as games finish; rerunning with the same --out skips
+combinations already recorded, so an interrupted sweep resumes where it stopped:
+
+    python tools/sweep.py --set enemy_speed=1.0,1.2,1.5 --set bullet_speed=5,7 \\
+        --upgrade max_ammo=0,2 --maps map1 map2 --seeds 4 --out sweep.jsonl
+
+--set takes SETTINGS keys, --upgrade takes Upgrade keys and levels bought before play.
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_grid(items):
+    # ["enemy_speed=1.0,1.2", ...] -> {'enemy_speed': [1.0, 1.2]}
+    grid = {}
+    for item in items or []:
+        key, _, values = item.partition('=')
+        grid[key] = [parse_value(v) for v in values.split(',')]
+    return grid
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def expand(grid):
+    keys = sorted(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def job_key(job):
+    return hashlib.sha1(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def make_jobs(settings_grid, upgrade_grid, maps, seeds, max_ticks):
+    for game_map in maps:
+        for settings in expand(settings_grid):
+            for upgrades in expand(upgrade_grid):
+                for seed in range(seeds):
+                    yield {'map': game_map, 'settings': settings, 'upgrades': upgrades,
+                           'seed': seed, 'max_ticks': max_ticks}
+
+
+def buy_upgrades(game, levels):
+    # buy levels at list price, then leave the player with nothing banked
+    by_key = {up.key: up for up in game.upgrades}
+    for key, level in levels.items():
+        upgrade = by_key[key]
+        for _ in range(level):
+            if isinstance(upgrade.cost, str):
+                break
+            game.score = upgrade.cost
+            upgrade.apply_upgrade(game)
+    game.score = 0
+
+
+def play(job):
+    """Play one game to death or max_ticks and return its result row"""
+    sys.path.insert(0, ROOT)
+    import pygame
+    import headless
+    from bot import AutoplayBot
+
+    game = headless.create_game(seed=job['seed'])
+    clock = game.time_source
+    try:
+        game.SETTINGS.update(job['settings'])
+        buy_upgrades(game, job['upgrades'])
+        game.current_map_index = game.available_maps.index(job['map'])
+        game.start_game()
+        bot = AutoplayBot()
+
+        waves = 0
+        maps_cleared = 0
+        score = 0
+        hits = 0
+        spawned = {}
+        kill_ticks = []
+        tick_ms = []
+        wave, map_index = game.wave, game.current_map_index
+        last_score, last_hp = game.score, game.player.hp
+        while clock.ticks < job['max_ticks'] and game.scene == 'game':
+            for e in game.enemies:
+                if e.alive and id(e) not in spawned:
+                    spawned[id(e)] = (e, clock.ticks)
+
+            start = time.perf_counter()
+            headless.tick(game, bot)
+            tick_ms.append((time.perf_counter() - start) * 1000)
+
+            for key, (e, born) in list(spawned.items()):
+                if not e.alive:
+                    kill_ticks.append(clock.ticks - born)
+                    del spawned[key]
+            # a cleared map restarts at wave 1 with the score reset, so count deltas
+            if game.wave != wave:
+                waves += 1
+                wave = game.wave
+            if game.current_map_index != map_index:
+                maps_cleared += 1
+                map_index = game.current_map_index
+            score += max(0, game.score - last_score)
+            hits += max(0, last_hp - game.player.hp)
+            last_score, last_hp = game.score, game.player.hp
+
+        tick_ms.sort()
+        return {
+            'key': job_key(job),
+            **job,
+            'died': game.scene != 'game',
+            'ticks': clock.ticks,
+            'seconds': clock.seconds(clock.ticks),
+            'waves_survived': waves,
+            'maps_cleared': maps_cleared,
+            'score': score,
+            'kills': len(kill_ticks),
+            'hits_taken': hits,
+            'mean_time_to_kill': clock.seconds(sum(kill_ticks) / len(kill_ticks)) if kill_ticks else None,
+            'tick_ms_mean': sum(tick_ms) / len(tick_ms) if tick_ms else 0.0,
+            'tick_ms_p95': tick_ms[int(len(tick_ms) * 0.95)] if tick_ms else 0.0,
+        }
+    finally:
+        game.close()
+        pygame.quit()
+
+
+def load_done(path):
+    done = set()
+    if not os.path.isfile(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['key'])
+            except (ValueError, KeyError):
+                # a half-written last line from an interrupted run
+                continue
+    return done
+
+
+def prepare_assets():
+    # generate the sprite files once, before workers race to write them
+    sys.path.insert(0, ROOT)
+    import pygame
+    import headless
+    headless.create_game().close()
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--set', action='append', metavar='KEY=V1,V2', help='SETTINGS values to sweep')
+    parser.add_argument('--upgrade', action='append', metavar='KEY=L1,L2', help='Upgrade levels to sweep')
+    parser.add_argument('--maps', nargs='+', default=['map1'])
+    parser.add_argument('--seeds', type=int, default=3)
+    parser.add_argument('--max-ticks', type=int, default=60 * 60 * 5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--out', default='sweep.jsonl')
+    args = parser.parse_args()
+
+    jobs = list(make_jobs(parse_grid(args.set), parse_grid(args.upgrade), args.maps, args.seeds, args.max_ticks))
+    done = load_done(args.out)
+    todo = [job for job in jobs if job_key(job) not in done]
+    print(f"{len(jobs)} games, {len(jobs) - len(todo)} already in {args.out}, {len(todo)} to play")
+    if not todo:
+        return
+
+    prepare_assets()
+    ctx = multiprocessing.get_context('spawn')
+    with open(args.out, 'a') as out, \
+            concurrent.futures.ProcessPoolExecutor(args.workers, mp_context=ctx) as pool:
+        futures = [pool.submit(play, job) for job in todo]
+        for n, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            row = future.result()
+            out.write(json.dumps(row) + '\n')
+            out.flush()
+            print(f"[{n}/{len(todo)}] {row['map']} {row['settings']} {row['upgrades']} seed={row['seed']}: "
+                  f"waves={row['waves_survived']} score={row['score']} {row['tick_ms_mean']:.2f} ms/tick")
+
+
+if __name__ == '__main__':
+    main()